@@ -0,0 +1,112 @@
+# benchmarks/dom_extract_bench.py
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from modules.dom_extract import _fortuna_rows, _sts_rows, extract_fortuna_markets, extract_sts_markets
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Strony meczów odtworzone z kursów zapisanych w sts_data.csv / fortuna_data.csv
+# (Norwegia - Włochy, wszystkie rynki) w znacznikach, na które celują selektory.
+# Świeży zrzut page.content() po pełnym wyrenderowaniu rynków można podać z linii poleceń.
+DEFAULT_FIXTURES = [
+    ("sts",     os.path.join(FIXTURES_DIR, "sts_mecz.html")),
+    ("fortuna", os.path.join(FIXTURES_DIR, "fortuna_mecz.html")),
+]
+
+
+# ————————————
+# Dawne pętle element po elemencie (przed modules.dom_extract) – punkt odniesienia
+# ————————————
+async def read_sts_by_element(page):
+    rows = []
+    for grp in await page.query_selector_all("div.match-details-group__container"):
+        title_el = await grp.query_selector(".match-details-group__title div")
+        mkt = (await title_el.inner_text()).strip().lower() if title_el else ""
+        if not mkt:
+            continue
+        for btn in await grp.query_selector_all("sds-odds-button"):
+            label_el = await btn.query_selector(".odds-button__label span")
+            odd_el   = await btn.query_selector(".odds-button__odd-value")
+            rows.append([
+                mkt,
+                (await label_el.inner_text()).strip() if label_el else "",
+                (await odd_el.inner_text()).strip() if odd_el else "",
+            ])
+    return _sts_rows(rows)
+
+
+async def read_fortuna_by_element(page):
+    rows = []
+    for cont in await page.query_selector_all('.market-container, .market'):
+        name_el = await cont.query_selector('h3 a')
+        mkt = (await name_el.inner_text()).strip().lower() if name_el else ""
+        if not mkt:
+            continue
+        for btn in await cont.query_selector_all('a.odds-button'):
+            sel = await btn.query_selector('span.odds-name')
+            val = await btn.query_selector('span.odds-value')
+            rows.append([
+                mkt,
+                (await sel.inner_text()).strip() if sel else "",
+                (await val.inner_text()).strip() if val else "",
+            ])
+    return _fortuna_rows(rows)
+
+
+EXTRACTORS = {
+    "sts":     (read_sts_by_element, extract_sts_markets),
+    "fortuna": (read_fortuna_by_element, extract_fortuna_markets),
+}
+
+
+async def _timed(fn, page, repeat):
+    result, best = None, float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await fn(page)
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+async def benchmark(fixtures, repeat=5):
+    """
+    Porównuje pętlę element po elemencie z jednym page.evaluate na stronach meczów.
+    `fixtures` to lista (bookmaker, ścieżka_html), bookmaker: "sts" / "fortuna".
+    """
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=True)
+        page = await browser.new_page()
+        for bookmaker, path in fixtures:
+            with open(path, encoding="utf-8") as f:
+                await page.set_content(f.read())
+            by_element, single_eval = EXTRACTORS[bookmaker]
+            old, old_ms = await _timed(by_element, page, repeat)
+            new, new_ms = await _timed(single_eval, page, repeat)
+            same = "OK" if old == new else "RÓŻNICA"
+            print(f"{os.path.basename(path)} [{bookmaker}] kursów: {len(old)}/{len(new)} ({same}) | "
+                  f"element po elemencie: {old_ms:.1f} ms | page.evaluate: {new_ms:.1f} ms | "
+                  f"x{old_ms / max(new_ms, 1e-6):.1f}")
+        await browser.close()
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.dom_extract_bench [sts:zapis_sts.html fortuna:zapis_fortuna.html] [--repeat 5]
+    # bez plików – strony z benchmarks/fixtures
+    args = sys.argv[1:]
+    repeat = 5
+    if "--repeat" in args:
+        i = args.index("--repeat")
+        repeat = int(args[i + 1])
+        del args[i:i + 2]
+    fixtures = [tuple(arg.split(":", 1)) for arg in args] or DEFAULT_FIXTURES
+    if any(len(f) != 2 or f[0] not in EXTRACTORS for f in fixtures):
+        print("Użycie: python -m benchmarks.dom_extract_bench [sts:plik.html fortuna:plik.html] [--repeat N]")
+        sys.exit(1)
+    asyncio.run(benchmark(fixtures, repeat))
@@ -0,0 +1,82 @@
+# benchmarks/fortuna_html_bench.py
+
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from modules.fortuna_html import (
+    EVENT_LINK_CSS, LXML_AVAILABLE, _soup_header, parse_event_links, parse_match_header,
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Lista ligi i strona meczu odtworzone z fortuna_data.csv (mecze, nagłówek, wszystkie
+# rynki Norwegia - Włochy); świeży zrzut response.text można podać z linii poleceń.
+DEFAULT_FIXTURES = [
+    ("liga", os.path.join(FIXTURES_DIR, "fortuna_liga.html")),
+    ("mecz", os.path.join(FIXTURES_DIR, "fortuna_mecz.html")),
+]
+
+
+# ————————————
+# Stara ścieżka: pełne drzewo html.parser
+# ————————————
+def full_soup_links(html: str) -> list:
+    soup = BeautifulSoup(html, "html.parser")
+    return [a.get("href") for a in soup.select(EVENT_LINK_CSS) if a.get("href")]
+
+
+def full_soup_header(html: str) -> dict:
+    return _soup_header(BeautifulSoup(html, "html.parser"))
+
+
+PARSERS = {
+    "liga": (full_soup_links, parse_event_links),
+    "mecz": (full_soup_header, parse_match_header),
+}
+
+
+def _timed(fn, html, repeat):
+    result, best = None, float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(html)
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def benchmark(fixtures, repeat=5):
+    """
+    Porównuje BeautifulSoup(html.parser) na całym dokumencie z parse_event_links /
+    parse_match_header. `fixtures` to lista (rodzaj, ścieżka_html), rodzaj: "liga" / "mecz".
+    """
+    print(f"Szybka ścieżka: {'lxml + cssselect' if LXML_AVAILABLE else 'html.parser + SoupStrainer'}")
+    for kind, path in fixtures:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        full, fast = PARSERS[kind]
+        old, old_ms = _timed(full, html, repeat)
+        new, new_ms = _timed(fast, html, repeat)
+        same = "OK" if old == new else "RÓŻNICA"
+        print(f"{os.path.basename(path)} [{kind}] {len(html) / 1024:.0f} KB ({same}) | "
+              f"html.parser: {old_ms:.1f} ms | szybka ścieżka: {new_ms:.1f} ms | "
+              f"x{old_ms / max(new_ms, 1e-6):.1f}")
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.fortuna_html_bench [liga:zapis_ligi.html mecz:zapis_meczu.html] [--repeat 5]
+    # bez plików – strony z benchmarks/fixtures
+    args = sys.argv[1:]
+    repeat = 5
+    if "--repeat" in args:
+        i = args.index("--repeat")
+        repeat = int(args[i + 1])
+        del args[i:i + 2]
+    fixtures = [tuple(arg.split(":", 1)) for arg in args] or DEFAULT_FIXTURES
+    if any(len(f) != 2 or f[0] not in PARSERS for f in fixtures):
+        print("Użycie: python -m benchmarks.fortuna_html_bench [liga:plik.html mecz:plik.html] [--repeat N]")
+        sys.exit(1)
+    benchmark(fixtures, repeat)
@@ -0,0 +1,107 @@
+# benchmarks/lazy_load_bench.py
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from modules.dom_extract import extract_sts_markets, load_sts_groups
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Strona meczu STS (rynki Norwegia - Włochy z sts_data.csv): 8 grup wyrenderowanych,
+# 109 jako <bb-loading-match>, które podmieniają się na grupę dopiero po wejściu
+# w viewport i opóźnieniu 80–400 ms; do tego pasek live mutujący DOM co 100 ms
+# poza kontenerem rynków.
+DEFAULT_FIXTURE = os.path.join(FIXTURES_DIR, "sts_mecz_lazy.html")
+TOTAL_GROUPS = 117
+
+LOADER, GROUP = "bb-loading-match", "div.match-details-group__container"
+
+
+# ————————————
+# Dawna pętla (przed load_sts_groups): przewinięcie do każdego loadera co 200 ms,
+# potem przewijanie o ekran co 250 ms, aż liczba grup przestanie rosnąć
+# ————————————
+async def scroll_by_fixed_waits(page):
+    started = time.perf_counter()
+    await page.wait_for_timeout(500)
+    initial = len(await page.query_selector_all(LOADER))
+    await page.wait_for_timeout(300)
+    for i in range(initial + 2):
+        await page.evaluate(
+            "(i) => { const all = document.querySelectorAll('bb-loading-match');"
+            " if (all.length) all[i % all.length].scrollIntoView({block: 'center'}); }", i)
+        await page.wait_for_timeout(200)
+
+    prev_count, stable = -1, 0
+    for _ in range(initial + 5):
+        await page.evaluate("window.scrollBy(0, window.innerHeight);")
+        await page.wait_for_timeout(250)
+        loaders = len(await page.query_selector_all(LOADER))
+        count = len(await page.query_selector_all(GROUP))
+        if count == prev_count and loaders == 0:
+            stable += 1
+        else:
+            stable, prev_count = 0, count
+        if stable >= 2 and loaders == 0:
+            break
+    await page.wait_for_timeout(300)
+    return {
+        "groups":    len(await page.query_selector_all(GROUP)),
+        "remaining": len(await page.query_selector_all(LOADER)),
+        "elapsed":   round((time.perf_counter() - started) * 1000),
+    }
+
+
+async def observe_mutations(page, step_ms=1500, deadline_ms=20000):
+    return await load_sts_groups(page, step_ms, deadline_ms)
+
+
+LOADERS = {
+    "stałe odczekiwanie": scroll_by_fixed_waits,
+    "MutationObserver":   observe_mutations,
+}
+
+
+async def run(path, loader, **kwargs):
+    """
+    Ładuje stronę `path`, doładowuje grupy `loader`-em i zwraca
+    (wynik loadera, kursy z extract_sts_markets).
+    """
+    from playwright.async_api import async_playwright
+
+    with open(path, encoding="utf-8") as f:
+        html = f.read()
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=True)
+        page = await browser.new_page()
+        await page.set_content(html)
+        info = await loader(page, **kwargs)
+        markets = await extract_sts_markets(page)
+        await browser.close()
+    return info, markets
+
+
+async def benchmark(path, repeat=3):
+    """
+    Kompletność (grupy wyrenderowane / wszystkie, loadery, które zostały) i czas
+    doładowania: dawna pętla ze stałymi odczekaniami vs load_sts_groups.
+    """
+    for name, loader in LOADERS.items():
+        for _ in range(repeat):
+            info, markets = await run(path, loader)
+            print(f"{os.path.basename(path)} [{name}] grup: {info['groups']}/{TOTAL_GROUPS} | "
+                  f"loaderów zostało: {info['remaining']} | kursów: {len(markets)} | {info['elapsed']} ms")
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.lazy_load_bench [zapis_strony_sts.html] [--repeat 3]
+    args = sys.argv[1:]
+    repeat = 3
+    if "--repeat" in args:
+        i = args.index("--repeat")
+        repeat = int(args[i + 1])
+        del args[i:i + 2]
+    asyncio.run(benchmark(args[0] if args else DEFAULT_FIXTURE, repeat))
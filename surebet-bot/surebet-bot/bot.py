@@ -4,6 +4,7 @@ import discord
 from discord.ext import commands
 from modules.config_manager import ConfigManager
 from modules.discord_commands import setup_commands
+from modules.main_loop import stop_loop
 
 # Załaduj konfigurację
 config = ConfigManager('config.yaml')
@@ -15,7 +16,13 @@ if not TOKEN:
 intents = discord.Intents.default()
 intents.message_content = True
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+class SurebetBot(commands.Bot):
+    async def close(self):
+        # przy wyłączaniu bota zatrzymujemy pętlę i workery scraperów (przeglądarki, wątki)
+        await stop_loop()
+        await super().close()
+
+bot = SurebetBot(command_prefix='!', intents=intents)
 
 @bot.event
 async def on_ready():
@@ -1,10 +1,13 @@
-import re
 import csv
 from datetime import datetime
 
+import numpy as np
+
+from modules.market_normalizer import normalize, normalize_for_match, market_outcomes
+
 # 🔧 Ustawienia:
 minimal_profit = 0.0   # zwróć też zerowe sąsiedztwo (break-even), >0 wyklucza dokładnie 0%
-force_show_all = False # pomijamy lamaki, rynki z !=2 selekcjami i low‐profit
+force_show_all = False # pomijamy lamaki, niekompletne rynki i low‐profit
 
 def load_csv(path: str):
     data = {}
@@ -44,6 +47,47 @@ def load_csv(path: str):
 
     return data
 
+def match_to_entry(match: dict, bookmaker: str):
+    """
+    Zamienia słownik meczu prosto ze scrapera (STS: płaska lista market/selection/odds,
+    Fortuna: market_name + selections) na wpis w formacie load_csv():
+      {"match_name", "datetime", "sport", "league", "markets": [...]}
+    """
+    dt_val = match.get("datetime")
+    if isinstance(dt_val, datetime):
+        dt_str = dt_val.strftime("%Y-%m-%dT%H:%M:%S")
+    else:
+        dt_str = dt_val or ""
+
+    rows = []
+    for m in match.get("markets", []):
+        if "selections" in m:
+            for sel in m.get("selections", []):
+                rows.append((m.get("market_name", ""), sel.get("outcome", ""), sel.get("odds"), sel.get("bookmaker") or bookmaker))
+        else:
+            rows.append((m.get("market", ""), m.get("selection", ""), m.get("odds"), bookmaker))
+
+    markets = []
+    for market, selection, odds, book in rows:
+        try:
+            odds_val = float(str(odds).replace(",", "."))
+        except (TypeError, ValueError):
+            continue
+        markets.append({
+            "market":    (market or "").strip().lower(),
+            "selection": (selection or "").strip().lower(),
+            "odds":      odds_val,
+            "bookmaker": book
+        })
+
+    return {
+        "match_name": match.get("match_name") or "",
+        "datetime":   dt_str,
+        "sport":      match.get("sport") or "",
+        "league":     match.get("competition") or "",
+        "markets":    markets
+    }
+
 def compute_profit_with_tax(odds1_raw, odds2_raw):
     odds1 = odds1_raw * 0.88
     odds2 = odds2_raw * 0.88
@@ -62,119 +106,189 @@ def compute_profit_with_tax(odds1_raw, odds2_raw):
     profit = min(payout1, payout2) - stake
     return round(profit / stake * 100, 2)
 
-def extract_submarket(raw_market, raw_selection):
+def score_outcomes(odds_rows, stake=100):
     """
-    Zwraca (submarket, sel_key) tylko wtedy, gdy mamy JASNY dwuwyborowy rynek:
-      – handicap: raw_market zawiera "handicap" i raw_selection ma "(±X.Y)"
-      – over/under: raw_market zawiera "over" lub "under" (lub "powyżej"/"poniżej") 
-                    i raw_selection zaczyna się od "over"/"under"/"powyżej"/"poniżej"
-      – BTTS / DNB / inne naturalne pary: raw_selection to dokładnie "tak"/"nie" lub "1"/"2".
-    W innym wypadku zwraca (None, None).
-    """
-    mkt = raw_market.lower().strip()
-    sel = raw_selection.lower().strip()
-
-    # 1) HANDICAP → raw_market musi zawierać "handicap"
-    if "handicap" in mkt:
-        # w selekcji musi być "(+X.Y)" lub "(-X.Y)"
-        m = re.search(r"\(([+-]?\d+(\.\d+)?)\)", sel)
-        if not m:
-            return None, None
-        line = m.group(1)                  # np. "+1.5" lub "-0.5"
-        subm = f"handicap:{line}"          # np. "handicap:+1.5"
-        sel_key = sel.split()[0]           # "1" lub "2"
-        return subm, sel_key
-
-    # 2) OVER/UNDER → raw_market zawiera słowo "over" lub "under" (ENG) 
-    #               lub "powyżej"/"poniżej" (PL)
-    if ("over" in mkt or "under" in mkt) or ("powyżej" in mkt or "poniżej" in mkt):
-        # selekcja musi zaczynać się od "over"/"under"/"powyżej"/"poniżej"
-        if sel.startswith("over") or sel.startswith("powyżej") \
-           or sel.startswith("under") or sel.startswith("poniżej"):
-            # wyciągamy liczbę w selekcji, np. "2.5"
-            m2 = re.search(r"(\d+(\.\d+)?)", sel)
-            if not m2:
-                return None, None
-            line = m2.group(1)            # np. "2.5"
-            subm = f"over_under:{line}"   # np. "over_under:2.5"
-            if sel.startswith("over") or sel.startswith("powyżej"):
-                sel_key = "over"
-            else:
-                sel_key = "under"
-            return subm, sel_key
-        else:
-            return None, None
+    Wektorowa wersja compute_profit_with_tax dla rynków o n wynikach: `odds_rows`
+    to macierz k×n (k kandydatów, każdy z n kursami). Stawki dzielone są
+    proporcjonalnie do 1/kurs, więc wypłata jest równa dla każdego wyniku.
+    Dla n = 2 działania są te same i w tej samej kolejności (float64), co
+    w compute_profit_with_tax, więc wynik jest identyczny co do bitu.
+    Zwraca (profit_pct, stakes): profit jako lista floatów zaokrąglonych jak
+    w compute_profit_with_tax, stawki jako tablicę NumPy k×n dla stawki łącznej `stake`.
+    """
+    odds = np.asarray(odds_rows, dtype=np.float64) * 0.88
 
-    # 3) BTTS / DNB / inne naturalne pary → selekcja to dokładnie "tak"/"nie" lub "1"/"2"
-    if sel in ("tak", "nie") or sel in ("1", "2"):
-        return mkt, sel
+    inv = 1 / odds
+    total_inv = inv.sum(axis=1, keepdims=True)
 
-    # INNE PRZYPADKI POMIŃ
-    return None, None
+    stakes = stake * inv / total_inv
 
-def compute_surebets(sts_data, fortuna_data):
-    wspolne_id = set(sts_data.keys()) & set(fortuna_data.keys())
-    surebets   = []
+    profit = (stakes * odds).min(axis=1) - stake
+    # round() Pythona, a nie np.round – gwarantuje zgodność co do bitu z wersją skalarną
+    profit_pct = [round(p, 2) for p in (profit / stake * 100).tolist()]
+    return profit_pct, stakes
 
-    for mid in sorted(wspolne_id):
-        sts  = sts_data[mid]
-        fort = fortuna_data[mid]
+def extract_submarket(raw_market, raw_selection):
+    """
+    Zwraca (submarket, sel_key) tylko wtedy, gdy rynek da się jednoznacznie sprowadzić
+    do kanonicznego klucza (patrz modules/market_normalizer.py):
+      – rynki z tabeli MARKET_TABLE (STS i Fortuna) → np. "over_under:2.5", "btts",
+        "handicap:-1.5" (linia zawsze z perspektywy gospodarza), "1x2",
+      – pozostałe nazwy → dawne heurystyki (handicap / over-under / tak-nie / 1-2).
+    W innym wypadku zwraca (None, None). Wyniki są pamiętane w LRU.
+    """
+    return normalize(raw_market, raw_selection)
 
+def parse_offers(markets, combined=None, match_name=""):
+    """
+    Zamienia wiersze rynków (format load_csv) na słownik
+      {(submarket, sel_key): [(bookmaker, odds), ...]}
+    pomijając rynki, których extract_submarket nie rozpoznaje.
+    `match_name` ("Gospodarz - Gość") pozwala zamienić selekcje-nazwy drużyn
+    w rynkach 1X2 / bez remisu na "1"/"2" (patrz normalize_for_match).
+    """
+    if combined is None:
         combined = {}
-        # 1) Połącz STS + Fortuna, ale tylko dozwolone submarkety:
-        for entry in sts["markets"] + fort["markets"]:
+    for entry in markets:
+        if match_name:
+            submkt, sel_key = normalize_for_match(entry["market"], entry["selection"], match_name)
+        else:
             submkt, sel_key = extract_submarket(entry["market"], entry["selection"])
-            if submkt is None:
-                continue
-            combined.setdefault((submkt, sel_key), []).append(
-                (entry["bookmaker"], entry["odds"])
-            )
-
-        # 2) Grupuj po submarket:
-        grouped_by_submkt = {}
-        for (submkt, sel_key), offers in combined.items():
-            grouped_by_submkt.setdefault(submkt, {})[sel_key] = offers
+        if submkt is None:
+            continue
+        combined.setdefault((submkt, sel_key), []).append(
+            (entry["bookmaker"], entry["odds"])
+        )
+    return combined
+
+def best_offers(combined):
+    """
+    Najlepsza oferta (bookmaker, odds) na każdą selekcję, pogrupowana po submarkecie:
+      {submarket: {sel_key: (bookmaker, odds)}}
+    """
+    grouped_by_submkt = {}
+    for (submkt, sel_key), offers in combined.items():
+        grouped_by_submkt.setdefault(submkt, {})[sel_key] = max(offers, key=lambda x: x[1])
+    return grouped_by_submkt
 
-        # 3) Dla każdego submarketu: musi być dokładnie 2 unikalne sel_key
-        for submkt, selections in grouped_by_submkt.items():
+def surebet_candidates(mid, meta, grouped_by_submkt):
+    """
+    Kandydaci na surebet jednego meczu (wynik best_offers): submarkety z kompletem
+    wyników (market_outcomes – 2 dla over/under, handicapu, tak/nie; 3 dla 1X2 itd.),
+    a dla rynków z dawnych heurystyk – dokładnie 2 selekcje. Kandydat, w którym
+    wszystkie najlepsze kursy są od jednego bukmachera (łamak), jest pomijany.
+    Zwraca listę (mid, meta, submkt, items), gdzie items = [(sel_key, (book, odds)), ...].
+    """
+    candidates = []
+    for submkt, selections in grouped_by_submkt.items():
+        outcomes = market_outcomes(submkt)
+        if outcomes is None:
+            # dawne heurystyki: musi być dokładnie 2 unikalne sel_key
             if len(selections) != 2 and not force_show_all:
                 continue
-
             items = list(selections.items())
-            # jeśli wciąż <2 selekcji, pomijamy:
-            if len(items) < 2:
-                continue
+        elif outcomes and all(sel in selections for sel in outcomes):
+            items = [(sel, selections[sel]) for sel in outcomes]
+        elif force_show_all and len(selections) >= 2:
+            items = list(selections.items())
+        else:
+            continue
 
-            best_1 = max(items[0][1], key=lambda x: x[1])  # (book, odds)
-            best_2 = max(items[1][1], key=lambda x: x[1])
+        # jeśli wciąż <2 selekcji, pomijamy:
+        if len(items) < 2:
+            continue
 
-            # lamak? (ten sam bukmacher → pomiń)
-            if best_1[0] == best_2[0] and not force_show_all:
-                continue
+        # lamak? (wszystko u jednego bukmachera → pomiń)
+        if len({book for _, (book, _) in items}) == 1 and not force_show_all:
+            continue
 
-            profit = compute_profit_with_tax(best_1[1], best_2[1])
-            # jeśli <0 (lub < minimal_profit), to pomiń
-            if profit < minimal_profit and not force_show_all:
-                continue
-
-            surebets.append({
-                "match_id":   mid,
-                "match_name": sts["match_name"],
-                "datetime":   sts["datetime"].replace("T", " "),
-                "sport":      sts["sport"],
-                "league":     sts.get("league", ""),
-                "submarket":  submkt,
-                "profit":     profit,
-                "bets": [
-                    {"bookmaker": best_1[0], "selection": items[0][0], "odds": best_1[1]},
-                    {"bookmaker": best_2[0], "selection": items[1][0], "odds": best_2[1]}
-                ]
-            })
+        candidates.append((mid, meta, submkt, items))
+    return candidates
 
+def score_candidates(candidates, min_profit=None):
+    """
+    Liczy profit wszystkich kandydatów wektorowo – jeden przebieg score_outcomes
+    na każdą liczbę wyników – i zwraca surebety z profitem >= min_profit
+    (domyślnie minimal_profit), w kolejności kandydatów. Każdy zakład ma stawkę
+    `stake` dla łącznie 100 zł.
+    """
+    if min_profit is None:
+        min_profit = minimal_profit
+    by_size = {}
+    for idx, (_, _, _, items) in enumerate(candidates):
+        by_size.setdefault(len(items), []).append(idx)
+
+    scored = [None] * len(candidates)
+    for idxs in by_size.values():
+        profits, stakes = score_outcomes([[odds for _, (_, odds) in candidates[i][3]] for i in idxs])
+        for i, profit, row in zip(idxs, profits, stakes.tolist()):
+            scored[i] = (profit, row)
+
+    surebets = []
+    for (mid, meta, submkt, items), (profit, stakes) in zip(candidates, scored):
+        # jeśli <0 (lub < min_profit), to pomiń
+        if profit < min_profit and not force_show_all:
+            continue
+
+        surebets.append({
+            "match_id":   mid,
+            "match_name": meta["match_name"],
+            "datetime":   meta["datetime"].replace("T", " "),
+            "sport":      meta["sport"],
+            "league":     meta.get("league", ""),
+            "submarket":  submkt,
+            "profit":     profit,
+            "bets": [
+                {"bookmaker": book, "selection": sel, "odds": odds, "stake": round(stake, 2)}
+                for (sel, (book, odds)), stake in zip(items, stakes)
+            ]
+        })
     return surebets
 
+def surebets_for_match(mid, meta, grouped_by_submkt, min_profit=None):
+    """
+    Surebety jednego meczu na podstawie najlepszych ofert (wynik best_offers).
+    `meta` to wpis meczu w formacie load_csv (match_name, datetime, sport, league).
+    `min_profit` poniżej minimal_profit zwraca też submarkety bliskie arbitrażu.
+    """
+    return score_candidates(surebet_candidates(mid, meta, grouped_by_submkt), min_profit)
+
+def build_offer_index(*datasets):
+    """
+    Indeks odwrócony ofert wszystkich bukmacherów:
+      {match_id: {(submarket, sel_key): [(bookmaker, odds), ...]}}
+    budowany jednym przebiegiem po każdym zbiorze danych (format load_csv),
+    zamiast przecinania słowników bukmacherów parami. Zwraca (indeks, meta, books),
+    gdzie meta to wpis meczu z pierwszego zbioru, który go zawiera, a books –
+    liczba zbiorów, w których mecz wystąpił.
+    """
+    index, meta, books = {}, {}, {}
+    for data in datasets:
+        for mid, entry in data.items():
+            parse_offers(entry["markets"], index.setdefault(mid, {}), entry.get("match_name", ""))
+            meta.setdefault(mid, entry)
+            books[mid] = books.get(mid, 0) + 1
+    return index, meta, books
+
+def compute_surebets(*datasets):
+    """
+    Surebety ze wszystkich podanych zbiorów (np. compute_surebets(sts, fortuna, etoto)):
+    najlepszy kurs na każdy wynik spośród wszystkich bukmacherów, rynki o dowolnej
+    liczbie wyników, wszystkie mecze liczone naraz.
+    """
+    index, meta, books = build_offer_index(*datasets)
+    candidates = []
+
+    for mid in sorted(index):
+        # mecz tylko u jednego bukmachera → same łamaki
+        if books[mid] < 2:
+            continue
+        candidates.extend(surebet_candidates(mid, meta[mid], best_offers(index[mid])))
+
+    return score_candidates(candidates)
+
 def format_for_discord(surebet):
-    is_lamak = surebet["bets"][0]["bookmaker"] == surebet["bets"][1]["bookmaker"]
+    is_lamak = len({bet["bookmaker"] for bet in surebet["bets"]}) == 1
     profit   = surebet["profit"]
     profit_str = f"{profit:+.2f}%"
 
@@ -202,7 +316,8 @@ def format_for_discord(surebet):
     lines.append("")
     lines.append("Typy do zagrania:")
     for bet in surebet["bets"]:
-        lines.append(f"||🏦 {bet['bookmaker']}:   {bet['selection'].upper()} @ {bet['odds']}||")
+        stake = f"   (stawka {bet['stake']:.2f} zł / 100 zł)" if "stake" in bet else ""
+        lines.append(f"||🏦 {bet['bookmaker']}:   {bet['selection'].upper()} @ {bet['odds']}{stake}||")
 
     return "\n".join(lines)
 
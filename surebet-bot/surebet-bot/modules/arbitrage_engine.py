@@ -0,0 +1,188 @@
+# modules/arbitrage_engine.py
+
+from datetime import datetime
+
+from modules.arbitrage import parse_offers, best_offers, surebets_for_match, minimal_profit
+
+
+def _signature(sb):
+    # co musi się zmienić, żeby surebet uznać za „zmieniony”
+    return sb["profit"], tuple((b["bookmaker"], b["selection"], b["odds"]) for b in sb["bets"])
+
+
+class ArbitrageEngine:
+    """
+    Przyrostowy silnik arbitrażu kluczowany match_id.
+    Trzyma per mecz:
+      – sparsowane oferty każdego bukmachera {(submarket, sel_key): [(book, odds), ...]},
+      – najlepszą ofertę na (submarket, selekcja),
+      – ostatnio wyliczone surebety per submarket,
+      – listę obserwowanych: submarkety o proficie do `near_margin` pkt. proc.
+        poniżej minimal_profit (jeszcze nie surebet, ale blisko).
+    update() przelicza TYLKO zaktualizowany mecz i zwraca tylko te surebety,
+    które są nowe albo zmieniły kurs/profit/bukmachera.
+    Kursy live (live=True, np. EtotoFeed) nie są zestawiane z kursami przedmeczowymi:
+    gdy mecz ma ofertę live, liczą się tylko oferty live i te pobrane po starcie meczu.
+    """
+
+    def __init__(self, near_margin: float = 0.0):
+        self.near_margin = max(0.0, float(near_margin))
+        self._bookmakers = []     # kolejność pierwszego pojawienia się (rozstrzyga remisy kursów)
+        self._offers = {}         # mid -> {bookmaker: {(submkt, sel): [(book, odds)]}}
+        self._meta = {}           # mid -> {bookmaker: wpis meczu (bez rynków)}
+        self._best = {}           # mid -> {submkt: {sel: (book, odds)}}
+        self._surebets = {}       # mid -> {submkt: surebet}
+        self._near = {}           # mid -> {submkt: surebet z profitem < minimal_profit}
+        self._updated = {}        # mid -> {bookmaker: datetime ostatniej aktualizacji}
+        self._live = {}           # mid -> {bukmacherzy z ofertą live}
+
+    def _match_meta(self, mid):
+        metas = self._meta[mid]
+        for book in self._bookmakers:
+            if book in metas:
+                return metas[book]
+        return next(iter(metas.values()))
+
+    def _touch(self, bookmaker: str, mid: str, live: bool, updated: datetime = None):
+        if bookmaker not in self._bookmakers:
+            self._bookmakers.append(bookmaker)
+        self._updated.setdefault(mid, {})[bookmaker] = updated or datetime.now()
+        if live:
+            self._live.setdefault(mid, set()).add(bookmaker)
+        elif mid in self._live:
+            self._live[mid].discard(bookmaker)
+
+    def update(self, bookmaker: str, mid: str, entry: dict, live: bool = False, updated: datetime = None):
+        """
+        Podmienia dane meczu `mid` od `bookmaker` (wpis w formacie load_csv/match_to_entry)
+        i przelicza jego submarkety. Zwraca (zmienione_surebety, zamknięte_klucze),
+        gdzie zamknięte_klucze to lista (match_id, submarket), które przestały być surebetem.
+        `live` – kursy z trwającego meczu; `updated` – kiedy kursy pobrano (domyślnie teraz).
+        """
+        self._touch(bookmaker, mid, live, updated)
+        self._offers.setdefault(mid, {})[bookmaker] = parse_offers(entry.get("markets", []), match_name=entry.get("match_name") or "")
+        self._meta.setdefault(mid, {})[bookmaker] = {k: v for k, v in entry.items() if k != "markets"}
+        return self._evaluate(mid)
+
+    def patch(self, bookmaker: str, mid: str, entry: dict, removed=(), live: bool = False):
+        """
+        Częściowa aktualizacja ofert `bookmaker` dla meczu `mid` (delta, np. z EtotoFeed):
+        wiersze entry["markets"] podmieniają oferty o tym samym (submarket, selekcja),
+        klucze z `removed` są usuwane, reszta ofert bukmachera zostaje bez zmian.
+        Zwraca to samo co update().
+        """
+        self._touch(bookmaker, mid, live)
+
+        per_book = self._offers.setdefault(mid, {})
+        offers = per_book.setdefault(bookmaker, {})
+        for key in removed:
+            offers.pop(tuple(key), None)
+        offers.update(parse_offers(entry.get("markets", []), match_name=entry.get("match_name") or ""))
+        if offers:
+            self._meta.setdefault(mid, {})[bookmaker] = {k: v for k, v in entry.items() if k != "markets"}
+        else:
+            per_book.pop(bookmaker, None)
+            self._meta.get(mid, {}).pop(bookmaker, None)
+            self._updated.get(mid, {}).pop(bookmaker, None)
+            self._live.get(mid, set()).discard(bookmaker)
+        if not per_book:
+            closed = [(mid, submkt) for submkt in self._surebets.get(mid, {})]
+            self.remove(mid)
+            return [], closed
+        return self._evaluate(mid)
+
+    def _current_books(self, mid):
+        """
+        Bukmacherzy, których oferty meczu wolno ze sobą zestawić. Bez oferty live – wszyscy;
+        z ofertą live – bukmacherzy live i ci, których kursy pobrano już po starcie meczu
+        (przedmeczowe kursy zamrożone przed startem nie pasują do sytuacji na boisku).
+        """
+        per_book = self._offers.get(mid, {})
+        live = self._live.get(mid)
+        if not live:
+            return [book for book in self._bookmakers if book in per_book]
+        try:
+            kickoff = datetime.strptime(self._match_meta(mid).get("datetime", ""), "%Y-%m-%dT%H:%M:%S")
+        except (TypeError, ValueError):
+            kickoff = None
+        updated = self._updated.get(mid, {})
+        return [book for book in self._bookmakers if book in per_book and (
+            book in live or (kickoff is not None and updated.get(book, datetime.min) >= kickoff))]
+
+    def _evaluate(self, mid):
+        per_book = self._offers.get(mid, {})
+        books = self._current_books(mid)
+        combined = {}
+        for book in books:
+            for key, offers in per_book[book].items():
+                combined.setdefault(key, []).extend(offers)
+
+        best = best_offers(combined)
+        self._best[mid] = best
+        scored = surebets_for_match(mid, self._match_meta(mid), best, minimal_profit - self.near_margin) if len(books) > 1 else []
+        fresh = {sb["submarket"]: sb for sb in scored if sb["profit"] >= minimal_profit}
+        near = {sb["submarket"]: sb for sb in scored if sb["profit"] < minimal_profit}
+        previous = self._surebets.get(mid, {})
+
+        changed = [sb for submkt, sb in fresh.items()
+                   if submkt not in previous or _signature(previous[submkt]) != _signature(sb)]
+        closed = [(mid, submkt) for submkt in previous if submkt not in fresh]
+
+        if fresh:
+            self._surebets[mid] = fresh
+        else:
+            self._surebets.pop(mid, None)
+        if near:
+            self._near[mid] = near
+        else:
+            self._near.pop(mid, None)
+        return changed, closed
+
+    def load(self, bookmaker: str, data: dict):
+        """
+        Ładuje cały słownik {match_id: wpis} (np. z load_csv). Zwraca zmiany jak update().
+        Wczytane kursy nie mają znanej chwili pobrania – traktujemy je jako przedmeczowe.
+        """
+        changed, closed = [], []
+        for mid, entry in data.items():
+            ch, cl = self.update(bookmaker, mid, entry, updated=datetime.min)
+            changed.extend(ch)
+            closed.extend(cl)
+        return changed, closed
+
+    def remove(self, mid: str):
+        for store in (self._offers, self._meta, self._best, self._surebets, self._near, self._updated, self._live):
+            store.pop(mid, None)
+
+    def prune(self, older_than: datetime):
+        """
+        Usuwa mecze, których data rozpoczęcia jest starsza niż `older_than`.
+        Zwraca (usunięte_match_id, zamknięte_klucze) – klucze jak w update().
+        """
+        removed, closed = [], []
+        for mid in list(self._meta):
+            dt_str = self._match_meta(mid).get("datetime", "") if self._meta[mid] else ""
+            try:
+                dt = datetime.strptime(dt_str, "%Y-%m-%dT%H:%M:%S")
+            except (TypeError, ValueError):
+                continue
+            if dt < older_than:
+                closed.extend((mid, submkt) for submkt in self._surebets.get(mid, {}))
+                self.remove(mid)
+                removed.append(mid)
+        return removed, closed
+
+    def best_profit(self, mid: str):
+        """
+        Najwyższy profit meczu – z otwartych surebetów albo z listy obserwowanych
+        (wtedy ujemny) – albo None, gdy mecz nie jest ani jednym, ani drugim.
+        """
+        profits = [sb["profit"] for store in (self._surebets, self._near) for sb in store.get(mid, {}).values()]
+        return max(profits, default=None)
+
+    def watchlist(self):
+        """
+        Submarkety bliskie arbitrażu (profit w near_margin poniżej minimal_profit), od najbliższych.
+        """
+        near = [sb for subs in self._near.values() for sb in subs.values()]
+        return sorted(near, key=lambda sb: sb["profit"], reverse=True)
@@ -0,0 +1,111 @@
+# modules/bot_log.py
+
+import atexit
+import logging
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Domyślne ustawienia – nadpisywane przez scraping.logging w config.yaml
+DEFAULT_LOG_SETTINGS = {
+    "level":      "info",      # debug / info / warning / error – niższe poziomy są odrzucane od razu
+    "levels":     {},          # nazwa logu (np. "sts") -> własny poziom
+    "max_bytes":  1048576,     # rotacja pliku po przekroczeniu rozmiaru
+    "backups":    2,           # ile starych plików (.1, .2, …) trzymać
+    "console":    True,        # czy linie trafiają też na stdout
+}
+
+_FORMAT = logging.Formatter("[%(asctime)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+
+
+def log_settings(config, name: str) -> dict:
+    """
+    Scala DEFAULT_LOG_SETTINGS ze scraping.logging z config.yaml; `level` dla logu
+    `name` bierze się z levels.<name>, jeśli jest.
+    """
+    settings = dict(DEFAULT_LOG_SETTINGS)
+    settings.update(config.get('scraping', 'logging', default={}) or {})
+    settings["level"] = (settings.get("levels") or {}).get(name, settings["level"])
+    return settings
+
+
+class BotLog:
+    """
+    Log scrapera wołany jak dotychczasowa funkcja: log("tekst") (poziom info),
+    albo log.debug / log.warning / log.error.
+    Wywołanie tylko sprawdza poziom i wrzuca rekord do kolejki – formatowanie,
+    zapis do pliku (z rotacją po rozmiarze) i stdout obsługuje wątek w tle
+    (QueueListener), więc scraper nie czeka na dysk ani konsolę.
+    Komunikaty liczone per kurs/link idą na debug; żeby przy wyłączonym debug
+    nie budować nawet f-stringów, pętle sprawdzają `log.debug_enabled`.
+    """
+
+    def __init__(self, name: str, path: str, settings: dict):
+        self.name = name
+        self.path = path
+        self._logger = logging.getLogger(f"surebet.{name}")
+        self._logger.propagate = False
+        self._logger.setLevel(getattr(logging, str(settings["level"]).upper(), logging.INFO))
+
+        handlers = [RotatingFileHandler(path, maxBytes=int(settings["max_bytes"]),
+                                        backupCount=int(settings["backups"]), encoding="utf-8")]
+        if settings["console"]:
+            handlers.append(logging.StreamHandler(sys.stdout))
+        for handler in handlers:
+            handler.setFormatter(_FORMAT)
+
+        self._queue = queue.SimpleQueue()
+        for old in list(self._logger.handlers):
+            self._logger.removeHandler(old)
+        self._logger.addHandler(QueueHandler(self._queue))
+        self._listener = QueueListener(self._queue, *handlers, respect_handler_level=False)
+        self._listener.start()
+
+    @property
+    def debug_enabled(self) -> bool:
+        return self._logger.isEnabledFor(logging.DEBUG)
+
+    def __call__(self, message: str):
+        self._logger.info(message)
+
+    def debug(self, message: str):
+        self._logger.debug(message)
+
+    def info(self, message: str):
+        self._logger.info(message)
+
+    def warning(self, message: str):
+        self._logger.warning(message)
+
+    def error(self, message: str):
+        self._logger.error(message)
+
+    def close(self):
+        """
+        Dopisuje zaległe linie z kolejki i zamyka pliki.
+        """
+        listener, self._listener = self._listener, None
+        if listener is None:
+            return
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+_logs = {}
+_logs_lock = threading.Lock()
+
+
+def bot_log_from_config(config, name: str, path: str) -> BotLog:
+    """
+    Wspólny dla procesu BotLog o nazwie `name` zapisujący do `path`
+    (ustawienia scraping.logging z config.yaml). Przy zamknięciu procesu
+    zaległe linie są dopisywane do pliku.
+    """
+    with _logs_lock:
+        log = _logs.get(name)
+        if log is None:
+            log = _logs[name] = BotLog(name, path, log_settings(config, name))
+            atexit.register(log.close)
+        return log
@@ -0,0 +1,131 @@
+# modules/browser_pool.py
+
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from playwright.async_api import async_playwright
+
+from modules.proxy_manager import proxy_server_from_kwargs
+from modules.request_blocker import RequestBlocker
+
+
+class BrowserPool:
+    """
+    Jedna długo żyjąca instancja Chromium (playwright.async_api) na cały proces scrapera.
+    Konteksty przeglądarki są trzymane i używane ponownie – kluczem jest para
+    (proxy, User-Agent) z ProxyManagera. Najdawniej używane konteksty są zamykane,
+    gdy przekroczymy max_contexts. Z jednego kontekstu może równolegle korzystać
+    wiele kart.
+    """
+
+    def __init__(self, proxy_manager, headless=True, max_contexts=4, log=print, blocking=None):
+        self.proxy_manager = proxy_manager
+        self.headless = headless
+        self.max_contexts = max_contexts
+        self.log = log
+        # blokowanie zbędnych zasobów (blocking_settings); None/enabled=False – bez routingu
+        self.blocker = RequestBlocker(blocking) if blocking and blocking.get("enabled") else None
+        self._playwright = None
+        self._browser = None
+        self._contexts = OrderedDict()   # (proxy, ua) -> BrowserContext
+        self._lock = asyncio.Lock()
+
+    async def _ensure_browser(self):
+        if self._browser is not None and self._browser.is_connected():
+            return self._browser
+
+        # przeglądarka padła albo jeszcze nie wystartowała – stare konteksty są bezużyteczne
+        self._contexts.clear()
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        self.log("BROWSER_POOL: Uruchomiono Chromium")
+        return self._browser
+
+    async def get_context(self, request_kwargs: dict = None):
+        """
+        Zwraca kontekst dla pary (proxy, UA) z podanych kwargs (albo losowych
+        z ProxyManagera), tworząc go tylko wtedy, gdy takiego jeszcze nie ma w puli.
+        """
+        kwargs = request_kwargs if request_kwargs is not None else self.proxy_manager.get_request_kwargs()
+        ua = kwargs.get("headers", {}).get("User-Agent", "")
+        server = proxy_server_from_kwargs(kwargs)
+        key = (server, ua)
+
+        async with self._lock:
+            browser = await self._ensure_browser()
+            ctx = self._contexts.get(key)
+            if ctx is not None:
+                self._contexts.move_to_end(key)
+                return ctx
+
+            ctx_args = {}
+            if server:
+                ctx_args["proxy"] = {"server": server}
+                self.log(f"PLAYWRIGHT używa proxy: {server}")
+            ctx = await browser.new_context(user_agent=ua, **ctx_args)
+            if self.blocker is not None:
+                await ctx.route("**/*", self.blocker.handle)
+            self.log(f"PLAYWRIGHT używa User-Agent: {ua}")
+            self._contexts[key] = ctx
+
+            # zamykamy najdawniej używane konteksty, ale tylko te bez otwartych kart
+            for old_key in list(self._contexts):
+                if len(self._contexts) <= self.max_contexts:
+                    break
+                old_ctx = self._contexts[old_key]
+                if old_ctx is ctx or old_ctx.pages:
+                    continue
+                del self._contexts[old_key]
+                try:
+                    await old_ctx.close()
+                except Exception:
+                    pass
+            return ctx
+
+    @asynccontextmanager
+    async def page(self, request_kwargs: dict = None):
+        """
+        Otwiera nową kartę w kontekście z puli i zamyka ją po wyjściu z bloku `async with`.
+        Kontekst (cookies, cache, połączenia) zostaje w puli na kolejne mecze.
+        """
+        ctx = await self.get_context(request_kwargs)
+        page = await ctx.new_page()
+        if self.blocker is not None:
+            self.blocker.track(page)
+        try:
+            yield page
+        finally:
+            try:
+                await page.close()
+            except Exception:
+                pass
+            if self.blocker is not None:
+                stats = self.blocker.release(page)
+                if stats["requests"]:
+                    self.log(f"BROWSER_POOL: zablokowano {stats['requests']} żądań (szacunkowo ~{stats['est_bytes'] // 1024} kB) "
+                             f"| łącznie {self.blocker.total['requests']} (szacunkowo ~{self.blocker.total['est_bytes'] // 1048576} MB)")
+
+    async def close(self):
+        async with self._lock:
+            for ctx in self._contexts.values():
+                try:
+                    await ctx.close()
+                except Exception:
+                    pass
+            self._contexts.clear()
+            if self._browser is not None:
+                try:
+                    await self._browser.close()
+                except Exception:
+                    pass
+                self._browser = None
+            if self._playwright is not None:
+                try:
+                    await self._playwright.stop()
+                except Exception:
+                    pass
+                self._playwright = None
+        # nowy lock – kolejny asyncio.run() może mieć inną pętlę zdarzeń
+        self._lock = asyncio.Lock()
@@ -0,0 +1,77 @@
+# modules/change_detector.py
+
+import hashlib
+import json
+import threading
+import time
+
+
+def fingerprint(obj) -> str:
+    """
+    Krótki, stabilny skrót dowolnej struktury JSON-owej (kolejność kluczy bez znaczenia)
+    albo surowej treści odpowiedzi (bytes – skrót bez dekodowania).
+    """
+    if isinstance(obj, (bytes, bytearray)):
+        raw = bytes(obj)
+    else:
+        raw = json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+class ChangeDetector:
+    """
+    Pamięta odcisk surowych kursów każdego meczu (per bukmacher) z poprzedniego
+    przebiegu. changed() zwraca False, gdy nic się nie ruszyło – wtedy zapis do
+    bazy, strumień i przeliczanie arbitrażu można pominąć. Gdy `payload` to surowa
+    treść odpowiedzi (bytes), pominąć można także dekodowanie i parsowanie.
+    Co `refresh_after` sekund mecz i tak jest przepuszczany (odświeżenie updated_at w bazie).
+    """
+
+    def __init__(self, bookmaker: str, refresh_after: float = 1800, max_entries: int = 20000):
+        self.bookmaker = bookmaker
+        self.refresh_after = refresh_after
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._seen = {}    # match_id -> (odcisk, znacznik czasu zapisu)
+
+    def changed(self, match_id: str, payload) -> bool:
+        fp = fingerprint(payload)
+        now = time.time()
+        with self._lock:
+            prev = self._seen.get(match_id)
+            if prev is not None and prev[0] == fp and now - prev[1] < self.refresh_after:
+                self.hits += 1
+                return False
+            self.misses += 1
+            if len(self._seen) >= self.max_entries and match_id not in self._seen:
+                # najstarszy wpis (słownik trzyma kolejność wstawiania)
+                self._seen.pop(next(iter(self._seen)))
+            self._seen.pop(match_id, None)
+            self._seen[match_id] = (fp, now)
+            return True
+
+    def forget(self, match_id: str):
+        with self._lock:
+            self._seen.pop(match_id, None)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        return (f"ZMIANY {self.bookmaker}: bez zmian {self.hits} z {total} meczów "
+                f"({self.hit_rate * 100:.1f}%), przetworzono {self.misses}")
+
+
+def change_detector_from_config(config, bookmaker: str):
+    """
+    ChangeDetector z ustawieniami scraping.change_detection z config.yaml
+    (enabled: false – każdy mecz traktowany jak zmieniony).
+    """
+    enabled = config.get('scraping', 'change_detection', 'enabled', default=True)
+    refresh_after = float(config.get('scraping', 'change_detection', 'refresh_after', default=1800))
+    return ChangeDetector(bookmaker, refresh_after=refresh_after if enabled else 0)
@@ -0,0 +1,133 @@
+# modules/dom_extract.py
+
+# ————————————
+# Skrypty JS: całe drzewo rynków jednym page.evaluate (jedna podróż do przeglądarki
+# zamiast query_selector/inner_text na każdą grupę, przycisk i etykietę).
+# deepOne/deepAll przechodzą też przez otwarte shadow rooty – jak selektory Playwrighta.
+# ————————————
+_JS_DEEP = """
+  const deepAll = (root, sel) => {
+    const out = Array.from(root.querySelectorAll(sel));
+    for (const el of root.querySelectorAll('*')) {
+      if (el.shadowRoot) out.push(...deepAll(el.shadowRoot, sel));
+    }
+    return out;
+  };
+  const deepOne = (root, sel) => root.querySelector(sel) || deepAll(root, sel)[0] || null;
+  const text = (el) => el ? (el.innerText || '').trim() : '';
+"""
+
+STS_MARKETS_JS = """() => {""" + _JS_DEEP + """
+  const rows = [];
+  for (const grp of deepAll(document, 'div.match-details-group__container')) {
+    const mkt = text(deepOne(grp, '.match-details-group__title div')).toLowerCase();
+    if (!mkt) continue;
+    for (const btn of deepAll(grp, 'sds-odds-button')) {
+      rows.push([mkt, text(deepOne(btn, '.odds-button__label span')), text(deepOne(btn, '.odds-button__odd-value'))]);
+    }
+  }
+  return rows;
+}"""
+
+FORTUNA_MARKETS_JS = """() => {""" + _JS_DEEP + """
+  const rows = [];
+  for (const cont of deepAll(document, '.market-container, .market')) {
+    const mkt = text(deepOne(cont, 'h3 a')).toLowerCase();
+    if (!mkt) continue;
+    for (const btn of deepAll(cont, 'a.odds-button')) {
+      rows.push([mkt, text(deepOne(btn, 'span.odds-name')), text(deepOne(btn, 'span.odds-value'))]);
+    }
+  }
+  return rows;
+}"""
+
+# Doładowanie leniwych grup STS: przewija do kolejnego <bb-loading-match> i czeka na
+# mutację kontenera rynków (MutationObserver – tylko zniknięcie loadera albo nowa grupa),
+# a nie stały czas. Loader, który nie zniknął po maxTries przewinięciach, jest pomijany;
+# kończy, gdy nie ma już loaderów do przewinięcia albo po deadlineMs.
+STS_LAZY_LOAD_JS = """async ({stepMs, deadlineMs, maxTries}) => {
+  const started = performance.now();
+  const LOADER = 'bb-loading-match', GROUP = 'div.match-details-group__container';
+  const loaders = () => Array.from(document.querySelectorAll(LOADER));
+  const groups = () => document.querySelectorAll(GROUP).length;
+  // kontener rynków: najniższy wspólny przodek wszystkich grup i loaderów
+  const marketRoot = () => {
+    const nodes = document.querySelectorAll(LOADER + ', ' + GROUP);
+    if (nodes.length === 0) return document.body;
+    let root = nodes[0].parentElement;
+    const last = nodes[nodes.length - 1];
+    while (root && root !== document.body && !root.contains(last)) root = root.parentElement;
+    return root || document.body;
+  };
+  const touches = (nodes, sel) => Array.from(nodes).some(
+    (n) => n.nodeType === 1 && (n.matches(sel) || n.querySelector(sel) !== null));
+  // liczą się tylko mutacje rynków: loader zniknął albo doszła grupa
+  const relevant = (records) => records.some(
+    (r) => touches(r.removedNodes, LOADER) || touches(r.addedNodes, GROUP));
+  const scrollAndWait = (target, ms) => new Promise((resolve) => {
+    let timer = null;
+    const obs = new MutationObserver((records) => {
+      if (!relevant(records)) return;
+      obs.disconnect(); clearTimeout(timer); resolve(true);
+    });
+    timer = setTimeout(() => { obs.disconnect(); resolve(false); }, ms);
+    obs.observe(marketRoot(), {childList: true, subtree: true});
+    target.scrollIntoView({block: 'center'});
+  });
+  const initial = loaders().length;
+  const tries = new Map();   // loader -> ile razy do niego przewinięto
+  let steps = 0;
+  while (performance.now() - started < deadlineMs) {
+    // loader, który nie zniknął po maxTries przewinięciach do niego, jest pomijany
+    const target = loaders().find((el) => (tries.get(el) || 0) < maxTries);
+    if (!target) break;
+    steps++;
+    await scrollAndWait(target, stepMs);
+    if (target.isConnected) tries.set(target, (tries.get(target) || 0) + 1);
+  }
+  return {initial, steps, groups: groups(), remaining: loaders().length,
+          elapsed: Math.round(performance.now() - started)};
+}"""
+
+STS_EMPTY_ODDS     = ("0", "0.0", "-", "–")
+FORTUNA_EMPTY_ODDS = ("0", "0.0")
+
+
+def _sts_rows(rows):
+    return [
+        {"market": mkt, "selection": sel.lower(), "odds": val}
+        for mkt, sel, val in rows
+        if mkt and sel and val and val not in STS_EMPTY_ODDS
+    ]
+
+
+def _fortuna_rows(rows):
+    return [
+        {"market_raw": mkt, "selection": sel, "odds": val}
+        for mkt, sel, val in rows
+        if mkt and sel and val and val not in FORTUNA_EMPTY_ODDS
+    ]
+
+
+async def extract_sts_markets(page):
+    """
+    Wszystkie kursy wyrenderowanych grup rynków STS jednym page.evaluate.
+    Format jak dawna pętla w _extract_markets: {"market", "selection", "odds"}.
+    """
+    return _sts_rows(await page.evaluate(STS_MARKETS_JS))
+
+
+async def extract_fortuna_markets(page):
+    """
+    Wszystkie kursy ze strony meczu Fortuny jednym page.evaluate.
+    Format jak dawna pętla w _extract_markets: {"market_raw", "selection", "odds"}.
+    """
+    return _fortuna_rows(await page.evaluate(FORTUNA_MARKETS_JS))
+
+
+async def load_sts_groups(page, step_ms=1500, deadline_ms=20000, max_tries=2):
+    """
+    Doładowuje wszystkie leniwe grupy rynków STS (STS_LAZY_LOAD_JS) jednym page.evaluate.
+    Zwraca {"initial", "steps", "groups", "remaining", "elapsed"} (elapsed w ms).
+    """
+    return await page.evaluate(STS_LAZY_LOAD_JS, {"stepMs": step_ms, "deadlineMs": deadline_ms, "maxTries": max_tries})
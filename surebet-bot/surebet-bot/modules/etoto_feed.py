@@ -0,0 +1,241 @@
+# modules/etoto_feed.py
+
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from modules.arbitrage import extract_submarket
+from modules.event_index import event_index_from_config
+from modules.http_client import HttpClient, http_settings
+from modules.json_odds import first_value, parse_start, EVENT_START_KEYS, EVENT_SPORT_KEYS, EVENT_COMP_KEYS
+from modules.market_normalizer import OVER_PREFIXES, UNDER_PREFIXES
+from modules.match_stream import match_stream
+from modules.proxy_manager import ProxyManager
+from modules.rate_limiter import rate_limiter_from_config
+from modules.scrape_engine import ScrapeEngine, engine_settings
+
+BOOKMAKER = "Etoto"
+
+# Domyślne ustawienia – nadpisywane przez scraping.etoto w config.yaml
+DEFAULT_ETOTO_SETTINGS = {
+    "enabled":        False,
+    "url":            "https://api.etoto.pl/livebetting-api/rest/livebetting/v1/api/running/games/major",
+    "poll_interval":  2,      # s między początkami kolejnych zapytań
+    "timeout":        5,
+}
+
+
+def etoto_settings(config) -> dict:
+    """
+    Scala DEFAULT_ETOTO_SETTINGS ze scraping.etoto z config.yaml.
+    """
+    settings = dict(DEFAULT_ETOTO_SETTINGS)
+    settings.update(config.get('scraping', 'etoto', default={}) or {})
+    return settings
+
+
+# ————————————
+# JSON Etoto -> wydarzenia i znormalizowane kursy
+# ————————————
+def _match_name(event):
+    parts = event.get("participants") or []
+    if len(parts) >= 2:
+        home, away = parts[0].get("participantName"), parts[1].get("participantName")
+        if home and away:
+            return f"{home} - {away}"
+    return event.get("eventName")
+
+
+def _selection(outcome_name: str, argument) -> str:
+    # Etoto podaje linię over/under w polu `argument` rynku, a nie w nazwie wyniku
+    sel = outcome_name.strip()
+    if argument is not None and sel.lower().startswith(OVER_PREFIXES + UNDER_PREFIXES) \
+            and not any(ch.isdigit() for ch in sel):
+        sel = f"{sel} {argument}"
+    return sel
+
+
+def event_offers(event) -> dict:
+    """
+    Kursy jednego wydarzenia: {(submarket, selekcja): (rynek, selekcja, kurs)} – tylko
+    wyniki, które market_normalizer sprowadza do kanonicznego klucza. Ten sam klucz
+    z kilku rynków – zostaje wyższy kurs.
+    """
+    offers = {}
+    for market in event.get("games") or []:
+        name = (market.get("gameName") or "").strip().lower()
+        if not name:
+            continue
+        for outcome in market.get("outcomes") or []:
+            try:
+                odds = float(outcome.get("outcomeOdds"))
+            except (TypeError, ValueError):
+                continue
+            if odds <= 1.0 or not outcome.get("outcomeName"):
+                continue
+            sel = _selection(outcome["outcomeName"], market.get("argument")).lower()
+            key = extract_submarket(name, sel)
+            if key[0] is None:
+                continue
+            if key not in offers or odds > offers[key][2]:
+                offers[key] = (name, sel, odds)
+    return offers
+
+
+class EtotoFeed:
+    """
+    Kursy live Etoto z API JSON (bez przeglądarki) podawane do silnika arbitrażu przyrostowo.
+    Co poll_interval sekund jedno zapytanie (HttpClient, harmonogram ScrapeEngine – proxy,
+    tempo domeny, zdrowie proxy); odpowiedź identyczna z poprzednią jest pomijana bez
+    dekodowania, w pozostałych każde wydarzenie jest porównywane z poprzednim stanem
+    i do match_stream trafiają tylko zmienione kursy (delta) oraz klucze, które zniknęły.
+    Delty mają znacznik "live" – silnik arbitrażu nie zestawia ich z kursami
+    przedmeczowymi STS/Fortuny pobranymi przed startem meczu.
+    Stan live nie jest zapisywany w bazie kursów – po restarcie pierwsza odpowiedź
+    i tak przynosi komplet.
+    """
+
+    def __init__(self, settings: dict, http_client, engine, event_index, stream=match_stream, log=print):
+        self.settings = settings
+        self.http_client = http_client
+        self.engine = engine
+        self.event_index = event_index
+        self.stream = stream
+        self.log = log
+
+        self._last_body = None
+        self._state = {}          # event_id Etoto -> (match_id, {klucz: (rynek, selekcja, kurs)})
+        self._no_start = set()    # wydarzenia bez godziny rozpoczęcia (zalogowane raz)
+        self.polls = 0
+        self.unchanged = 0        # odpowiedzi identyczne z poprzednią
+        self.published = 0        # wysłane delty meczów
+        self.changed_outcomes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.settings.get("enabled"))
+
+    async def _fetch(self):
+        error = None
+        async with self.engine.slot() as kwargs:
+            try:
+                response = await self.http_client.get(self.settings["url"], kwargs,
+                                                      headers={"Accept": "application/json"},
+                                                      timeout=float(self.settings["timeout"]))
+            except Exception as e:
+                # zgłoszony tutaj, a rzucony poza slot() – inaczej slot() zgłosiłby timeout drugi raz
+                self.engine.report(kwargs, error=e)
+                error = e
+            else:
+                self.engine.report(kwargs, status=response.status_code, latency=response.elapsed.total_seconds())
+        if error is not None:
+            raise error
+        response.raise_for_status()
+        return response
+
+    def _diff(self, payload):
+        """
+        Porównuje odpowiedź z poprzednim stanem. Zwraca listę delt meczów do publikacji.
+        """
+        deltas, seen = [], set()
+        for event in payload.get("games") or []:
+            event_id = event.get("eventId") or event.get("id") or _match_name(event)
+            name = _match_name(event)
+            if not event_id or not name or " - " not in name:
+                continue
+            kickoff = parse_start(first_value(event, EVENT_START_KEYS))
+            if kickoff is None:
+                if event_id not in self._no_start:
+                    self._no_start.add(event_id)
+                    self.log(f"ETOTO WARN: brak godziny rozpoczęcia, pomijam: {name}")
+                continue
+            seen.add(event_id)
+
+            offers = event_offers(event)
+            match_id, previous = self._state.get(event_id, (None, {}))
+            if match_id is None:
+                match_id = self.event_index.resolve(name, kickoff)
+            self._state[event_id] = (match_id, offers)
+
+            changed = [row for key, row in offers.items() if previous.get(key) != row]
+            removed = [key for key in previous if key not in offers]
+            if not changed and not removed:
+                continue
+            deltas.append({
+                "match_id":    match_id,
+                "match_name":  name,
+                "sport":       first_value(event, EVENT_SPORT_KEYS),
+                "competition": first_value(event, EVENT_COMP_KEYS),
+                "datetime":    kickoff.strftime("%Y-%m-%dT%H:%M:%S"),
+                "markets":     [{"market": m, "selection": s, "odds": o} for m, s, o in changed],
+                "removed":     removed,
+                "delta":       True,
+                "live":        True,
+            })
+
+        # mecze, które zeszły z listy live – ich kursy Etoto wycofujemy z silnika
+        for event_id in [e for e in self._state if e not in seen]:
+            match_id, previous = self._state.pop(event_id)
+            if previous:
+                deltas.append({"match_id": match_id, "markets": [], "removed": list(previous), "delta": True, "live": True})
+        return deltas
+
+    async def poll_once(self):
+        """
+        Jedno zapytanie i publikacja zmian. Zwraca liczbę wysłanych delt meczów.
+        """
+        self.polls += 1
+        started = time.monotonic()
+        response = await self._fetch()
+        body = response.content
+        if body == self._last_body:
+            self.unchanged += 1
+            return 0
+        self._last_body = body
+
+        deltas = await asyncio.to_thread(lambda: self._diff(response.json()))
+        outcomes = 0
+        for delta in deltas:
+            self.stream.publish(BOOKMAKER, delta)
+            outcomes += len(delta["markets"]) + len(delta["removed"])
+        self.published += len(deltas)
+        self.changed_outcomes += outcomes
+        if deltas:
+            self.log(f"ETOTO: {len(deltas)} meczów, {outcomes} zmian kursów ({time.monotonic() - started:.2f}s)")
+        return len(deltas)
+
+    async def run(self):
+        """
+        Odpytuje API co poll_interval sekund (liczone od początku zapytania), aż do anulowania.
+        """
+        interval = float(self.settings["poll_interval"])
+        while True:
+            started = time.monotonic()
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.log(f"ETOTO ERROR: {e}")
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    def summary(self) -> str:
+        return (f"ETOTO: zapytań {self.polls}, bez zmian {self.unchanged}, "
+                f"delt meczów {self.published}, zmian kursów {self.changed_outcomes}")
+
+    async def close(self):
+        await self.http_client.close()
+        self.event_index.close()
+
+
+def etoto_feed_from_config(config, log=print):
+    """
+    EtotoFeed z ustawieniami scraping.etoto, wspólnym RateLimiterem (domena API Etoto
+    w scraping.rate_limits.domains) i scraping.engine.etoto (domyślnie 1 zapytanie naraz).
+    """
+    settings = etoto_settings(config)
+    # browser_pool=None – EtotoFeed korzysta tylko z slot(), nigdy z page()
+    engine = ScrapeEngine("etoto", None, ProxyManager(config), engine_settings(config, "etoto", {"concurrency": 1}),
+                          limiter=rate_limiter_from_config(config),
+                          domain=urlsplit(settings["url"]).hostname, log=log)
+    return EtotoFeed(settings, HttpClient(http_settings(config), log), engine, event_index_from_config(config, log), log=log)
@@ -0,0 +1,359 @@
+# modules/event_index.py
+
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from datetime import datetime, timedelta
+from difflib import SequenceMatcher
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    event_id    TEXT PRIMARY KEY,
+    home        TEXT NOT NULL,
+    away        TEXT NOT NULL,
+    kickoff     TEXT NOT NULL,
+    created_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_kickoff ON events (kickoff);
+CREATE TABLE IF NOT EXISTS team_aliases (
+    alias       TEXT PRIMARY KEY,
+    canonical   TEXT NOT NULL
+);
+"""
+
+# ————————————
+# Normalizacja nazw drużyn
+# ————————————
+# Tokeny bez znaczenia przy porównaniu (formy prawne klubów, przyimki, skróty stanów BR)
+STOP_TOKENS = {
+    "fc", "fk", "sc", "cf", "ac", "afc", "sk", "ks", "kf", "cd", "ud", "ca", "club",
+    "de", "del", "la", "el", "sp", "ba", "mg", "rj", "ec",
+}
+
+# Tokeny zapisywane przez bukmacherów różnie
+TOKEN_ALIASES = {
+    "pln":  "polnocna",
+    "utd":  "united",
+    "st":   "saint",
+}
+
+# Całe nazwy (po normalizacji) -> nazwa kanoniczna; uzupełniane o aliasy wyuczone w trakcie pracy
+TEAM_ALIASES = {
+    "lichtenstein": "liechtenstein",
+}
+
+# Kwalifikatory drużyny -> postać kanoniczna. Różne zestawy kwalifikatorów to różne
+# drużyny: "Polska U21", "Polska (K)" i "Polska" nigdy nie są tym samym wydarzeniem.
+QUALIFIER_ALIASES = {
+    "k":        "women",
+    "w":        "women",
+    "women":    "women",
+    "kobiety":  "women",
+    "ii":       "ii",
+    "b":        "ii",
+    "rez":      "ii",
+    "rezerwy":  "ii",
+    "res":      "ii",
+    "reserves": "ii",
+}
+
+_RE_NON_WORD = re.compile(r"[^\w]+")
+_RE_AGE = re.compile(r"\bu[\s-]?(\d{2})\b")       # "U21", "U-21", "u 21" -> "u21"
+_RE_AGE_TOKEN = re.compile(r"^u\d{2}$")
+_FOLD = str.maketrans({"ł": "l", "Ł": "l", "ø": "o", "ß": "ss", "æ": "ae"})
+
+
+def normalize_team(name: str) -> str:
+    """
+    "Macedonia Płn." -> "macedonia polnocna", "CA San Telmo" -> "san telmo",
+    "Polska (K)" -> "polska women", "Polska U-21" -> "polska u21".
+    Małe litery, bez znaków diakrytycznych i interpunkcji, bez tokenów z STOP_TOKENS;
+    kwalifikatory (QUALIFIER_ALIASES, wiek uNN) zostają w postaci kanonicznej.
+    """
+    text = unicodedata.normalize("NFKD", (name or "").translate(_FOLD).lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = _RE_AGE.sub(r"u\1", text)
+    tokens = [QUALIFIER_ALIASES.get(tok) or TOKEN_ALIASES.get(tok, tok)
+              for tok in _RE_NON_WORD.sub(" ", text).replace("_", " ").split()]
+    kept = [tok for tok in tokens if len(tok) > 1 and tok not in STOP_TOKENS]
+    return " ".join(kept or tokens)
+
+
+def team_qualifiers(name: str) -> frozenset:
+    """
+    Kwalifikatory znormalizowanej nazwy drużyny, np. {"u21"}, {"women"}, {"ii"}.
+    """
+    qualifiers = set(QUALIFIER_ALIASES.values())
+    return frozenset(tok for tok in name.split() if tok in qualifiers or _RE_AGE_TOKEN.match(tok))
+
+
+def split_match_name(match_name: str):
+    try:
+        home, away = [x.strip() for x in match_name.split(" - ", 1)]
+    except ValueError:
+        try:
+            home, away = [x.strip() for x in match_name.split("-", 1)]
+        except ValueError:
+            home, away = match_name.strip(), ""
+    return home, away
+
+
+def _tokens_match(a: str, b: str) -> bool:
+    if a == b:
+        return True
+    if len(a) >= 3 and len(b) >= 3 and (a.startswith(b) or b.startswith(a)):
+        return True
+    return SequenceMatcher(None, a, b).ratio() >= 0.85
+
+
+def team_similarity(a: str, b: str) -> float:
+    """
+    Podobieństwo dwóch znormalizowanych nazw drużyn (0..1): maksimum z
+      – pokrycia tokenów (tokeny równe, prefiks albo literówka), ważonego
+        jak Jaccard i jak zawieranie krótszej nazwy w dłuższej,
+      – podobieństwa napisów (SequenceMatcher).
+    Nazwy z różnymi kwalifikatorami (team_qualifiers) mają podobieństwo 0.
+    """
+    if a == b:
+        return 1.0
+    if team_qualifiers(a) != team_qualifiers(b):
+        return 0.0
+    ta, tb = a.split(), b.split()
+    if not ta or not tb:
+        return 0.0
+    common = sum(1 for x in ta if any(_tokens_match(x, y) for y in tb))
+    containment = common / min(len(ta), len(tb))
+    jaccard = common / (len(ta) + len(tb) - common)
+    return max(0.5 * containment + 0.5 * jaccard, SequenceMatcher(None, a, b).ratio())
+
+
+def make_event_id(home: str, away: str, kickoff: datetime) -> str:
+    """
+    Dwie pierwsze litery drużyny domowej + dwie pierwsze litery drużyny gościa
+    + DDMMHHMM (bez roku) – format dawnego make_match_id.
+    """
+    h = home.replace(" ", "")
+    a = away.replace(" ", "")
+    h_key = (h[:2].upper() if len(h) >= 2 else (h[:1].upper() + "_"))
+    a_key = (a[:2].upper() if len(a) >= 2 else (a[:1].upper() + "_"))
+    return f"{h_key}{a_key}{kickoff.strftime('%d%m%H%M')}"
+
+
+class EventIndex:
+    """
+    Wspólne dla bukmacherów ID wydarzeń zamiast heurystyki „2+2 litery + data”.
+    Kluczem indeksu jest (kubełek godziny rozpoczęcia, znormalizowane nazwy drużyn):
+      – dokładne trafienie (godzina, gospodarz, gość) – słownik, O(1),
+      – w przeciwnym razie kandydaci z sąsiednich kubełków, którzy mają wspólny
+        token nazwy (indeks odwrócony token -> wydarzenia), oceniani team_similarity,
+      – trafienie powyżej progu uczy aliasów nazw, które od razu działają jak
+        dokładne trafienia.
+    Wydarzenia i aliasy trzymane są w SQLite (ta sama baza co kursy), więc przeżywają
+    restart i są wspólne dla scraperów w osobnych procesach/wątkach.
+    """
+
+    EXPIRE_EVERY = 600     # s – jak często resolve() wygasza stare wydarzenia
+    LEARN_THRESHOLD = 0.85 # min. podobieństwo drużyny, żeby zapamiętać alias (krótkie nazwy bywają niejednoznaczne)
+
+    def __init__(self, path: str, threshold: float = 0.7, tolerance_minutes: int = 15,
+                 ttl_hours: float = 24, log=print):
+        self.threshold = threshold
+        self.tolerance = timedelta(minutes=tolerance_minutes)
+        self.bucket_seconds = max(60, tolerance_minutes * 60)
+        self.ttl = timedelta(hours=ttl_hours)
+        self.log = log
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+        self._events = {}      # event_id -> (home, away, kickoff)
+        self._exact = {}       # (kickoff, home, away) -> event_id
+        self._buckets = {}     # kubełek -> {token: {event_id}}
+        self._resolved = {}    # (surowa nazwa meczu, kickoff) -> event_id
+        self._aliases = dict(TEAM_ALIASES)
+        self._events_rowid = 0
+        self._aliases_rowid = 0
+        self._last_expire = 0.0
+        with self._lock:
+            self._sync()
+
+    # ————————————
+    # Stan w pamięci <-> SQLite
+    # ————————————
+    def _sync(self):
+        """Dociąga wydarzenia i aliasy dopisane od ostatniej synchronizacji (też przez inne procesy)."""
+        rows = self._conn.execute(
+            "SELECT rowid, event_id, home, away, kickoff FROM events WHERE rowid > ? ORDER BY rowid",
+            (self._events_rowid,),
+        ).fetchall()
+        for rowid, event_id, home, away, kickoff in rows:
+            self._add(event_id, home, away, datetime.strptime(kickoff, "%Y-%m-%dT%H:%M:%S"))
+            self._events_rowid = rowid
+
+        rows = self._conn.execute(
+            "SELECT rowid, alias, canonical FROM team_aliases WHERE rowid > ? ORDER BY rowid",
+            (self._aliases_rowid,),
+        ).fetchall()
+        for rowid, alias, canonical in rows:
+            self._aliases[alias] = canonical
+            self._aliases_rowid = rowid
+
+    def _bucket(self, kickoff: datetime) -> int:
+        return int(kickoff.timestamp()) // self.bucket_seconds
+
+    def _add(self, event_id, home, away, kickoff):
+        self._events[event_id] = (home, away, kickoff)
+        self._exact[(kickoff, home, away)] = event_id
+        postings = self._buckets.setdefault(self._bucket(kickoff), {})
+        for tok in set(home.split()) | set(away.split()):
+            postings.setdefault(tok, set()).add(event_id)
+
+    def _canonical(self, name: str) -> str:
+        norm = normalize_team(name)
+        return self._aliases.get(norm, norm)
+
+    # ————————————
+    # Dopasowanie
+    # ————————————
+    def _candidates(self, home, away, kickoff):
+        tokens = set(home.split()) | set(away.split())
+        found = set()
+        bucket = self._bucket(kickoff)
+        for b in (bucket - 1, bucket, bucket + 1):
+            postings = self._buckets.get(b)
+            if not postings:
+                continue
+            for tok in tokens:
+                found |= postings.get(tok, set())
+        return found
+
+    def _match(self, home, away, kickoff):
+        """
+        Zwraca (event_id, score) najlepszego znanego wydarzenia albo (None, 0.0).
+        """
+        event_id = self._exact.get((kickoff, home, away))
+        if event_id:
+            return event_id, 1.0
+
+        best_id, best_score = None, 0.0
+        for event_id in self._candidates(home, away, kickoff):
+            e_home, e_away, e_kickoff = self._events[event_id]
+            if abs(e_kickoff - kickoff) > self.tolerance:
+                continue
+            sim_home = team_similarity(home, e_home)
+            sim_away = team_similarity(away, e_away)
+            # próg dotyczy KAŻDEJ drużyny, nie średniej ("Real Madryt" ≠ "Real Sociedad")
+            if min(sim_home, sim_away) < self.threshold:
+                continue
+            score = (sim_home + sim_away) / 2
+            if score > best_score:
+                best_id, best_score = event_id, score
+        if best_score >= self.threshold:
+            return best_id, best_score
+        return None, best_score
+
+    def _learn(self, names, event_id):
+        e_home, e_away, _ = self._events[event_id]
+        for name, canonical in zip(names, (e_home, e_away)):
+            if name == canonical or name in self._aliases:
+                continue
+            if team_similarity(name, canonical) >= self.LEARN_THRESHOLD:
+                self._aliases[name] = canonical
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO team_aliases (alias, canonical) VALUES (?, ?)", (name, canonical)
+                )
+                self.log(f"EVENT_INDEX: alias '{name}' -> '{canonical}'")
+
+    def resolve(self, match_name: str, kickoff: datetime) -> str:
+        """
+        Zwraca wspólne ID wydarzenia dla meczu "Gospodarz - Gość" o podanej godzinie
+        rozpoczęcia. Nieznane wydarzenie jest rejestrowane (w jednej transakcji
+        z dociągnięciem zmian innych procesów, więc dwa scrapery nie nadadzą
+        temu samemu meczowi dwóch różnych ID).
+        """
+        key = (match_name, kickoff)
+        with self._lock:
+            event_id = self._resolved.get(key)
+            if event_id and event_id in self._events:
+                return event_id
+
+            raw_home, raw_away = split_match_name(match_name)
+            home, away = self._canonical(raw_home), self._canonical(raw_away)
+
+            event_id, score = self._match(home, away, kickoff)
+            if event_id is None:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._sync()
+                    event_id, score = self._match(home, away, kickoff)
+                    if event_id is None:
+                        event_id = self._register(raw_home, raw_away, home, away, kickoff)
+                    elif score < 1.0:
+                        self._learn((home, away), event_id)
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            elif score < 1.0:
+                self._learn((home, away), event_id)
+
+            self._resolved[key] = event_id
+            if time.time() - self._last_expire >= self.EXPIRE_EVERY:
+                self.expire()
+            return event_id
+
+    def _register(self, raw_home, raw_away, home, away, kickoff):
+        base = make_event_id(raw_home, raw_away, kickoff)
+        event_id, n = base, 1
+        while event_id in self._events:
+            n += 1
+            event_id = f"{base}_{n}"
+        cur = self._conn.execute(
+            "INSERT INTO events (event_id, home, away, kickoff, created_at) VALUES (?, ?, ?, ?, ?)",
+            (event_id, home, away, kickoff.strftime("%Y-%m-%dT%H:%M:%S"), time.time()),
+        )
+        self._add(event_id, home, away, kickoff)
+        self._events_rowid = max(self._events_rowid, cur.lastrowid)
+        return event_id
+
+    def expire(self):
+        """
+        Usuwa wydarzenia rozpoczęte wcześniej niż TTL temu (pamięć i baza). Aliasy zostają.
+        """
+        threshold = datetime.now() - self.ttl
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM events WHERE kickoff < ?", (threshold.strftime("%Y-%m-%dT%H:%M:%S"),)
+            )
+            for event_id, (home, away, kickoff) in list(self._events.items()):
+                if kickoff >= threshold:
+                    continue
+                del self._events[event_id]
+                self._exact.pop((kickoff, home, away), None)
+                postings = self._buckets.get(self._bucket(kickoff), {})
+                for tok in set(home.split()) | set(away.split()):
+                    postings.get(tok, set()).discard(event_id)
+            self._resolved = {k: v for k, v in self._resolved.items() if v in self._events}
+            self._last_expire = time.time()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def event_index_from_config(config, log=print):
+    """
+    EventIndex w bazie kursów (scraping.paths.odds_db) z ustawieniami
+    scraping.event_matching z config.yaml.
+    """
+    return EventIndex(
+        config.get('scraping', 'paths', 'odds_db', default="odds.db"),
+        threshold=float(config.get('scraping', 'event_matching', 'threshold', default=0.7)),
+        tolerance_minutes=int(config.get('scraping', 'event_matching', 'tolerance_minutes', default=15)),
+        ttl_hours=float(config.get('scraping', 'event_matching', 'ttl_hours', default=24)),
+        log=log,
+    )
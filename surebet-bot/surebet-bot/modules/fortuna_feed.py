@@ -0,0 +1,141 @@
+# modules/fortuna_feed.py
+
+import asyncio
+import time
+
+from modules.change_detector import fingerprint
+from modules.json_odds import find_events
+from modules.response_capture import ResponseCapture
+
+DEFAULT_FEED_SETTINGS = {
+    "enabled":       True,
+    "url_patterns":  ["/api/", "/ajax/"],  # fragmenty URL-i XHR z kursami
+    "discover_ttl":  3600,                  # s – jak długo ufamy odkrytym endpointom ligi
+    "timeout":       10,
+}
+
+
+def feed_settings(config, defaults=None):
+    """
+    Ustawienia klienta JSON Fortuny: DEFAULT_FEED_SETTINGS <- `defaults`
+    <- scraping.fortuna_api z config.yaml.
+    """
+    settings = dict(DEFAULT_FEED_SETTINGS)
+    if defaults:
+        settings.update(defaults)
+    settings.update(config.get('scraping', 'fortuna_api', default={}) or {})
+    return settings
+
+
+class FortunaFeed:
+    """
+    Klient endpointów JSON, z których korzysta sama strona Fortuny.
+      – discover(): raz na discover_ttl otwiera stronę ligi w karcie z browser_pool
+        i zapamiętuje URL-e odpowiedzi XHR/fetch z JSON-em (url_patterns),
+      – fetch_league(): pobiera te endpointy przez wspólny HttpClient scrapera (pula
+        połączeń keep-alive / HTTP/2 per proxy, limity per host) i dekoduje kursy całej
+        ligi naraz (json_odds.find_events). Odpowiedź o treści identycznej z poprzednią
+        (odcisk surowych bajtów) nie jest ponownie dekodowana – wracają mecze z poprzedniego razu.
+    Zwraca None, gdy ścieżka API zawiodła – wtedy scraper wraca do Playwrighta.
+    Wynik każdego żądania trafia do `report(kwargs, status=..., error=...)`
+    (ScrapeEngine.report – tempo żądań per domena i proxy).
+    """
+
+    def __init__(self, browser_pool, http_client, settings: dict, log=print, report=None):
+        self.browser_pool = browser_pool
+        self.http_client = http_client
+        self.settings = settings
+        self.log = log
+        self.report = report or (lambda kwargs, status=None, error=None, latency=None: None)
+        self._endpoints = {}     # league_url -> (znacznik czasu, [url, ...])
+        self._bodies = {}        # url -> (odcisk treści, mecze z find_events)
+        self.unchanged = 0       # odpowiedzi identyczne z poprzednią (bez dekodowania)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.settings.get("enabled"))
+
+    def _matches_pattern(self, url: str) -> bool:
+        return any(p in url for p in self.settings["url_patterns"])
+
+    async def discover(self, league_url: str, request_kwargs: dict = None):
+        """
+        Otwiera stronę ligi i zbiera URL-e JSON-owych odpowiedzi XHR/fetch.
+        """
+        capture = None
+        try:
+            async with self.browser_pool.page(request_kwargs) as page:
+                capture = ResponseCapture(page, self.settings["url_patterns"], log=self.log)
+                try:
+                    await page.goto(league_url, timeout=30000)
+                    await page.wait_for_load_state("networkidle", timeout=15000)
+                finally:
+                    capture.close()
+        except Exception as e:
+            # timeout networkidle nie przekreśla endpointów złapanych do tej pory
+            self.log(f"FORTUNA_FEED WARN: odkrywanie endpointów nie powiodło się: {e}")
+        found = list(dict.fromkeys(capture.urls)) if capture else []
+
+        self._endpoints[league_url] = (time.time(), found)
+        self.log(f"FORTUNA_FEED: {len(found)} endpointów JSON dla {league_url}")
+        return found
+
+    async def _fetch_events(self, url: str, request_kwargs: dict):
+        headers = {"Accept": "application/json", "X-Requested-With": "XMLHttpRequest"}
+        try:
+            response = await self.http_client.get(url, request_kwargs, headers=headers,
+                                                  timeout=float(self.settings["timeout"]))
+        except Exception as e:
+            self.report(request_kwargs or {}, error=e)
+            raise
+        self.report(request_kwargs or {}, status=response.status_code, latency=response.elapsed.total_seconds())
+        response.raise_for_status()
+
+        fp = fingerprint(response.content)
+        cached = self._bodies.get(url)
+        if cached is not None and cached[0] == fp:
+            self.unchanged += 1
+            return cached[1]
+        # duże odpowiedzi – dekodowanie poza pętlą zdarzeń
+        events = await asyncio.to_thread(lambda: find_events(response.json(), "Fortuna"))
+        self._bodies[url] = (fp, events)
+        return events
+
+    async def fetch_league(self, league_url: str, request_kwargs: dict = None):
+        """
+        Wszystkie mecze ligi z endpointów JSON albo None (brak endpointów, błąd HTTP,
+        JSON bez rozpoznawalnych wydarzeń) – sygnał do użycia Playwrighta.
+        """
+        if not self.enabled:
+            return None
+
+        cached = self._endpoints.get(league_url)
+        if cached is None or time.time() - cached[0] > self.settings["discover_ttl"]:
+            urls = await self.discover(league_url, request_kwargs)
+        else:
+            urls = cached[1]
+        if not urls:
+            return None
+
+        events, useful = [], []
+        for url in urls:
+            try:
+                parsed = await self._fetch_events(url, request_kwargs)
+            except Exception as e:
+                self.log(f"FORTUNA_FEED WARN: {url}: {e}")
+                continue
+            if parsed:
+                useful.append(url)
+                events.extend(parsed)
+            else:
+                self._bodies.pop(url, None)
+
+        if not events:
+            # endpointy mogły się zmienić – przy następnym przebiegu odkryjemy je na nowo
+            self._endpoints.pop(league_url, None)
+            return None
+        # kolejne przebiegi pobierają już tylko endpointy, w których były kursy; wpis mógł
+        # w międzyczasie zniknąć (równoległe pobranie tej ligi, np. hot_poll) – wtedy liczymy od teraz
+        cached = self._endpoints.get(league_url)
+        self._endpoints[league_url] = (cached[0] if cached is not None else time.time(), useful)
+        return events
@@ -0,0 +1,94 @@
+# modules/fortuna_html.py
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml.html
+    from lxml.cssselect import CSSSelector   # wymaga pakietu cssselect
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# ————————————
+# Selektory stron Fortuny (lista ligi i nagłówek strony meczu)
+# ————————————
+EVENT_LINK_CSS = "a.event-link"
+EVENT_DETAIL_CSS = "section.event-detail"
+EVENT_DATETIME_CSS = "span.event-datetime"
+EVENT_NAME_CSS = "h1.breadcrumbed-title span.event-name"
+
+if LXML_AVAILABLE:
+    # kompilowane raz (CSS -> XPath) – przy każdej stronie tylko wykonanie
+    _SEL_EVENT_LINK = CSSSelector(EVENT_LINK_CSS)
+    _SEL_EVENT_DETAIL = CSSSelector(EVENT_DETAIL_CSS)
+    _SEL_EVENT_DATETIME = CSSSelector(EVENT_DATETIME_CSS)
+    _SEL_EVENT_NAME = CSSSelector(EVENT_NAME_CSS)
+
+# bez lxml: html.parser buduje tylko potrzebne poddrzewa, resztę dokumentu pomija
+_STRAIN_LINKS = SoupStrainer("a", class_="event-link")
+_STRAIN_HEADER = SoupStrainer(["section", "h1", "span"])
+
+
+def _text(el) -> str:
+    # to samo co BeautifulSoup.get_text(strip=True)
+    return "".join(s.strip() for s in el.itertext())
+
+
+def _lxml_root(html: str):
+    try:
+        return lxml.html.fromstring(html)
+    except ValueError:
+        # str z deklaracją kodowania (<?xml ... encoding=...?>) – lxml chce wtedy bajtów
+        return lxml.html.fromstring(html.encode("utf-8"))
+
+
+def _header(sec_attrs, dt_text, name) -> dict:
+    return {
+        "sport":       sec_attrs.get("data-sport") if sec_attrs is not None else None,
+        "competition": sec_attrs.get("data-competition") if sec_attrs is not None else None,
+        "datetime":    dt_text,
+        "match_name":  name or None,
+    }
+
+
+# ————————————
+# Szybka ścieżka: lxml + skompilowane selektory, fallback: SoupStrainer
+# ————————————
+def parse_event_links(html: str) -> list:
+    """
+    Wartości href wszystkich a.event-link z listy ligi (w kolejności na stronie).
+    """
+    if LXML_AVAILABLE:
+        return [a.get("href") for a in _SEL_EVENT_LINK(_lxml_root(html)) if a.get("href")]
+    soup = BeautifulSoup(html, "html.parser", parse_only=_STRAIN_LINKS)
+    return [a.get("href") for a in soup.select(EVENT_LINK_CSS) if a.get("href")]
+
+
+def parse_match_header(html: str) -> dict:
+    """
+    Nagłówek strony meczu: {"sport", "competition", "datetime" (tekst span.event-datetime),
+    "match_name"} – brakujące pola jako None.
+    """
+    if LXML_AVAILABLE:
+        root = _lxml_root(html)
+        sec = next(iter(_SEL_EVENT_DETAIL(root)), None)
+        dt_el = next(iter(_SEL_EVENT_DATETIME(root)), None)
+        name_el = next(iter(_SEL_EVENT_NAME(root)), None)
+        return _header(
+            sec.attrib if sec is not None else None,
+            _text(dt_el) if dt_el is not None else None,
+            _text(name_el) if name_el is not None else None,
+        )
+    soup = BeautifulSoup(html, "html.parser", parse_only=_STRAIN_HEADER)
+    return _soup_header(soup)
+
+
+def _soup_header(soup) -> dict:
+    sec = soup.select_one(EVENT_DETAIL_CSS)
+    dt_el = soup.select_one(EVENT_DATETIME_CSS)
+    name_el = soup.select_one(EVENT_NAME_CSS)
+    return _header(
+        sec.attrs if sec is not None else None,
+        dt_el.get_text(strip=True) if dt_el is not None else None,
+        name_el.get_text(strip=True) if name_el is not None else None,
+    )
@@ -0,0 +1,113 @@
+# modules/http_client.py
+
+import asyncio
+from urllib.parse import urlsplit
+
+import httpx
+
+from modules.proxy_manager import proxy_server_from_kwargs
+
+try:
+    import h2  # noqa: F401 – httpx potrzebuje pakietu h2 do HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Domyślne ustawienia – nadpisywane przez scraping.http w config.yaml
+DEFAULT_HTTP_SETTINGS = {
+    "http2":            True,    # HTTP/2 (multipleksowanie), gdy zainstalowany jest pakiet h2
+    "max_connections":  20,      # na jedno proxy (klienta)
+    "keepalive":        10,      # ile bezczynnych połączeń trzymać otwartych
+    "keepalive_expiry": 60,      # po ilu sekundach bezczynności je zamknąć
+    "timeout":          15,
+    "per_host":         4,       # ile żądań naraz do jednego hosta
+    "hosts":            {},      # host -> własny limit żądań naraz
+}
+
+
+def http_settings(config) -> dict:
+    """
+    Scala DEFAULT_HTTP_SETTINGS ze scraping.http z config.yaml.
+    """
+    settings = dict(DEFAULT_HTTP_SETTINGS)
+    settings.update(config.get('scraping', 'http', default={}) or {})
+    return settings
+
+
+class HttpClient:
+    """
+    Wspólna warstwa HTTP dla pobrań bez przeglądarki: jeden httpx.AsyncClient
+    (pula połączeń keep-alive, HTTP/2) na każde proxy, więc kolejne żądania
+    przez to samo proxy nie otwierają nowego połączenia TCP+TLS.
+    Równoległość per host pilnują semafory (per_host / hosts).
+    Klienci należą do pętli zdarzeń, w której powstali – po zmianie pętli
+    (np. kolejne asyncio.run()) tworzeni są od nowa.
+    """
+
+    def __init__(self, settings: dict, log=print):
+        self.settings = settings
+        self.http2 = bool(settings["http2"]) and HTTP2_AVAILABLE
+        self.log = log
+        if settings["http2"] and not HTTP2_AVAILABLE:
+            self.log("HTTP_CLIENT WARN: brak pakietu h2 – używam HTTP/1.1 (pip install httpx[http2])")
+
+        self._loop = None
+        self._clients = {}       # proxy -> httpx.AsyncClient
+        self._host_limits = {}   # host -> asyncio.Semaphore
+
+    def _ensure_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # klienci starej pętli nie nadają się do użycia – porzucamy je
+            self._loop = loop
+            self._clients = {}
+            self._host_limits = {}
+
+    def _client(self, proxy):
+        client = self._clients.get(proxy)
+        if client is None:
+            s = self.settings
+            client = self._clients[proxy] = httpx.AsyncClient(
+                http2=self.http2,
+                proxy=proxy,
+                timeout=float(s["timeout"]),
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=int(s["max_connections"]),
+                    max_keepalive_connections=int(s["keepalive"]),
+                    keepalive_expiry=float(s["keepalive_expiry"]),
+                ),
+            )
+        return client
+
+    def host_limit(self, host: str):
+        """
+        Semafor żądań naraz do `host` (scraping.http.hosts albo per_host).
+        """
+        self._ensure_loop()
+        sem = self._host_limits.get(host)
+        if sem is None:
+            limit = (self.settings.get("hosts") or {}).get(host, self.settings["per_host"])
+            sem = self._host_limits[host] = asyncio.Semaphore(max(1, int(limit)))
+        return sem
+
+    async def get(self, url: str, request_kwargs: dict = None, headers: dict = None, timeout: float = None):
+        """
+        GET przez proxy i z User-Agentem z request_kwargs (ProxyManager.get_request_kwargs()).
+        Zwraca httpx.Response (bez raise_for_status – decyduje wołający).
+        """
+        self._ensure_loop()
+        kwargs = request_kwargs or {}
+        merged = dict(kwargs.get("headers") or {})
+        merged.update(headers or {})
+        client = self._client(proxy_server_from_kwargs(kwargs))
+        async with self.host_limit(urlsplit(url).hostname or ""):
+            return await client.get(url, headers=merged, timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT)
+
+    async def close(self):
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception:
+                pass
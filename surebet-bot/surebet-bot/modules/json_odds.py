@@ -0,0 +1,186 @@
+# modules/json_odds.py
+
+from datetime import datetime
+
+from modules.event_index import normalize_team, split_match_name, team_similarity
+
+# ————————————
+# Nazwy pól w JSON-ie bukmacherów (pierwsze pasujące wygrywa)
+# ————————————
+EVENT_NAME_KEYS  = ("eventName", "name", "matchName", "label")
+EVENT_START_KEYS = ("eventStart", "startTime", "start", "startDatetime", "date", "kickoff")
+EVENT_SPORT_KEYS = ("sportName", "sport")
+EVENT_COMP_KEYS  = ("competitionName", "competition", "leagueName", "league", "tournamentName")
+MARKETS_KEYS     = ("markets", "marketList", "bets", "games")
+MARKET_NAME_KEYS = ("name", "marketName", "label", "title")
+OUTCOMES_KEYS    = ("outcomes", "odds", "selections", "results")
+OUTCOME_NAME_KEYS = ("name", "outcomeName", "label", "title")
+OUTCOME_ODDS_KEYS = ("value", "odds", "price", "rate")
+EVENT_ID_KEYS    = ("eventId", "matchId", "event_id")
+EVENT_HOME_KEYS  = ("homeTeam", "homeName", "home", "team1")
+EVENT_AWAY_KEYS  = ("awayTeam", "awayName", "away", "team2")
+
+# min. podobieństwo nazw drużyn (team_similarity), jak domyślny próg EventIndex
+TEAM_MATCH_THRESHOLD = 0.7
+
+
+def first_value(obj: dict, keys):
+    for key in keys:
+        value = obj.get(key)
+        if value not in (None, "", [], {}):
+            return value
+    return None
+
+
+def parse_start(value):
+    """Epoch (s albo ms) albo ISO 8601 -> datetime (czas lokalny, bez strefy) albo None."""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000 if value > 1e11 else value)
+    if isinstance(value, str):
+        text = value.strip().replace("Z", "+00:00")
+        try:
+            dt = datetime.fromisoformat(text)
+        except ValueError:
+            return None
+        return dt.astimezone().replace(tzinfo=None) if dt.tzinfo else dt
+    return None
+
+
+def parse_market(mkt, bookmaker: str):
+    """
+    Jeden rynek z JSON-a -> {"market_name", "selections": [{"outcome", "odds", "bookmaker"}]}
+    albo None, gdy obiekt nie wygląda na rynek z kursami.
+    """
+    if not isinstance(mkt, dict):
+        return None
+    name = first_value(mkt, MARKET_NAME_KEYS)
+    outcomes = first_value(mkt, OUTCOMES_KEYS)
+    if not isinstance(name, str) or not isinstance(outcomes, list):
+        return None
+    selections = []
+    for out in outcomes:
+        if not isinstance(out, dict):
+            continue
+        out_name = first_value(out, OUTCOME_NAME_KEYS)
+        odds = first_value(out, OUTCOME_ODDS_KEYS)
+        try:
+            odds_val = float(str(odds).replace(",", "."))
+        except (TypeError, ValueError):
+            continue
+        if not out_name or odds_val <= 1.0:
+            continue
+        selections.append({"outcome": str(out_name).strip(), "odds": odds_val, "bookmaker": bookmaker})
+    if not selections:
+        return None
+    return {"market_name": name.strip().upper(), "selections": selections}
+
+
+def parse_markets(raw_markets, bookmaker: str):
+    """
+    Lista rynków z JSON-a -> format group_markets():
+      [{"market_name": ..., "selections": [{"outcome", "odds", "bookmaker"}]}]
+    """
+    markets = []
+    for mkt in raw_markets if isinstance(raw_markets, list) else []:
+        parsed = parse_market(mkt, bookmaker)
+        if parsed:
+            markets.append(parsed)
+    return markets
+
+
+def find_events(payload, bookmaker: str):
+    """
+    Przechodzi po dowolnie zagnieżdżonym JSON-ie i zbiera obiekty wyglądające
+    jak wydarzenia: nazwa "Gospodarz - Gość", godzina rozpoczęcia i lista rynków.
+    Zwraca listę meczów (bez match_id): match_name, sport, competition,
+    datetime (obiekt), markets (format parse_markets).
+    """
+    events = []
+    # (węzeł, sport, liga) – sport i liga dziedziczone po węzłach nadrzędnych
+    stack = [(payload, None, None)]
+    while stack:
+        node, sport, comp = stack.pop()
+        if isinstance(node, list):
+            stack.extend((item, sport, comp) for item in reversed(node))
+            continue
+        if not isinstance(node, dict):
+            continue
+
+        sport = first_value(node, EVENT_SPORT_KEYS) or sport
+        comp = first_value(node, EVENT_COMP_KEYS) or comp
+        name = first_value(node, EVENT_NAME_KEYS)
+        start = parse_start(first_value(node, EVENT_START_KEYS))
+        raw_markets = first_value(node, MARKETS_KEYS)
+        if isinstance(name, str) and " - " in name and start and isinstance(raw_markets, list):
+            markets = parse_markets(raw_markets, bookmaker)
+            if markets:
+                events.append({
+                    "match_name":  name.strip(),
+                    "sport":       sport,
+                    "competition": comp,
+                    "datetime":    start,
+                    "markets":     markets,
+                })
+                continue
+        stack.extend((v, sport, comp) for v in node.values() if isinstance(v, (dict, list)))
+    return events
+
+
+def _team_name(value):
+    if isinstance(value, dict):
+        value = first_value(value, EVENT_NAME_KEYS)
+    return value.strip() if isinstance(value, str) and value.strip() else None
+
+
+def event_match(node: dict, match_name: str = None, event_id: str = None):
+    """
+    Czy węzeł JSON-a to wydarzenie meczu `match_name` / `event_id`:
+    True / False, albo None, gdy węzeł nie jest wydarzeniem albo nie da się
+    tego rozstrzygnąć (np. ma tylko ID, a szukamy po nazwach drużyn).
+    """
+    ids = {str(node[k]) for k in EVENT_ID_KEYS if node.get(k) not in (None, "")}
+    name = first_value(node, EVENT_NAME_KEYS)
+    if isinstance(name, str) and " - " in name:
+        teams = split_match_name(name)
+    else:
+        teams = (_team_name(first_value(node, EVENT_HOME_KEYS)), _team_name(first_value(node, EVENT_AWAY_KEYS)))
+        if not all(teams):
+            teams = None
+    if event_id and ids:
+        return str(event_id) in ids
+    if match_name and teams:
+        return all(
+            team_similarity(normalize_team(ours), normalize_team(theirs)) >= TEAM_MATCH_THRESHOLD
+            for ours, theirs in zip(split_match_name(match_name), teams)
+        )
+    return None
+
+
+def find_markets(payload, bookmaker: str, match_name: str = None, event_id: str = None):
+    """
+    Wszystkie rynki z kursami w dowolnym miejscu JSON-a (np. odpowiedź z kursami
+    jednego meczu). Z `match_name` / `event_id` – tylko rynki leżące wewnątrz
+    wydarzenia tego meczu (event_match); poddrzewa innych wydarzeń (np. „polecane
+    mecze” doklejone do odpowiedzi) i rynki bez żadnego wydarzenia nad nimi są pomijane.
+    """
+    markets = []
+    stack = [(payload, not (match_name or event_id))]
+    while stack:
+        node, owned = stack.pop()
+        if isinstance(node, list):
+            stack.extend((item, owned) for item in reversed(node))
+            continue
+        if not isinstance(node, dict):
+            continue
+        parsed = parse_market(node, bookmaker)
+        if parsed:
+            if owned:
+                markets.append(parsed)
+            continue
+        if not owned:
+            match = event_match(node, match_name, event_id)
+            if match is False:
+                continue
+            owned = match is True
+        stack.extend((v, owned) for v in reversed(node.values()) if isinstance(v, (dict, list)))
+    return markets
@@ -0,0 +1,115 @@
+# modules/listing_cache.py
+
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS league_listings (
+    bookmaker     TEXT NOT NULL,
+    league_url    TEXT NOT NULL,
+    links         TEXT NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    fetched_at    REAL NOT NULL,
+    PRIMARY KEY (bookmaker, league_url)
+);
+"""
+
+
+class ListingCache:
+    """
+    Listy meczów lig (wynik get_match_links) w SQLite – przeżywają restart bota.
+      – fresh(): lista młodsza niż TTL ligi – strony ligi w ogóle nie pobieramy,
+      – conditional_headers(): If-None-Match / If-Modified-Since z zapamiętanego
+        ETag / Last-Modified – serwer może odpowiedzieć 304 bez treści,
+      – store() / touch(): nowa lista albo potwierdzenie (304), że stara jest aktualna.
+    TTL: `ttl` sekund, dla wybranych lig – `league_ttl` {league_url: sekundy}.
+    """
+
+    def __init__(self, path: str, bookmaker: str, ttl: float = 1800, league_ttl: dict = None):
+        self.bookmaker = bookmaker
+        self.ttl = float(ttl)
+        self.league_ttl = dict(league_ttl or {})
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def ttl_for(self, league_url: str) -> float:
+        return float(self.league_ttl.get(league_url, self.ttl))
+
+    def get(self, league_url: str):
+        """
+        Zapamiętana lista ligi: {"links", "etag", "last_modified", "fetched_at"} albo None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT links, etag, last_modified, fetched_at FROM league_listings"
+                " WHERE bookmaker = ? AND league_url = ?",
+                (self.bookmaker, league_url),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"links": json.loads(row[0]), "etag": row[1], "last_modified": row[2], "fetched_at": row[3]}
+
+    def fresh(self, league_url: str):
+        """
+        Lista linków, jeśli pobrano ją mniej niż TTL ligi temu, inaczej None.
+        """
+        entry = self.get(league_url)
+        if entry is None or time.time() - entry["fetched_at"] >= self.ttl_for(league_url):
+            return None
+        return entry["links"]
+
+    @staticmethod
+    def conditional_headers(entry) -> dict:
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, league_url: str, links, etag: str = None, last_modified: str = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO league_listings"
+                " (bookmaker, league_url, links, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.bookmaker, league_url, json.dumps(list(links)), etag, last_modified, time.time()),
+            )
+
+    def touch(self, league_url: str):
+        """
+        Serwer potwierdził (304), że lista się nie zmieniła – liczymy TTL od nowa.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE league_listings SET fetched_at = ? WHERE bookmaker = ? AND league_url = ?",
+                (time.time(), self.bookmaker, league_url),
+            )
+
+    def invalidate(self, league_url: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM league_listings WHERE bookmaker = ? AND league_url = ?",
+                (self.bookmaker, league_url),
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def listing_cache_from_config(config, bookmaker: str):
+    """
+    ListingCache w bazie kursów (scraping.paths.odds_db) z ustawieniami
+    scraping.listing_cache z config.yaml (ttl, leagues: {league_url: ttl}).
+    """
+    return ListingCache(
+        config.get('scraping', 'paths', 'odds_db', default="odds.db"),
+        bookmaker,
+        ttl=float(config.get('scraping', 'listing_cache', 'ttl', default=1800)),
+        league_ttl=config.get('scraping', 'listing_cache', 'leagues', default={}) or {},
+    )
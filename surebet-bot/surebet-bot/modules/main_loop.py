@@ -1,16 +1,30 @@
 # modules/main_loop.py
 
 import asyncio
-import sys
 import os
+import time
 import traceback
-from pathlib import Path
+from datetime import datetime, timedelta
 
 from modules.config_manager import ConfigManager
-from modules.arbitrage import load_csv, compute_surebets, format_for_discord
+from modules.arbitrage import load_csv, match_to_entry, format_for_discord
+from modules.arbitrage_engine import ArbitrageEngine
+from modules.odds_store import OddsStore
+from modules.match_stream import match_stream
+from modules.match_scheduler import near_board
+from modules.scraper_worker import ScraperWorker
+from modules.etoto_feed import etoto_feed_from_config
+
+PRUNE_EVERY = 60  # s – jak często silnik arbitrażu wyrzuca zakończone mecze (jak OddsStore.expire)
 
 _loop_task = None
-_scraper_procs = []
+_workers = {}     # nazwa bukmachera -> ScraperWorker (żyje przez cały czas działania bota)
+
+# bukmacher -> moduł scrapera ładowany przez workera
+SCRAPER_MODULES = {
+    "fortuna": "modules.scraper_fortuna",
+    "sts":     "modules.scraper_sts",
+}
 
 def start_loop(bot):
     """
@@ -25,11 +39,12 @@ def start_loop(bot):
 
 async def stop_loop():
     """
-    Zatrzymuje task _scrape_and_post_loop i przerywa wszystkie procesy scrapujące.
+    Zatrzymuje task _scrape_and_post_loop (anulowanie pętli anuluje też zlecenia
+    trwające w workerach), a potem same workery – wątki, przeglądarki i pule HTTP.
+    Kolejny !start uruchamia je od nowa.
     """
-    global _loop_task, _scraper_procs
+    global _loop_task
 
-    # 1) anuluj główną pętlę
     if _loop_task:
         print("[MAIN_LOOP] Anuluję task _scrape_and_post_loop…")
         _loop_task.cancel()
@@ -40,121 +55,202 @@ async def stop_loop():
         _loop_task = None
         print("[MAIN_LOOP] ✔️ Task _scrape_and_post_loop został zatrzymany")
 
-    # 2) zabij procesy scrapujące
-    if _scraper_procs:
-        print(f"[MAIN_LOOP] 🛑 Zatrzymuję {_scraper_procs!r}")
-        for proc in _scraper_procs:
-            if proc.returncode is None:   # wciąż żywy
-                proc.terminate()
-        _scraper_procs.clear()
-        print("[MAIN_LOOP] ✔️ Wszystkie procesy scrapujące zakończone")
-
+    await shutdown_workers()
     return True
 
-async def _run_scraper(script_path, bot_arg=False, bot=None):
+async def shutdown_workers():
     """
-    Wewnętrzne uruchomienie scraperów jako subprocess.
-    Jeśli bot_arg=True, przekazuje bot.id jako argument (możesz dostosować, jeśli
-    potrzebujesz instancji bot-a w scraperze).
+    Zatrzymuje wszystkie workery scraperów (stop_loop, wyłączanie bota).
     """
-    cmd = [sys.executable, str(script_path)]
-    if bot_arg and bot is not None:
-        cmd.append(str(bot.user.id))
+    for name, worker in list(_workers.items()):
+        print(f"[MAIN_LOOP] 🛑 Zatrzymuję worker {name}")
+        await worker.stop()
+    _workers.clear()
 
-    # uruchom i pilnuj w globalnej liście
-    proc = await asyncio.create_subprocess_exec(*cmd)
-    _scraper_procs.append(proc)
-    await proc.wait()
-    # po zakończeniu usuń z listy
-    _scraper_procs.remove(proc)
+async def _ensure_workers():
+    """
+    Uruchamia brakujące workery. Import scraperów i start przeglądarek dzieje się
+    tylko przy pierwszym wywołaniu, a nie w każdym cyklu.
+    """
+    for name, module_name in SCRAPER_MODULES.items():
+        if name not in _workers:
+            worker = ScraperWorker(name, module_name)
+            await worker.start()
+            _workers[name] = worker
+    return _workers
 
-async def _scrape_and_post_loop(bot):
+async def _post_surebet(bot, sb, settings):
     """
-    1) Co interwał uruchamia procesy: scraper_fortuna.py i scraper_sts.py
-    2) Po zakończeniu obu procesów czeka 2 s, ładuje CSV i generuje surebety
-    3) Wysyła na Discord nowe surebety
-    4) Odkłada się na koniec interwału
+    Wysyła surebet na kanał Free/Premium wg progów. Zwraca True, gdy surebet
+    mieścił się w progach (niezależnie od powodzenia wysyłki).
     """
-    await bot.wait_until_ready()
-    print("[MAIN_LOOP] Bot jest ready, startuję loop")
+    mid    = sb["match_id"]
+    profit = sb.get("profit", 0.0)
 
-    config       = ConfigManager("config.yaml")
-    interval     = float(config.get('scraping', 'interval'))
-    sts_csv      = config.get('scraping', 'paths', 'sts_csv')
-    fortuna_csv  = config.get('scraping', 'paths', 'fortuna_csv')
-    free_max     = float(config.get('thresholds', 'free_max'))
-    premium_min  = float(config.get('thresholds', 'premium_min'))
-    free_ch_id   = int(config.get('discord', 'channels', 'free'))
-    premium_ch_id= int(config.get('discord', 'channels', 'premium', 'all'))
+    if profit <= settings["free_max"]:
+        ch_id, tag = settings["free_ch_id"], "[FREE]"
+    elif profit >= settings["premium_min"]:
+        ch_id, tag = settings["premium_ch_id"], "[PREMIUM]"
+    else:
+        return False
 
-    # ścieżki do skryptów
-    base = Path(__file__).parent
-    fortuna_py = base / "scraper_fortuna.py"
-    sts_py     = base / "scraper_sts.py"
+    channel = bot.get_channel(ch_id)
+    if channel:
+        txt = f"{tag} {format_for_discord(sb)}"
+        try:
+            await asyncio.wait_for(channel.send(txt), timeout=10)
+            print(f"[MAIN_LOOP] Wysłano {mid} ({profit:.2f}%)")
+        except Exception as e:
+            print(f"[MAIN_LOOP-ERROR] wysyłka: {e}")
+    return True
 
-    processed = set()
+async def _consume_match_stream(bot, settings, processed):
+    """
+    Odbiera mecze ze strumienia scraperów i przekazuje je do przyrostowego silnika
+    arbitrażu – przeliczany jest tylko zaktualizowany mecz, a na Discord trafiają
+    tylko nowe surebety (ten sam mecz+submarket nie jest wysyłany ponownie,
+    dopóki surebet się nie zamknie). Stan startowy wczytujemy raz z bazy kursów
+    (przy pierwszym uruchomieniu importując do niej stare pliki CSV).
+    """
+    engine = ArbitrageEngine(near_margin=settings["near_margin"])
+    prune_after = timedelta(hours=settings["prune_after_h"])
+    last_prune = time.time()
+    pending = []
+    try:
+        store = OddsStore(settings["odds_db"])
+        for bookmaker, csv_path in (("STS", settings["sts_csv"]), ("Fortuna", settings["fortuna_csv"])):
+            if store.last_update(bookmaker) is None and csv_path and os.path.isfile(csv_path):
+                print(f"[MAIN_LOOP] Importuję {csv_path} do bazy kursów…")
+                store.import_entries(bookmaker, load_csv(csv_path))
+            pending += engine.load(bookmaker, store.load(bookmaker))[0]
+        store.close()
+        for mid in {sb["match_id"] for sb in pending + engine.watchlist()}:
+            near_board.update(mid, engine.best_profit(mid))
+    except Exception as e:
+        print(f"[MAIN_LOOP-ERROR] błąd bazy kursów (stan startowy): {e}")
 
     while True:
+        for sb in pending:
+            key = (sb["match_id"], sb["submarket"])
+            if key in processed or sb.get("profit", 0.0) <= 0:
+                continue
+            if await _post_surebet(bot, sb, settings):
+                processed.add(key)
+
+        bookmaker, match = await match_stream.get()
+        mid = match.get("match_id")
+        if not mid:
+            pending = []
+            continue
         try:
-            print("[MAIN_LOOP] ► Startuję oba scrapery jako subprocessy…")
-            await asyncio.gather(
-                _run_scraper(fortuna_py),
-                _run_scraper(sts_py, bot_arg=True, bot=bot),
-            )
-            print("[MAIN_LOOP] ✔️ Procesy scrapujące zakończone.")
+            if match.get("delta"):
+                # feed live (Etoto) wysyła tylko zmienione kursy i klucze, które zniknęły
+                pending, closed = engine.patch(bookmaker, mid, match_to_entry(match, bookmaker), match["removed"],
+                                               live=bool(match.get("live")))
+                # mecz live – harmonogramy STS/Fortuny odświeżają go także po starcie
+                near_board.set_live(mid, bool(match.get("live")))
+            else:
+                pending, closed = engine.update(bookmaker, mid, match_to_entry(match, bookmaker))
+            # harmonogramy scraperów częściej odświeżają mecze, które są surebetem albo blisko niego
+            near_board.update(mid, engine.best_profit(mid))
+        except Exception as e:
+            print(f"[MAIN_LOOP-ERROR] błąd silnika arbitrażu: {e}")
+            traceback.print_exc()
+            pending = []
+            continue
+        processed.difference_update(closed)
 
-            print("[MAIN_LOOP] Czekam 2 sek. na zapis CSV…")
-            await asyncio.sleep(2)
+        if time.time() - last_prune >= PRUNE_EVERY:
+            # mecze rozpoczęte dawniej niż prune_after_h – po meczu (także live) nic już się nie zmieni
+            removed, closed = engine.prune(datetime.now() - prune_after)
+            processed.difference_update(closed)
+            for removed_mid in removed:
+                near_board.update(removed_mid, None)
+                near_board.set_live(removed_mid, False)
+            last_prune = time.time()
 
-            try:
-                d_sts     = load_csv(sts_csv)
-                d_fortuna= load_csv(fortuna_csv)
-            except Exception as e:
-                print(f"[MAIN_LOOP-ERROR] błąd CSV: {e}")
-                traceback.print_exc()
-                d_sts, d_fortuna = {}, {}
+async def _hot_poll_loop(poll_interval):
+    """
+    Co `poll_interval` sekund zleca działającym workerom odświeżenie meczów
+    z listy obserwowanych (blisko arbitrażu), niezależnie od cyklu lig.
+    """
+    while True:
+        await asyncio.sleep(poll_interval)
+        results = await asyncio.gather(*(w.hot_poll() for w in list(_workers.values())), return_exceptions=True)
+        for res in results:
+            if isinstance(res, Exception):
+                print(f"[MAIN_LOOP-ERROR] hot-poll: {res}")
+
+async def _etoto_loop(config):
+    """
+    Kursy live Etoto (API JSON, bez przeglądarki) – delty kursów trafiają do match_stream
+    co scraping.etoto.poll_interval sekund, niezależnie od cyklu lig.
+    """
+    feed = etoto_feed_from_config(config)
+    print(f"[MAIN_LOOP] Startuję feed Etoto (co {feed.settings['poll_interval']}s)")
+    try:
+        await feed.run()
+    finally:
+        print(f"[MAIN_LOOP] {feed.summary()}")
+        await feed.close()
 
+async def _scrape_and_post_loop(bot):
+    """
+    1) Podpina strumień meczów i startuje konsumenta, który liczy i wysyła surebety
+       na bieżąco – mecz po meczu, gdy tylko obaj bukmacherzy go mają
+    2) Co interwał zleca rezydentnym workerom scrapowanie lig Fortuny i STS
+    3) Odkłada się na koniec interwału
+    W tle co scraping.watchlist.poll_interval workery odświeżają mecze bliskie arbitrażu,
+    a (gdy scraping.etoto.enabled) feed Etoto na bieżąco podaje zmiany kursów live.
+    """
+    await bot.wait_until_ready()
+    print("[MAIN_LOOP] Bot jest ready, startuję loop")
+
+    config   = ConfigManager("config.yaml")
+    interval = float(config.get('scraping', 'interval'))
+    settings = {
+        "sts_csv":       config.get('scraping', 'paths', 'sts_csv'),
+        "fortuna_csv":   config.get('scraping', 'paths', 'fortuna_csv'),
+        "odds_db":       config.get('scraping', 'paths', 'odds_db', default="odds.db"),
+        "free_max":      float(config.get('thresholds', 'free_max')),
+        "premium_min":   float(config.get('thresholds', 'premium_min')),
+        "free_ch_id":    int(config.get('discord', 'channels', 'free')),
+        "premium_ch_id": int(config.get('discord', 'channels', 'premium', 'all')),
+        "near_margin":   float(config.get('scraping', 'watchlist', 'margin', default=0.5)),
+        "prune_after_h": float(config.get('scraping', 'arbitrage', 'prune_after_h', default=3)),
+    }
+    poll_interval = float(config.get('scraping', 'watchlist', 'poll_interval', default=15))
+
+    processed = set()
+    match_stream.bind()
+    consumer = asyncio.create_task(_consume_match_stream(bot, settings, processed))
+    hot_poller = asyncio.create_task(_hot_poll_loop(poll_interval))
+    etoto = asyncio.create_task(_etoto_loop(config)) if config.get('scraping', 'etoto', 'enabled', default=False) else None
+
+    try:
+        while True:
             try:
-                surebety = compute_surebets(d_sts, d_fortuna)
-            except Exception as e:
-                print(f"[MAIN_LOOP-ERROR] błąd compute_surebets: {e}")
-                traceback.print_exc()
-                surebety = []
-
-            for sb in surebety:
-                mid    = sb["match_id"]
-                profit = sb.get("profit", 0.0)
-                if mid in processed or profit <= 0:
-                    continue
-
-                if profit <= free_max:
-                    ch_id, tag = free_ch_id, "[FREE]"
-                elif profit >= premium_min:
-                    ch_id, tag = premium_ch_id, "[PREMIUM]"
-                else:
-                    continue
-
-                channel = bot.get_channel(ch_id)
-                if channel:
-                    txt = f"{tag} {format_for_discord(sb)}"
-                    fut = asyncio.run_coroutine_threadsafe(channel.send(txt), bot.loop)
-                    try:
-                        fut.result(timeout=10)
-                        print(f"[MAIN_LOOP] Wysłano {mid} ({profit:.2f}%)")
-                    except Exception as e:
-                        print(f"[MAIN_LOOP-ERROR] wysyłka: {e}")
-                processed.add(mid)
-
-            print(f"[MAIN_LOOP] Czekam {interval}s przed kolejnym cyklem…")
-            await asyncio.sleep(interval)
+                workers = await _ensure_workers()
+                print("[MAIN_LOOP] ► Zlecam scrapowanie lig workerom…")
+                await asyncio.gather(*(w.scrape_all() for w in workers.values()))
+                print("[MAIN_LOOP] ✔️ Zlecenia scrapujące zakończone.")
 
-        except asyncio.CancelledError:
-            print("[MAIN_LOOP] Otrzymałem CancelledError, przerywam pętlę")
-            break
+                print(f"[MAIN_LOOP] Czekam {interval}s przed kolejnym cyklem…")
+                await asyncio.sleep(interval)
 
-        except Exception:
-            print("[MAIN_LOOP-ERROR] nieprzewidziany błąd w pętli:")
-            traceback.print_exc()
-            await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                print("[MAIN_LOOP] Otrzymałem CancelledError, przerywam pętlę")
+                break
+
+            except Exception:
+                print("[MAIN_LOOP-ERROR] nieprzewidziany błąd w pętli:")
+                traceback.print_exc()
+                await asyncio.sleep(10)
+    finally:
+        match_stream.unbind()
+        consumer.cancel()
+        hot_poller.cancel()
+        if etoto:
+            etoto.cancel()
 
     print("[MAIN_LOOP] Pętla zakończona")
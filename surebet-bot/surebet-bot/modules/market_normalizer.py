@@ -0,0 +1,226 @@
+# modules/market_normalizer.py
+
+import re
+from functools import lru_cache
+
+from modules.event_index import split_match_name
+
+# ————————————
+# Tabela: surowa nazwa rynku (lower) STS / Fortuna -> kanoniczny rodzaj rynku
+# ————————————
+MARKET_TABLE = {
+    # liczba goli (over/under)
+    "liczba goli":                          "over_under",
+    "powyżej/poniżej":                      "over_under",
+    "1. połowa - liczba goli":              "over_under_1h",
+    "1.połowa liczba goli":                 "over_under_1h",
+    "2. połowa - liczba goli":              "over_under_2h",
+    "2.połowa liczba goli":                 "over_under_2h",
+    "1. drużyna - liczba goli":             "over_under_home",
+    "2. drużyna - liczba goli":             "over_under_away",
+    # rzuty rożne
+    "liczba rzutów rożnych":                "corners_over_under",
+    "1. połowa - liczba rzutów rożnych":    "corners_over_under_1h",
+    "1.połowa liczba rzutów rożnych":       "corners_over_under_1h",
+    "2.połowa liczba rzutów rożnych":       "corners_over_under_2h",
+    "rzuty rożne - handicap":               "corners_handicap",
+    "1. połowa - rzuty rożne handicap":     "corners_handicap_1h",
+    # handicap azjatycki (2 wyniki)
+    "handicap":                             "handicap",
+    "1. połowa - handicap":                 "handicap_1h",
+    "1.połowa: handicap":                   "handicap_1h",
+    "2. połowa - handicap":                 "handicap_2h",
+    # tak / nie
+    "obie drużyny strzelą gola":            "btts",
+    "1. drużyna strzeli gola":              "home_scores",
+    "2. drużyna strzeli gola":              "away_scores",
+    # wynik
+    "mecz":                                 "1x2",
+    "wynik meczu":                          "1x2",
+    "1. połowa":                            "1x2_1h",
+    "1.połowa":                             "1x2_1h",
+    "2. połowa":                            "1x2_2h",
+    "2.połowa":                             "1x2_2h",
+    "zakład bez remisu":                    "dnb",
+    "spotkanie bez remisu":                 "dnb",
+    "1. połowa - zakład bez remisu":        "dnb_1h",
+    # dokładna liczba goli (wiele wyników – "1"/"2" to NIE jest para dwuwyborowa)
+    "dokładna liczba goli":                 "exact_goals",
+    "1. połowa - dokładna liczba goli":     "exact_goals_1h",
+    "1.połowa: dokładna liczba goli":       "exact_goals_1h",
+    "2. połowa - dokładna liczba goli":     "exact_goals_2h",
+    "2.połowa: dokładna liczba goli":       "exact_goals_2h",
+    "1. drużyna - dokładna liczba goli":    "exact_goals_home",
+    "2. drużyna - dokładna liczba goli":    "exact_goals_away",
+}
+
+# Wzorce dla nazw z parametrem w treści (np. handicap europejski "handicap 0:1")
+MARKET_PATTERNS = [
+    (re.compile(r"^handicap (\d+):(\d+)$"), "euro_handicap"),
+    # Fortuna: "<drużyna> dokładna liczba goli" – bez kontekstu meczu nie wiemy, która to strona
+    (re.compile(r"dokładna liczba goli$"), "exact_goals_team"),
+]
+
+OVER_UNDER_KINDS = {
+    "over_under", "over_under_1h", "over_under_2h", "over_under_home", "over_under_away",
+    "corners_over_under", "corners_over_under_1h", "corners_over_under_2h",
+}
+HANDICAP_KINDS = {"handicap", "handicap_1h", "handicap_2h", "corners_handicap", "corners_handicap_1h"}
+YES_NO_KINDS = {"btts", "home_scores", "away_scores"}
+RESULT_KINDS = {"1x2", "1x2_1h", "1x2_2h"}
+DNB_KINDS = {"dnb", "dnb_1h"}
+# rynki, w których STS/Fortuna podpisują wyniki nazwami drużyn zamiast "1"/"2"
+SIDE_KINDS = RESULT_KINDS | DNB_KINDS
+EXACT_GOALS_KINDS = {"exact_goals", "exact_goals_1h", "exact_goals_2h", "exact_goals_home", "exact_goals_away"}
+
+OVER_PREFIXES  = ("+", "over", "powyżej", "wiecej", "więcej")
+UNDER_PREFIXES = ("-", "under", "poniżej", "mniej")
+
+# Komplet wyników rynku (kolejność = kolejność typów w wiadomości).
+# Pusta krotka: rynek znany, ale nie do arbitrażu (różne „ogony” typu "5+" / "6+" u bukmacherów).
+OUTCOMES_BY_KIND = {}
+for _kinds, _outcomes in (
+    (OVER_UNDER_KINDS,  ("over", "under")),
+    (HANDICAP_KINDS,    ("1", "2")),
+    (YES_NO_KINDS,      ("tak", "nie")),
+    (DNB_KINDS,         ("1", "2")),
+    (RESULT_KINDS,      ("1", "x", "2")),
+    ({"euro_handicap"}, ("1", "x", "2")),
+    (EXACT_GOALS_KINDS, ()),
+):
+    for _kind in _kinds:
+        OUTCOMES_BY_KIND[_kind] = _outcomes
+
+RE_NUMBER   = re.compile(r"(\d+(?:[.,]\d+)?)")
+RE_HANDICAP = re.compile(r"^([12])\s*\(([+-]?\d+(?:[.,]\d+)?)\)$")
+
+
+def _fmt_line(value: float, signed=False) -> str:
+    return f"{value:+g}" if signed else f"{value:g}"
+
+
+def market_kind(mkt: str):
+    """
+    Kanoniczny rodzaj rynku dla surowej nazwy (lower/strip) albo (None, None).
+    Drugi element to parametr rynku z wzorca (np. "0:1"), jeśli jest.
+    """
+    kind = MARKET_TABLE.get(mkt)
+    if kind:
+        return kind, None
+    for pattern, kind in MARKET_PATTERNS:
+        m = pattern.search(mkt)
+        if m:
+            return kind, ":".join(m.groups()) or None
+    return None, None
+
+
+def market_outcomes(submarket: str):
+    """
+    Krotka wszystkich wyników kanonicznego submarketu (np. ("1", "x", "2") dla "1x2"),
+    () dla rynków nie do arbitrażu albo None, gdy submarket pochodzi z dawnych
+    heurystyk (wtedy obowiązuje stara reguła: dokładnie 2 selekcje).
+    """
+    return OUTCOMES_BY_KIND.get(submarket.split(":", 1)[0])
+
+
+def _over_under(kind, sel):
+    if sel.startswith(OVER_PREFIXES):
+        sel_key = "over"
+    elif sel.startswith(UNDER_PREFIXES):
+        sel_key = "under"
+    else:
+        return None, None
+    m = RE_NUMBER.search(sel)
+    if not m:
+        return None, None
+    line = float(m.group(1).replace(",", "."))
+    return f"{kind}:{_fmt_line(line)}", sel_key
+
+
+def _handicap(kind, sel):
+    # "1 (-1.5)" i "2 (+1.5)" to dwie strony TEJ SAMEJ linii – kluczem jest linia gospodarza
+    m = RE_HANDICAP.match(sel)
+    if not m:
+        return None, None
+    side, line = m.group(1), float(m.group(2).replace(",", "."))
+    home_line = line if side == "1" else -line
+    return f"{kind}:{_fmt_line(home_line, signed=True)}", side
+
+
+def _legacy(mkt, sel):
+    """
+    Dawne heurystyki dla rynków spoza tabeli:
+      – handicap: raw_market zawiera "handicap" i raw_selection ma "(±X.Y)"
+      – over/under: raw_market zawiera "over"/"under"/"powyżej"/"poniżej"
+      – inne naturalne pary: raw_selection to dokładnie "tak"/"nie" lub "1"/"2".
+    """
+    if "handicap" in mkt:
+        return _handicap("handicap", sel)
+
+    if ("over" in mkt or "under" in mkt) or ("powyżej" in mkt or "poniżej" in mkt):
+        if sel.startswith(("over", "powyżej", "under", "poniżej")):
+            return _over_under("over_under", sel)
+        return None, None
+
+    if sel in ("tak", "nie") or sel in ("1", "2"):
+        return mkt, sel
+
+    return None, None
+
+
+@lru_cache(maxsize=4096)
+def team_sides(match_name: str):
+    """
+    Słownik selekcji-nazw → "1"/"x"/"2" dla meczu "Gospodarz - Gość"
+    (lower/strip, jak selekcje w match_to_entry). Fortuna podpisuje remis "Remis".
+    """
+    sides = {"remis": "x"}
+    home, away = (name.lower() for name in split_match_name(match_name or ""))
+    if home and away and home != away:
+        sides[home] = "1"
+        sides[away] = "2"
+    return sides
+
+
+def normalize_for_match(raw_market: str, raw_selection: str, match_name: str = ""):
+    """
+    normalize() z kontekstem meczu: w rynkach 1X2 / bez remisu selekcja równa nazwie
+    gospodarza lub gościa (STS "mecz": "norwegia"/"x"/"włochy", Fortuna
+    "SPOTKANIE BEZ REMISU": "Norwegia"/"Włochy") jest zamieniana na "1"/"2".
+    """
+    side = team_sides(match_name).get(raw_selection.lower().strip())
+    if side and market_kind(raw_market.lower().strip())[0] in SIDE_KINDS:
+        raw_selection = side
+    return normalize(raw_market, raw_selection)
+
+
+@lru_cache(maxsize=65536)
+def normalize(raw_market: str, raw_selection: str):
+    """
+    (surowy rynek, surowa selekcja) -> (kanoniczny submarket, kanoniczna selekcja)
+    albo (None, None). Wynik jest zapamiętywany (LRU) – te same kilka tysięcy par
+    powtarza się w każdym cyklu, więc parsowanie odbywa się raz na parę.
+    """
+    mkt = raw_market.lower().strip()
+    sel = raw_selection.lower().strip()
+
+    kind, param = market_kind(mkt)
+    if kind is None:
+        return _legacy(mkt, sel)
+
+    if kind in OVER_UNDER_KINDS:
+        return _over_under(kind, sel)
+    if kind in HANDICAP_KINDS:
+        return _handicap(kind, sel)
+    if kind in YES_NO_KINDS:
+        return (kind, sel) if sel in ("tak", "nie") else (None, None)
+    if kind in RESULT_KINDS:
+        return (kind, sel) if sel in ("1", "x", "2") else (None, None)
+    if kind in DNB_KINDS:
+        return (kind, sel) if sel in ("1", "2") else (None, None)
+    if kind in EXACT_GOALS_KINDS:
+        return kind, sel
+    if kind == "euro_handicap":
+        sel_key = sel.split()[0] if sel else ""
+        return (f"{kind}:{param}", sel_key) if sel_key in ("1", "x", "2") else (None, None)
+    return None, None
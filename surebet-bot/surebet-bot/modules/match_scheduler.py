@@ -0,0 +1,298 @@
+# modules/match_scheduler.py
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# Domyślne ustawienia – nadpisywane przez scraping.scheduler.<bukmacher> w config.yaml
+DEFAULT_SCHEDULER_SETTINGS = {
+    "enabled":           True,
+    "budget_per_hour":   600,     # max. stron meczów na godzinę (wszystkie ligi bukmachera, 0 = bez limitu)
+    "min_rescan":        60,      # najczęstsze odświeżanie (s) – mecz tuż przed startem / blisko surebetu
+    "max_rescan":        1800,    # najrzadsze odświeżanie (s) – mecz daleko w czasie, kursy stoją
+    "kickoff_horizon_h": 6,       # bliskość startu: 1.0 przy starcie, 0.5 tyle godzin wcześniej
+    "history":           10,      # ile ostatnich pobrań liczy się do zmienności kursów
+    "hot_rescan":        20,      # odświeżanie (s) meczu z listy obserwowanych (hot_poll)
+    "hot_max":           6,       # max. meczów z listy obserwowanych w jednym hot_poll
+    "weights":           {"kickoff": 0.4, "volatility": 0.3, "near": 0.3},
+}
+
+
+def scheduler_settings(config, bookmaker: str, defaults: dict = None) -> dict:
+    """
+    Scala ustawienia: DEFAULT_SCHEDULER_SETTINGS <- defaults scrapera <- scraping.scheduler.<bookmaker>
+    z config.yaml (ostatnie wygrywa).
+    """
+    settings = dict(DEFAULT_SCHEDULER_SETTINGS)
+    settings.update(defaults or {})
+    settings.update(config.get('scraping', 'scheduler', bookmaker, default={}) or {})
+    settings["weights"] = {**DEFAULT_SCHEDULER_SETTINGS["weights"], **(settings.get("weights") or {})}
+    return settings
+
+
+def _kickoff(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return None
+
+
+class NearBoard:
+    """
+    Wspólna (między wątkami workerów a pętlą bota) tablica meczów, które są
+    teraz surebetem albo są na liście obserwowanych silnika (blisko arbitrażu):
+    match_id -> najlepszy profit. Pisze silnik arbitrażu, czytają harmonogramy
+    scraperów – ID wydarzeń są wspólne dla bukmacherów.
+    Osobno: mecze, które feed live (Etoto) oznaczył jako trwające – harmonogramy
+    nie wyrzucają ich po starcie, żeby kursy STS/Fortuny z trwającego meczu dało się
+    zestawić z kursami live.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profits = {}
+        self._live = set()
+
+    def update(self, match_id: str, profit):
+        with self._lock:
+            if profit is None:
+                self._profits.pop(match_id, None)
+            else:
+                self._profits[match_id] = profit
+
+    def profit(self, match_id: str):
+        with self._lock:
+            return self._profits.get(match_id)
+
+    def set_live(self, match_id: str, live: bool):
+        with self._lock:
+            if live:
+                self._live.add(match_id)
+            else:
+                self._live.discard(match_id)
+
+    def is_live(self, match_id: str) -> bool:
+        with self._lock:
+            return match_id in self._live
+
+
+# Wspólna instancja dla scraperów i main_loop
+near_board = NearBoard()
+
+
+class MatchScheduler:
+    """
+    Kolejka priorytetowa meczów jednego bukmachera. Każdy mecz dostaje priorytet
+    0..1 z trzech składników (wagi w `weights`):
+      – bliskość startu (kickoff_horizon_h),
+      – zmienność kursów: odsetek ostatnich pobrań, w których kursy się zmieniły,
+      – czy mecz jest teraz surebetem albo blisko niego (near_board).
+    Priorytet wyznacza, jak często mecz jest odświeżany (między max_rescan a min_rescan),
+    a take() wydaje zaległe mecze od najważniejszych, w ramach godzinnego budżetu
+    stron (budget_per_hour) wspólnego dla wszystkich lig bukmachera.
+    take_hot() wydaje poza przebiegiem lig tylko mecze z near_board, co hot_rescan sekund.
+    Mecz po starcie wypada z kolejki, chyba że near_board oznacza go jako live – wtedy
+    jest odświeżany dalej (jak mecz blisko arbitrażu), także gdy zniknął z listy ligi.
+    """
+
+    def __init__(self, bookmaker, settings: dict, board=near_board, log=print):
+        self.bookmaker = bookmaker
+        self.enabled = bool(settings["enabled"])
+        self.budget = int(settings["budget_per_hour"])
+        self.min_rescan = float(settings["min_rescan"])
+        self.max_rescan = float(settings["max_rescan"])
+        self.horizon_h = float(settings["kickoff_horizon_h"])
+        self.history = int(settings["history"])
+        self.hot_rescan = float(settings["hot_rescan"])
+        self.hot_max = int(settings["hot_max"])
+        self.weights = dict(settings["weights"])
+        self.board = board
+        self.log = log
+
+        self._lock = threading.Lock()
+        self._entries = {}        # link -> stan meczu
+        self._started = {}        # link -> stan meczu usuniętego po starcie (nie wraca z listy ligi)
+        self._taken = deque()     # znaczniki czasu wydanych stron (okno godzinne)
+
+    # ————————————
+    # Stan meczów
+    # ————————————
+    def register(self, league_url: str, links):
+        """
+        Aktualna lista meczów ligi: nowe linki dochodzą do kolejki,
+        linki, których już nie ma na liście ligi, z niej wypadają.
+        Mecze, które już wystartowały, nie wracają, dopóki lista ligi (np. z ListingCache,
+        odświeżanej co kilkadziesiąt minut) wciąż je zawiera – chyba że są live (near_board).
+        Mecz live zostaje w kolejce, nawet gdy lista ligi już go nie pokazuje.
+        """
+        links = list(dict.fromkeys(links))
+        with self._lock:
+            listed = set(links)
+            for link, entry in list(self._started.items()):
+                if entry["league"] != league_url:
+                    continue
+                if self._is_live(entry):
+                    self._entries[link] = self._started.pop(link)
+                elif link not in listed:
+                    del self._started[link]
+            for link in links:
+                if link not in self._entries and link not in self._started:
+                    self._entries[link] = {
+                        "league":     league_url,
+                        "match_id":   None,
+                        "kickoff":    None,
+                        "last_fetch": None,
+                        "changes":    deque(maxlen=self.history),
+                    }
+            for link, entry in list(self._entries.items()):
+                if entry["league"] == league_url and link not in listed and not self._is_live(entry):
+                    del self._entries[link]
+
+    def record(self, link: str, match_id: str = None, kickoff=None, changed: bool = None):
+        """
+        Wynik pobrania meczu: ID, godzina startu i czy kursy się zmieniły (ChangeDetector).
+        """
+        with self._lock:
+            entry = self._entries.get(link)
+            if entry is None:
+                return
+            if match_id:
+                entry["match_id"] = match_id
+            kickoff = _kickoff(kickoff)
+            if kickoff is not None:
+                entry["kickoff"] = kickoff
+            if changed is not None:
+                entry["changes"].append(bool(changed))
+
+    def _is_live(self, entry) -> bool:
+        return bool(entry["match_id"]) and self.board.is_live(entry["match_id"])
+
+    # ————————————
+    # Priorytet
+    # ————————————
+    def priority(self, entry, now: datetime = None) -> float:
+        now = now or datetime.now()
+        w = self.weights
+
+        kick = 0.0
+        if entry["kickoff"] is not None:
+            hours = max(0.0, (entry["kickoff"] - now).total_seconds() / 3600)
+            kick = 1.0 / (1.0 + hours / self.horizon_h) if self.horizon_h > 0 else 0.0
+
+        changes = entry["changes"]
+        volatility = sum(changes) / len(changes) if changes else 0.0
+
+        near = 1.0 if entry["match_id"] and (
+            self.board.profit(entry["match_id"]) is not None or self.board.is_live(entry["match_id"])) else 0.0
+
+        total = w["kickoff"] + w["volatility"] + w["near"]
+        if total <= 0:
+            return 0.0
+        return (w["kickoff"] * kick + w["volatility"] * volatility + w["near"] * near) / total
+
+    def rescan_interval(self, priority: float) -> float:
+        return self.max_rescan - (self.max_rescan - self.min_rescan) * priority
+
+    def _budget_left(self, now: float):
+        while self._taken and now - self._taken[0] >= 3600:
+            self._taken.popleft()
+        if self.budget <= 0:
+            return None
+        return max(0, self.budget - len(self._taken))
+
+    def take(self, league_url: str):
+        """
+        Zaległe mecze ligi w kolejności priorytetu (nigdy nie pobrane – najpierw),
+        ograniczone pozostałym budżetem godzinnym. Wydane mecze od razu dostają
+        znacznik pobrania, więc kolejne wywołanie ich nie powtórzy.
+        """
+        with self._lock:
+            links = [link for link, e in self._entries.items() if e["league"] == league_url]
+            if not self.enabled:
+                return links
+
+            now_dt, now = datetime.now(), time.time()
+            ranked = []
+            for link in links:
+                entry = self._entries[link]
+                if entry["kickoff"] is not None and entry["kickoff"] <= now_dt and not self._is_live(entry):
+                    # mecz już trwa, a nikt nie podaje kursów live – strona przedmeczowa nie ma sensu
+                    self._started[link] = self._entries.pop(link)
+                    continue
+                prio = self.priority(entry, now_dt)
+                if entry["last_fetch"] is None:
+                    ranked.append((0, -prio, link))
+                    continue
+                overdue = (now - entry["last_fetch"]) / self.rescan_interval(prio)
+                if overdue >= 1.0:
+                    ranked.append((1, -prio * overdue, link))
+            ranked.sort()
+
+            left = self._budget_left(now)
+            chosen = [link for _, _, link in (ranked if left is None else ranked[:left])]
+            for link in chosen:
+                self._entries[link]["last_fetch"] = now
+                self._taken.append(now)
+            return chosen
+
+    def next_due(self):
+        """
+        Za ile sekund take() wyda kolejny mecz (0 – już są zaległe, albo None – kolejka
+        pusta). Przy wyczerpanym budżecie – nie wcześniej niż zwolni się miejsce w oknie godzinnym.
+        """
+        with self._lock:
+            if not self._entries:
+                return None
+            if not self.enabled:
+                return 0.0
+            now_dt, now = datetime.now(), time.time()
+            due = min(
+                0.0 if e["last_fetch"] is None
+                else max(0.0, e["last_fetch"] + self.rescan_interval(self.priority(e, now_dt)) - now)
+                for e in self._entries.values()
+            )
+            if self._budget_left(now) == 0:
+                due = max(due, self._taken[0] + 3600 - now)
+            return due
+
+    def take_hot(self):
+        """
+        Mecze z near_board (dowolnej ligi), nieodświeżane od hot_rescan sekund,
+        od najbliższych arbitrażu; maks. hot_max i w ramach budżetu godzinnego.
+        Zwraca listę (link, liga).
+        """
+        with self._lock:
+            if not self.enabled:
+                return []
+            now_dt, now = datetime.now(), time.time()
+            hot = []
+            for link, entry in self._entries.items():
+                profit = self.board.profit(entry["match_id"]) if entry["match_id"] else None
+                if profit is None:
+                    continue
+                if entry["kickoff"] is not None and entry["kickoff"] <= now_dt and not self._is_live(entry):
+                    continue
+                if entry["last_fetch"] is not None and now - entry["last_fetch"] < self.hot_rescan:
+                    continue
+                hot.append((profit, link, entry["league"]))
+            hot.sort(key=lambda h: h[0], reverse=True)
+
+            left = self._budget_left(now)
+            limit = self.hot_max if left is None else min(self.hot_max, left)
+            chosen = hot[:limit]
+            for _, link, _ in chosen:
+                self._entries[link]["last_fetch"] = now
+                self._taken.append(now)
+            return [(link, league) for _, link, league in chosen]
+
+    def summary(self, league_url: str, chosen: int) -> str:
+        with self._lock:
+            known = sum(1 for e in self._entries.values() if e["league"] == league_url)
+            left = self._budget_left(time.time())
+        budget = "bez limitu" if left is None else f"zostało {left}/{self.budget} na godzinę"
+        return f"HARMONOGRAM {self.bookmaker}: {chosen} z {known} meczów ligi do pobrania ({budget})"
@@ -0,0 +1,50 @@
+# modules/match_stream.py
+
+import asyncio
+
+
+class MatchStream:
+    """
+    Strumień meczów w pamięci: scrapery (z dowolnego wątku, np. workera) publikują
+    każdy sparsowany mecz, a pętla bota konsumuje je z asyncio.Queue.
+    Dopóki nikt nie podpiął konsumenta (bind), publish() nic nie robi –
+    scrapery uruchomione solo działają jak wcześniej (tylko CSV).
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._queue = None
+
+    def bind(self, maxsize=0):
+        """
+        Podpina strumień pod bieżącą pętlę zdarzeń (wywołać z pętli konsumenta).
+        """
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize)
+        return self._queue
+
+    def unbind(self):
+        self._loop = None
+        self._queue = None
+
+    def publish(self, bookmaker: str, match: dict) -> bool:
+        """
+        Wrzuca (bookmaker, mecz) do kolejki konsumenta. Bezpieczne wątkowo.
+        Zwraca False, gdy nikt nie słucha.
+        """
+        loop, queue = self._loop, self._queue
+        if loop is None or queue is None:
+            return False
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, (bookmaker, match))
+        except RuntimeError:
+            # pętla konsumenta została zamknięta
+            return False
+        return True
+
+    async def get(self):
+        return await self._queue.get()
+
+
+# Wspólna instancja dla scraperów i main_loop
+match_stream = MatchStream()
@@ -0,0 +1,149 @@
+# modules/odds_store.py
+
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from modules.arbitrage import match_to_entry
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS odds (
+    bookmaker   TEXT NOT NULL,
+    match_id    TEXT NOT NULL,
+    match_name  TEXT,
+    sport       TEXT,
+    competition TEXT,
+    datetime    TEXT,
+    market      TEXT,
+    selection   TEXT,
+    odds        REAL,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_odds_match    ON odds (bookmaker, match_id);
+CREATE INDEX IF NOT EXISTS idx_odds_datetime ON odds (datetime);
+CREATE INDEX IF NOT EXISTS idx_odds_updated  ON odds (bookmaker, updated_at);
+"""
+
+
+class OddsStore:
+    """
+    Kursy wszystkich bukmacherów w SQLite (tryb WAL) zamiast plików CSV.
+      – upsert_match(): podmiana wierszy jednego meczu w jednej transakcji
+        (DELETE po indeksie + INSERT), bez przepisywania całej bazy,
+      – expire(): wygaszanie meczów starszych niż TTL jednym DELETE,
+      – load(): odczyt w formacie load_csv(); dzięki WAL czytelnik nigdy nie widzi
+        meczu zapisanego w połowie, a zapis nie blokuje odczytów.
+    """
+
+    EXPIRE_EVERY = 60   # s – jak często upsert_match() odpala expire()
+
+    def __init__(self, path: str, ttl_hours: float = 24):
+        self.path = path
+        self.ttl = timedelta(hours=ttl_hours)
+        self._lock = threading.Lock()
+        self._last_expire = 0.0
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def upsert_match(self, bookmaker: str, match: dict):
+        """
+        Zapisuje mecz prosto ze scrapera (format jak dla match_to_entry),
+        podmieniając poprzednie wiersze tego meczu u tego bukmachera.
+        Zwraca liczbę zapisanych kursów.
+        """
+        mid = match.get("match_id")
+        if not mid:
+            return 0
+        entry = match_to_entry(match, bookmaker)
+        now = time.time()
+        rows = [
+            (bookmaker, mid, entry["match_name"], entry["sport"], entry["league"], entry["datetime"],
+             m["market"], m["selection"], m["odds"], now)
+            for m in entry["markets"]
+        ]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM odds WHERE bookmaker = ? AND match_id = ?", (bookmaker, mid))
+            self._conn.executemany(
+                "INSERT INTO odds (bookmaker, match_id, match_name, sport, competition, datetime,"
+                " market, selection, odds, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        if now - self._last_expire >= self.EXPIRE_EVERY:
+            self.expire()
+        return len(rows)
+
+    def expire(self):
+        """
+        Usuwa mecze rozpoczęte wcześniej niż TTL temu. Zwraca liczbę usuniętych wierszy.
+        """
+        threshold = (datetime.now() - self.ttl).strftime("%Y-%m-%dT%H:%M:%S")
+        with self._lock, self._conn:
+            cur = self._conn.execute("DELETE FROM odds WHERE datetime < ?", (threshold,))
+        self._last_expire = time.time()
+        return cur.rowcount
+
+    def load(self, bookmaker: str, since: float = None):
+        """
+        Zwraca {match_id: wpis} w formacie load_csv() dla bukmachera.
+        Z `since` (znacznik z last_update) – tylko mecze zapisane od tamtej chwili.
+        """
+        query = ("SELECT match_id, match_name, sport, competition, datetime, market, selection, odds, bookmaker"
+                 " FROM odds WHERE bookmaker = ?")
+        params = [bookmaker]
+        if since is not None:
+            query += " AND updated_at >= ?"
+            params.append(since)
+        query += " ORDER BY rowid"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        data = {}
+        for mid, name, sport, comp, dt_str, market, selection, odds, book in rows:
+            if mid not in data:
+                data[mid] = {
+                    "match_name": name or "",
+                    "datetime":   dt_str or "",
+                    "sport":      sport or "",
+                    "league":     comp or "",
+                    "markets":    []
+                }
+            data[mid]["markets"].append({
+                "market":    market,
+                "selection": selection,
+                "odds":      odds,
+                "bookmaker": book
+            })
+        return data
+
+    def last_update(self, bookmaker: str):
+        """
+        Znacznik czasu ostatniego zapisu bukmachera (do load(since=...)) albo None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(updated_at) FROM odds WHERE bookmaker = ?", (bookmaker,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def import_entries(self, bookmaker: str, data: dict):
+        """
+        Jednorazowy import {match_id: wpis} w formacie load_csv() (np. ze starych CSV).
+        """
+        for mid, entry in data.items():
+            self.upsert_match(bookmaker, {
+                "match_id":    mid,
+                "match_name":  entry.get("match_name"),
+                "sport":       entry.get("sport"),
+                "competition": entry.get("league"),
+                "datetime":    entry.get("datetime"),
+                "markets":     [{"market": m["market"], "selection": m["selection"], "odds": m["odds"]}
+                                for m in entry.get("markets", [])],
+            })
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
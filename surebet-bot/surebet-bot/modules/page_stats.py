@@ -0,0 +1,60 @@
+# modules/page_stats.py
+
+import threading
+from collections import deque
+
+from modules.stats_helpers import percentile
+
+
+class PageStats:
+    """
+    Ile naprawdę trwa strona meczu – per liga: liczba stron, mediana/p95/max
+    czasu całej strony i samego doładowania rynków, liczba stron, na których
+    nie wszystkie grupy zdążyły się wczytać. Trzyma `window` ostatnich próbek.
+    """
+
+    def __init__(self, window=200):
+        self.window = window
+        self._lock = threading.Lock()
+        self._leagues = {}
+
+    def record(self, league, page_seconds: float, load_ms: float = None, incomplete: bool = False):
+        key = league or "?"
+        with self._lock:
+            st = self._leagues.get(key)
+            if st is None:
+                st = self._leagues[key] = {
+                    "pages": 0, "incomplete": 0,
+                    "page_s": deque(maxlen=self.window), "load_ms": deque(maxlen=self.window),
+                }
+            st["pages"] += 1
+            st["incomplete"] += int(bool(incomplete))
+            st["page_s"].append(page_seconds)
+            if load_ms is not None:
+                st["load_ms"].append(load_ms)
+
+    def summary(self, league):
+        with self._lock:
+            st = self._leagues.get(league or "?")
+            if st is None:
+                return None
+            page_s, load_ms = list(st["page_s"]), list(st["load_ms"])
+            return {
+                "pages":       st["pages"],
+                "incomplete":  st["incomplete"],
+                "page_p50_s":  percentile(page_s, 50),
+                "page_p95_s":  percentile(page_s, 95),
+                "page_max_s":  max(page_s, default=0.0),
+                "load_p50_ms": percentile(load_ms, 50),
+                "load_p95_ms": percentile(load_ms, 95),
+            }
+
+    def format(self, league) -> str:
+        s = self.summary(league)
+        if s is None:
+            return f"{league}: brak danych"
+        line = (f"{league}: stron {s['pages']} (niepełnych {s['incomplete']}) | strona p50 {s['page_p50_s']:.1f} s, "
+                f"p95 {s['page_p95_s']:.1f} s, max {s['page_max_s']:.1f} s | doładowanie rynków ")
+        if s["load_p50_ms"] is None:
+            return line + "brak danych"
+        return line + f"p50 {s['load_p50_ms']:.0f} ms, p95 {s['load_p95_ms']:.0f} ms"
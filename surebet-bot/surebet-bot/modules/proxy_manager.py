@@ -1,7 +1,37 @@
 # modules/proxy_manager.py
 
 import random
+import threading
+import time
+from collections import deque
+
 from modules.config_manager import ConfigManager
+from modules.stats_helpers import percentile
+
+# Domyślne ustawienia – nadpisywane przez scraping.proxy_health w config.yaml
+DEFAULT_PROXY_HEALTH = {
+    "window":          50,      # ile ostatnich żądań proxy liczy się do statystyk
+    "min_samples":     5,       # poniżej tylu żądań proxy jest „nowe” i dostaje pierwszeństwo
+    "min_success":     0.6,     # proxy z mniejszym odsetkiem sukcesów nie jest wydawane (gdy są lepsze)
+    "fail_threshold":  3,       # tyle błędów z rzędu = kwarantanna
+    "ban_statuses":    [403, 407, 429],   # takie odpowiedzi = od razu kwarantanna
+    "quarantine":      60,      # pierwsza kwarantanna (s); każda kolejna bez sukcesu po drodze – x2
+    "quarantine_max":  3600,
+    "top_k":           2,       # losujemy spośród tylu najszybszych zdrowych proxy
+    "sticky_ttl":      900,     # jak długo sesja trzyma to samo proxy + UA (s)
+}
+
+
+def proxy_server_from_kwargs(kwargs: dict):
+    """
+    Wyciąga adres serwera proxy z kwargs zwracanych przez ProxyManager.get_request_kwargs()
+    (słownik {'http': p, 'https': p} albo pojedynczy string). Zwraca None, gdy proxy brak.
+    """
+    proxy = kwargs.get("proxies")
+    if not proxy:
+        return None
+    return proxy if isinstance(proxy, str) else next(iter(proxy.values()), None)
+
 
 class ProxyManager:
     DEFAULT_POLISH_USER_AGENTS = [
@@ -18,24 +48,147 @@ class ProxyManager:
         # wczytaj listę z configu lub pustą
         self.proxies = self.config.get('scraping', 'proxies', default=[])
         self.user_agents = self.config.get('scraping', 'user_agents', default=[])
+        self.health = {**DEFAULT_PROXY_HEALTH, **(self.config.get('scraping', 'proxy_health', default={}) or {})}
+
+        self._lock = threading.Lock()
+        self._stats = {}       # proxy -> statystyki (patrz _stat)
+        self._sessions = {}    # klucz sesji -> (proxy, ua, znacznik czasu utworzenia)
 
-    def get_request_kwargs(self) -> dict:
+    # ————————————
+    # Statystyki i kwarantanna
+    # ————————————
+    def _stat(self, proxy):
+        st = self._stats.get(proxy)
+        if st is None:
+            window = int(self.health["window"])
+            st = self._stats[proxy] = {
+                "results":      deque(maxlen=window),   # True/False per żądanie
+                "latency":      deque(maxlen=window),   # sekundy, tylko udane żądania
+                "fails_in_row": 0,
+                "quarantines":  0,                      # kolejne kwarantanny bez sukcesu po drodze
+                "until":        0.0,                    # koniec kwarantanny (time.time())
+            }
+        return st
+
+    def _quarantined(self, proxy, now):
+        return self._stat(proxy)["until"] > now
+
+    def report(self, proxy, ok: bool, latency: float = None, status: int = None):
         """
-        Zwraca kwargs do requests.get:
-          - zawsze losowy User-Agent (polski domyślnie, lub z configu)
-          - proxy tylko gdy lista nie jest pusta
+        Wynik żądania przez `proxy` (adres z kwargs): sukces i czas odpowiedzi albo błąd.
+        Błędy z rzędu (fail_threshold) albo status z ban_statuses wysyłają proxy na
+        kwarantannę – każda kolejna bez udanego żądania po drodze jest dwa razy dłuższa.
+        Zwraca długość nałożonej kwarantanny (s) albo None.
+        """
+        if not proxy:
+            return None
+        with self._lock:
+            st = self._stat(proxy)
+            st["results"].append(bool(ok))
+            if ok:
+                st["fails_in_row"] = 0
+                st["quarantines"] = 0
+                if latency is not None:
+                    st["latency"].append(latency)
+                return None
+
+            st["fails_in_row"] += 1
+            banned = status is not None and status in self.health["ban_statuses"]
+            if not banned and st["fails_in_row"] < int(self.health["fail_threshold"]):
+                return None
+            st["quarantines"] += 1
+            st["fails_in_row"] = 0
+            period = min(float(self.health["quarantine_max"]),
+                         float(self.health["quarantine"]) * 2 ** (st["quarantines"] - 1))
+            st["until"] = time.time() + period
+            # sesje na tym proxy muszą dostać nowe
+            for key in [k for k, s in self._sessions.items() if s[0] == proxy]:
+                del self._sessions[key]
+            return period
+
+    def stats(self, proxy):
         """
+        {"requests", "success_rate", "p50", "p95", "quarantined_for"} dla proxy (czasy w s).
+        """
+        with self._lock:
+            st = self._stat(proxy)
+            results, latency = list(st["results"]), list(st["latency"])
+            return {
+                "requests":        len(results),
+                "success_rate":    sum(results) / len(results) if results else None,
+                "p50":             percentile(latency, 50),
+                "p95":             percentile(latency, 95),
+                "quarantined_for": max(0.0, st["until"] - time.time()),
+            }
+
+    def format_stats(self) -> str:
+        """
+        Jedna linia na proxy: liczba żądań, odsetek sukcesów, p50/p95 czasu odpowiedzi, kwarantanna.
+        """
+        lines = []
+        for proxy in self.proxies:
+            s = self.stats(proxy)
+            if not s["requests"]:
+                continue
+            line = f"PROXY {proxy}: żądań {s['requests']}, sukces {s['success_rate'] * 100:.0f}%"
+            if s["p50"] is not None:
+                line += f", p50 {s['p50'] * 1000:.0f} ms, p95 {s['p95'] * 1000:.0f} ms"
+            if s["quarantined_for"]:
+                line += f", kwarantanna jeszcze {s['quarantined_for']:.0f}s"
+            lines.append(line)
+        return "\n".join(lines)
+
+    # ————————————
+    # Wybór proxy
+    # ————————————
+    def _pick_proxy(self, now):
+        healthy = [p for p in self.proxies if not self._quarantined(p, now)]
+        if not healthy:
+            # wszystkie na kwarantannie – to, które wychodzi z niej najwcześniej
+            return min(self.proxies, key=lambda p: self._stat(p)["until"])
+
+        fresh = [p for p in healthy if len(self._stat(p)["results"]) < int(self.health["min_samples"])]
+        if fresh:
+            return random.choice(fresh)
+
+        def success(p):
+            results = self._stat(p)["results"]
+            return sum(results) / len(results)
+
+        good = [p for p in healthy if success(p) >= float(self.health["min_success"])] or healthy
+        good.sort(key=lambda p: (percentile(self._stat(p)["latency"], 50) or float("inf"), -success(p)))
+        return random.choice(good[:max(1, int(self.health["top_k"]))])
+
+    def _pick_ua(self):
         # Wybieraj z configu, a jeśli pusta – z domyślnej listy polskich UA
         if self.user_agents:
-            ua = random.choice(self.user_agents)
-        else:
-            ua = random.choice(self.DEFAULT_POLISH_USER_AGENTS)
+            return random.choice(self.user_agents)
+        return random.choice(self.DEFAULT_POLISH_USER_AGENTS)
 
-        headers = {'User-Agent': ua}
+    def get_request_kwargs(self, session: str = None) -> dict:
+        """
+        Zwraca kwargs do requests.get:
+          - User-Agent (polski domyślnie, lub z configu)
+          - proxy tylko gdy lista nie jest pusta – najszybsze zdrowe (spośród top_k),
+            proxy na kwarantannie pomijane
+        Z kluczem `session` (np. "sts:0") ta sama para proxy + UA wraca przez sticky_ttl
+        sekund, dopóki proxy nie trafi na kwarantannę – przeglądarka i requests mogą
+        używać tych samych połączeń i ciasteczek.
+        """
+        now = time.time()
+        with self._lock:
+            sticky = self._sessions.get(session) if session else None
+            if sticky and now - sticky[2] < float(self.health["sticky_ttl"]) and not (
+                    sticky[0] and self._quarantined(sticky[0], now)):
+                proxy, ua = sticky[0], sticky[1]
+            else:
+                proxy = self._pick_proxy(now) if self.proxies else None
+                ua = self._pick_ua()
+                if session:
+                    self._sessions[session] = (proxy, ua, now)
 
-        kwargs = {'headers': headers}
-        if self.proxies:
-            p = random.choice(self.proxies)
-            kwargs['proxies'] = {'http': p, 'https': p}
+        kwargs = {'headers': {'User-Agent': ua}}
+        if proxy:
+            kwargs['proxies'] = {'http': proxy, 'https': proxy}
 
         return kwargs
@@ -0,0 +1,177 @@
+# modules/rate_limiter.py
+
+import asyncio
+import random
+import threading
+import time
+
+# Domyślne limity – nadpisywane przez scraping.rate_limits w config.yaml
+DEFAULT_RATE_LIMITS = {
+    "default":   {"rate": 0.2, "burst": 2},    # domena spoza `domains`: żądań/s, zapas żądań
+    "domains":   {},                           # host -> {"rate", "burst"}
+    "per_proxy": {"rate": 0.5, "burst": 3},    # każde proxy osobno (wspólne dla wszystkich bukmacherów)
+    "jitter":    1.0,                          # losowy dodatek (s) do każdego czekania
+    "backoff": {
+        "statuses":     [403, 429, 503],       # odpowiedzi, po których zwalniamy
+        "factor":       0.5,                   # tempo * factor po każdym sygnale
+        "min_rate":     0.01,
+        "recover_step": 0.05,                  # po udanym żądaniu tempo += recover_step * tempo bazowe
+        "cooldown":     30,                    # pierwsza przerwa (s); kolejne sygnały z rzędu – x2
+        "max_cooldown": 900,
+    },
+}
+
+
+def rate_limit_settings(config) -> dict:
+    """
+    Scala DEFAULT_RATE_LIMITS ze scraping.rate_limits z config.yaml (sekcja backoff – kluczami).
+    """
+    custom = config.get('scraping', 'rate_limits', default={}) or {}
+    settings = {**DEFAULT_RATE_LIMITS, **custom}
+    settings["backoff"] = {**DEFAULT_RATE_LIMITS["backoff"], **(custom.get("backoff") or {})}
+    return settings
+
+
+def is_backoff_signal(status=None, error=None, statuses=(403, 429, 503)) -> bool:
+    """
+    Czy wynik żądania oznacza, że strona lub proxy nas dławi: status z `statuses`
+    (także w HTTPError z requests) albo timeout.
+    """
+    if status is None and error is not None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status in statuses
+    return error is not None and "timeout" in type(error).__name__.lower()
+
+
+class TokenBucket:
+    """
+    Kubełek żetonów: `rate` żądań na sekundę, do `burst` żądań od razu.
+    reserve() pobiera żeton „na kredyt” i zwraca, ile trzeba odczekać –
+    bez blokowania, więc jeden kubełek może być wspólny dla kilku wątków/pętli.
+    penalize() zwalnia tempo i wymusza przerwę (dłuższą przy sygnałach z rzędu),
+    reward() stopniowo wraca do tempa bazowego.
+    """
+
+    def __init__(self, rate: float, burst: float, backoff: dict):
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.backoff = backoff
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.strikes = 0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def penalize(self) -> float:
+        """
+        Zwalnia tempo i blokuje kubełek na czas przerwy. Zwraca długość przerwy (s).
+        """
+        b = self.backoff
+        with self._lock:
+            self.strikes += 1
+            self.rate = max(float(b["min_rate"]), self.rate * float(b["factor"]))
+            cooldown = min(float(b["max_cooldown"]), float(b["cooldown"]) * 2 ** (self.strikes - 1))
+            self.blocked_until = max(self.blocked_until, time.monotonic() + cooldown)
+            self.tokens = min(self.tokens, 0.0)
+            return cooldown
+
+    def reward(self):
+        with self._lock:
+            self.strikes = 0
+            if self.rate < self.base_rate:
+                self.rate = min(self.base_rate, self.rate + self.base_rate * float(self.backoff["recover_step"]))
+
+
+class RateLimiter:
+    """
+    Limity żądań per domena bukmachera i per proxy (kubełki żetonów).
+    acquire() czeka na żeton w obu kubełkach naraz, report() przekazuje wynik
+    żądania: 403/429/503 i timeouty zwalniają domenę i proxy, inne błędy
+    połączenia – tylko proxy, udane odpowiedzi przywracają tempo.
+    Bezpieczny wątkowo – ta sama instancja obsługuje workery STS i Fortuny.
+    """
+
+    def __init__(self, settings: dict):
+        self.settings = settings
+        self.jitter = float(settings.get("jitter", 0))
+        self._lock = threading.Lock()
+        self._domains = {}
+        self._proxies = {}
+
+    def _bucket(self, store, key, limits):
+        with self._lock:
+            bucket = store.get(key)
+            if bucket is None:
+                bucket = store[key] = TokenBucket(limits["rate"], limits["burst"], self.settings["backoff"])
+            return bucket
+
+    def domain_bucket(self, domain: str):
+        limits = (self.settings.get("domains") or {}).get(domain) or self.settings["default"]
+        return self._bucket(self._domains, domain, limits)
+
+    def proxy_bucket(self, proxy):
+        if not proxy:
+            return None
+        return self._bucket(self._proxies, proxy, self.settings["per_proxy"])
+
+    async def acquire(self, domain: str, proxy=None):
+        """
+        Czeka, aż żądanie do `domain` przez `proxy` (None – bez proxy) zmieści się w limitach.
+        """
+        buckets = [b for b in (self.domain_bucket(domain), self.proxy_bucket(proxy)) if b is not None]
+        wait = max(b.reserve() for b in buckets)
+        if wait > 0 or self.jitter:
+            await asyncio.sleep(wait + random.uniform(0, self.jitter))
+        return wait
+
+    def report(self, domain: str, proxy=None, status: int = None, error: BaseException = None):
+        """
+        Wynik żądania (status HTTP albo wyjątek) – dostosowuje tempo kubełków.
+        Zwraca długość wymuszonej przerwy domeny (s), gdy trzeba było zwolnić, inaczej None.
+        """
+        if status is None and error is not None:
+            # HTTPError z requests niesie odpowiedź – liczy się jej status, nie sam wyjątek
+            status = getattr(getattr(error, "response", None), "status_code", None)
+            if status is not None:
+                error = None
+        domain_bucket, proxy_bucket = self.domain_bucket(domain), self.proxy_bucket(proxy)
+        if is_backoff_signal(status, error, self.settings["backoff"]["statuses"]):
+            pause = domain_bucket.penalize()
+            if proxy_bucket is not None:
+                proxy_bucket.penalize()
+            return pause
+        if error is not None:
+            if proxy_bucket is not None:
+                proxy_bucket.penalize()
+        elif status is not None and status < 400:
+            domain_bucket.reward()
+            if proxy_bucket is not None:
+                proxy_bucket.reward()
+        return None
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def rate_limiter_from_config(config):
+    """
+    Wspólny dla całego procesu RateLimiter (scraping.rate_limits z config.yaml) –
+    kubełki proxy muszą być te same dla wszystkich scraperów.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = RateLimiter(rate_limit_settings(config))
+        return _shared
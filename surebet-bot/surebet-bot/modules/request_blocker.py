@@ -0,0 +1,73 @@
+# modules/request_blocker.py
+
+from urllib.parse import urlsplit
+
+
+DEFAULT_BLOCKING = {
+    "enabled":        True,
+    "resource_types": ["image", "media", "font"],
+    "domains": [
+        "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+        "facebook.net", "facebook.com", "hotjar.com", "criteo.com", "adnxs.com", "taboola.com",
+    ],
+    # szacunkowy rozmiar zablokowanej odpowiedzi (B) – przerwane żądanie nie ma Content-Length
+    "estimate_bytes": {"image": 40000, "media": 400000, "font": 35000, "script": 60000, "other": 10000},
+}
+
+
+def blocking_settings(config):
+    """
+    Ustawienia blokowania żądań: DEFAULT_BLOCKING <- scraping.request_blocking z config.yaml.
+    """
+    settings = dict(DEFAULT_BLOCKING)
+    settings.update(config.get('scraping', 'request_blocking', default={}) or {})
+    return settings
+
+
+class RequestBlocker:
+    """
+    Routing żądań kontekstu przeglądarki: przerywa obrazki, media, fonty oraz
+    wszystko z domen analityki/reklam, resztę przepuszcza. Liczy zablokowane
+    żądania i szacowane bajty – łącznie i per karta. Bajty to SZACUNEK
+    (liczba zablokowanych żądań × estimate_bytes typu zasobu): przerwane żądanie
+    nie ma odpowiedzi, więc nie ma czego zmierzyć.
+    """
+
+    def __init__(self, settings: dict):
+        self.types = set(settings.get("resource_types") or [])
+        self.domains = tuple(d.lower().lstrip(".") for d in settings.get("domains") or [])
+        self.estimate = settings.get("estimate_bytes") or {}
+        self.total = {"requests": 0, "est_bytes": 0}
+        self._per_page = {}    # id(page) -> {"requests", "est_bytes"}
+
+    def _blocked_domain(self, url: str) -> bool:
+        host = (urlsplit(url).hostname or "").lower()
+        return any(host == d or host.endswith("." + d) for d in self.domains)
+
+    async def handle(self, route):
+        request = route.request
+        rtype = request.resource_type
+        try:
+            if rtype not in self.types and not self._blocked_domain(request.url):
+                await route.continue_()
+                return
+            await route.abort()
+        except Exception:
+            # karta zamknięta w trakcie żądania
+            return
+        saved = int(self.estimate.get(rtype, self.estimate.get("other", 0)))
+        self.total["requests"] += 1
+        self.total["est_bytes"] += saved
+        try:
+            stats = self._per_page.get(id(request.frame.page))
+        except Exception:
+            stats = None   # np. żądanie service workera – bez karty
+        if stats is not None:
+            stats["requests"] += 1
+            stats["est_bytes"] += saved
+
+    def track(self, page):
+        self._per_page[id(page)] = {"requests": 0, "est_bytes": 0}
+
+    def release(self, page):
+        return self._per_page.pop(id(page), {"requests": 0, "est_bytes": 0})
@@ -0,0 +1,89 @@
+# modules/response_capture.py
+
+import asyncio
+import json
+
+
+class ResponseCapture:
+    """
+    Podsłuch odpowiedzi sieciowych karty Playwrighta (page.on("response")).
+    Zbiera surowe treści odpowiedzi JSON z XHR/fetch, których URL zawiera
+    któryś z `url_patterns` – czyli dane, które SPA i tak pobiera, zanim
+    cokolwiek wyrenderuje. Treści można porównać z poprzednim przebiegiem
+    (ChangeDetector), zanim zostaną zdekodowane. Podpiąć PRZED page.goto().
+    """
+
+    def __init__(self, page, url_patterns, log=print):
+        self.page = page
+        self.url_patterns = list(url_patterns)
+        self.log = log
+        self.urls = []
+        self._tasks = []
+        self._last_seen = None
+        page.on("response", self._on_response)
+
+    def _on_response(self, response):
+        try:
+            if response.request.resource_type not in ("xhr", "fetch"):
+                return
+            if "json" not in response.headers.get("content-type", ""):
+                return
+            if not any(p in response.url for p in self.url_patterns):
+                return
+        except Exception:
+            return
+        self.urls.append(response.url)
+        self._last_seen = asyncio.get_running_loop().time()
+        self._tasks.append(asyncio.ensure_future(response.body()))
+
+    async def bodies(self, timeout_ms=8000, idle_ms=600):
+        """
+        Czeka, aż przez `idle_ms` nie przyjdzie żadna nowa pasująca odpowiedź
+        (maks. `timeout_ms`), i zwraca listę surowych treści (bytes).
+        Wywoływać po page.goto() – liczy ciszę od ostatniej odpowiedzi albo od wywołania.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + timeout_ms / 1000
+        while loop.time() < deadline:
+            # brak jakiejkolwiek odpowiedzi też kończy czekanie po idle_ms (strona już załadowana)
+            if loop.time() - (self._last_seen or started) >= idle_ms / 1000:
+                break
+            await asyncio.sleep(0.1)
+
+        results = await asyncio.gather(*self._tasks, return_exceptions=True)
+        bodies = [r for r in results if not isinstance(r, BaseException)]
+        failed = len(results) - len(bodies)
+        if failed:
+            self.log(f"RESPONSE_CAPTURE WARN: {failed} odpowiedzi bez treści")
+        return bodies
+
+    def decode(self, bodies):
+        """
+        Dekoduje treści z bodies() – zwraca listę JSON-ów (niepoprawne pomija).
+        """
+        payloads = []
+        for body in bodies:
+            try:
+                payloads.append(json.loads(body))
+            except ValueError:
+                continue
+        failed = len(bodies) - len(payloads)
+        if failed:
+            self.log(f"RESPONSE_CAPTURE WARN: {failed} odpowiedzi bez poprawnego JSON-a")
+        return payloads
+
+    async def payloads(self, timeout_ms=8000, idle_ms=600):
+        """
+        bodies() + decode(): lista zdekodowanych JSON-ów.
+        """
+        return self.decode(await self.bodies(timeout_ms, idle_ms))
+
+    def close(self):
+        try:
+            self.page.remove_listener("response", self._on_response)
+        except Exception:
+            pass
+        for task in self._tasks:
+            if not task.done():
+                task.cancel()
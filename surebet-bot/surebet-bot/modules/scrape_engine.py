@@ -0,0 +1,167 @@
+# modules/scrape_engine.py
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from modules.proxy_manager import proxy_server_from_kwargs
+from modules.rate_limiter import is_backoff_signal
+
+# Domyślne limity – nadpisywane przez scraping.engine.<bukmacher> w config.yaml
+# (tempo żądań: scraping.rate_limits, patrz modules/rate_limiter.py)
+DEFAULT_ENGINE_SETTINGS = {
+    "concurrency":  2,      # ile stron meczów bukmachera naraz
+    "per_proxy":    1,      # ile stron naraz przez jedno proxy
+}
+
+
+def engine_settings(config, bookmaker: str, defaults: dict = None) -> dict:
+    """
+    Scala limity: DEFAULT_ENGINE_SETTINGS <- defaults scrapera <- scraping.engine.<bookmaker>
+    z config.yaml (ostatnie wygrywa).
+    """
+    settings = dict(DEFAULT_ENGINE_SETTINGS)
+    settings.update(defaults or {})
+    settings.update(config.get('scraping', 'engine', bookmaker, default={}) or {})
+    return settings
+
+
+class ScrapeEngine:
+    """
+    Asynchroniczny silnik scrapujący jednego bukmachera.
+    Harmonogram pilnuje trzech budżetów jednocześnie:
+      – max. liczby równoległych stron bukmachera (concurrency) – każde z tych
+        miejsc to osobna sesja ProxyManagera (stałe proxy + UA, te same ciasteczka),
+      – max. liczby równoległych stron przez jedno proxy (per_proxy),
+      – tempa żądań do domeny bukmachera i przez dane proxy (RateLimiter,
+        kubełki żetonów zwalniające po 403/429/503 i timeoutach).
+    Czekanie odbywa się przez asyncio.sleep w harmonogramie, a nie time.sleep
+    w pętli scrapera, więc inne strony w tym czasie dalej się ładują.
+    """
+
+    def __init__(self, bookmaker, browser_pool, proxy_manager, settings: dict, limiter, domain: str, log=print):
+        self.bookmaker = bookmaker
+        self.browser_pool = browser_pool
+        self.proxy_manager = proxy_manager
+        self.concurrency = max(1, int(settings["concurrency"]))
+        self.per_proxy = max(1, int(settings["per_proxy"]))
+        self.limiter = limiter
+        self.domain = domain
+        self.log = log
+
+        self._loop = None
+        self._lanes = None
+        self._proxy_semaphores = {}
+
+    def _ensure_primitives(self):
+        # prymitywy asyncio tworzymy w działającej pętli zdarzeń (i od nowa po asyncio.run())
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            # wolne „pasy” (sesje) – ich liczba to limit równoległości bukmachera
+            self._lanes = asyncio.Queue()
+            for lane in range(self.concurrency):
+                self._lanes.put_nowait(lane)
+            self._proxy_semaphores = {}
+
+    def report(self, kwargs: dict, status: int = None, error: BaseException = None, latency: float = None):
+        """
+        Wynik żądania wykonanego z kwargs ze slot() (status HTTP albo wyjątek, czas
+        odpowiedzi w s) – RateLimiter dostosowuje tempo domeny i proxy, a ProxyManager
+        liczy zdrowie proxy (sukcesy, opóźnienia, kwarantanna).
+        """
+        if status is None and error is not None:
+            # HTTPError z requests niesie odpowiedź – liczy się jej status
+            status = getattr(getattr(error, "response", None), "status_code", None)
+            if status is not None:
+                error = None
+        server = proxy_server_from_kwargs(kwargs)
+
+        pause = self.limiter.report(self.domain, server, status, error)
+        if pause is not None:
+            reason = status if status is not None else type(error).__name__
+            self.log(f"RATE_LIMIT: {self.bookmaker} ({reason}) – zwalniam, przerwa {pause:.0f}s")
+
+        if server and (status is not None or error is not None):
+            ok = error is None and status < 500 and status not in self.proxy_manager.health["ban_statuses"]
+            quarantine = self.proxy_manager.report(server, ok, latency if ok else None, status)
+            if quarantine is not None:
+                self.log(f"PROXY: {server} na kwarantannie {quarantine:.0f}s ({self.bookmaker})")
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Czeka na wolne miejsce w budżetach i zwraca kwargs (proxy + UA),
+        które mają zostać użyte dla tego żądania. Timeout w środku bloku
+        trafia do report() (i dalej leci w górę).
+        """
+        self._ensure_primitives()
+        lane = await self._lanes.get()
+        try:
+            kwargs = self.proxy_manager.get_request_kwargs(session=f"{self.bookmaker}:{lane}")
+            server = proxy_server_from_kwargs(kwargs)
+            proxy_sem = self._proxy_semaphores.get(server)
+            if proxy_sem is None:
+                proxy_sem = self._proxy_semaphores[server] = asyncio.Semaphore(self.per_proxy)
+            async with proxy_sem:
+                await self.limiter.acquire(self.domain, server)
+                try:
+                    yield kwargs
+                except Exception as e:
+                    if is_backoff_signal(error=e):
+                        self.report(kwargs, error=e)
+                    raise
+        finally:
+            self._lanes.put_nowait(lane)
+
+    @asynccontextmanager
+    async def page(self):
+        """
+        Karta przeglądarki z puli, otwarta dopiero po przejściu przez harmonogram.
+        Status i czas odpowiedzi głównego dokumentu każdej nawigacji (albo jej błąd
+        sieciowy) trafia do report().
+        """
+        async with self.slot() as kwargs:
+            async with self.browser_pool.page(kwargs) as page:
+                started = {}
+
+                def _on_request(request):
+                    if request.is_navigation_request():
+                        started[request] = time.monotonic()
+
+                def _on_response(response):
+                    request = response.request
+                    sent = started.pop(request, None)
+                    if request.is_navigation_request() and request.frame == page.main_frame:
+                        latency = time.monotonic() - sent if sent is not None else None
+                        self.report(kwargs, status=response.status, latency=latency)
+
+                def _on_request_failed(request):
+                    started.pop(request, None)
+                    failure = request.failure or ""
+                    if not request.is_navigation_request() or "ERR_ABORTED" in failure:
+                        return
+                    error_cls = TimeoutError if "TIMED_OUT" in failure else ConnectionError
+                    self.report(kwargs, error=error_cls(failure))
+
+                page.on("request", _on_request)
+                page.on("response", _on_response)
+                page.on("requestfailed", _on_request_failed)
+                yield page
+
+    async def map(self, coro_fn, items):
+        """
+        Uruchamia coro_fn(item) dla wszystkich elementów równolegle (w ramach limitów,
+        które coro_fn egzekwuje przez self.page()/self.slot()). Zwraca wyniki w kolejności
+        wejścia; wyjątek pojedynczego elementu jest logowany i zamieniany na None.
+        """
+        async def _safe(item):
+            try:
+                return await coro_fn(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.log(f"ENGINE ERROR ({self.bookmaker}): {item}: {e}")
+                return None
+
+        return await asyncio.gather(*(_safe(item) for item in items))
@@ -1,34 +1,42 @@
-import requests
-from bs4 import BeautifulSoup
-import random
+import asyncio
 import time
-from datetime import datetime, timedelta
+import requests
+from datetime import datetime
 import sys
 import os
-import csv
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
 # Upewnij się, że ścieżka do modułów jest poprawna:
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from modules.config_manager import ConfigManager
 from modules.proxy_manager import ProxyManager
+from modules.browser_pool import BrowserPool
+from modules.request_blocker import blocking_settings
+from modules.scrape_engine import ScrapeEngine, engine_settings
+from modules.rate_limiter import rate_limiter_from_config
+from modules.http_client import HttpClient, http_settings
+from modules.listing_cache import listing_cache_from_config
+from modules.match_stream import match_stream
+from modules.odds_store import OddsStore
+from modules.event_index import event_index_from_config
+from modules.fortuna_feed import FortunaFeed, feed_settings
+from modules.fortuna_html import parse_event_links, parse_match_header
+from modules.bot_log import bot_log_from_config
+from modules.dom_extract import extract_fortuna_markets
+from modules.change_detector import change_detector_from_config
+from modules.match_scheduler import MatchScheduler, scheduler_settings, near_board
 
 # ———————————— 
 # DODANE IMPORTY do obliczania surebetów i wysyłki Discord
 # ————————————
-from modules.arbitrage import load_csv, compute_surebets, format_for_discord
+from modules.arbitrage import match_to_entry, format_for_discord
+from modules.arbitrage_engine import ArbitrageEngine
 
 # ———————————— 
 # Stałe konfiguracyjne 
 # ————————————
-SCAN_LIMIT_BEFORE_PAUSE = 12
-PAUSE_TIME_RANGE       = (600, 900)   # 10–15 minut
-SLEEP_BETWEEN_REQUESTS = (20, 40)     # 12–25 s między meczami
-MATCH_SKIP_TIME        = 2700         # 45 minut
-
 BASE_URL       = "https://www.efortuna.pl"
 LOG_FILE       = "bot_log_fortu.txt"
-OUT_CSV_FILE   = "fortuna_data.csv"
 
 LEAGUES_TO_SCAN = [
     #"https://www.efortuna.pl/zaklady-bukmacherskie/pilka-nozna/1-brazylia",
@@ -39,7 +47,7 @@ LEAGUES_TO_SCAN = [
 
 config         = ConfigManager("config.yaml")
 proxy_manager  = ProxyManager(config)
-scanned_matches = {}
+odds_store     = OddsStore(config.get('scraping', 'paths', 'odds_db', default="odds.db"))
 
 # ———————————— 
 # Pobranie z config.yaml progów i ID kanałów Discord
@@ -53,21 +61,34 @@ PREMIUM_CH_ID = int(config.get('discord', 'channels', 'premium', 'all'))
 # ———————————— 
 # Funkcja logująca 
 # ————————————
-def log(message: str):
-    """Logowanie z rotacją pliku (maks. 1000 ostatnich linii)."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    line = f"[{timestamp}] {message}"
-    print(line)
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(line + "\n")
-    try:
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-        if len(lines) > 1500:
-            with open(LOG_FILE, "w", encoding="utf-8") as f2:
-                f2.writelines(lines[-1000:])
-    except Exception:
-        pass
+# log("…") – info, log.debug / log.warning / log.error; zapis w wątku w tle,
+# rotacja po rozmiarze i poziom z scraping.logging (modules/bot_log.py)
+log = bot_log_from_config(config, "fortuna", LOG_FILE)
+
+# Jedna przeglądarka na cały proces + harmonogram równoległości (scraping.engine.fortuna)
+# i tempa żądań do domeny Fortuny i przez każde proxy (scraping.rate_limits)
+browser_pool   = BrowserPool(proxy_manager, log=log, blocking=blocking_settings(config))
+fortuna_engine = ScrapeEngine("fortuna", browser_pool, proxy_manager, engine_settings(config, "fortuna"),
+                              limiter=rate_limiter_from_config(config),
+                              domain=requests.compat.urlparse(BASE_URL).hostname, log=log)
+
+# Pobrania bez przeglądarki: pula połączeń keep-alive / HTTP/2 per proxy (scraping.http)
+http_client = HttpClient(http_settings(config), log=log)
+
+# Listy meczów lig: TTL + ETag/Last-Modified, zapisane w bazie (scraping.listing_cache)
+listing_cache = listing_cache_from_config(config, "Fortuna")
+
+# Wspólne ID wydarzeń STS/Fortuna (dopasowanie nazw drużyn i godziny, aliasy w bazie)
+event_index = event_index_from_config(config, log=log)
+
+# Kursy całych lig z endpointów JSON strony (Playwright tylko jako zapas)
+fortuna_feed = FortunaFeed(browser_pool, http_client, feed_settings(config), log=log, report=fortuna_engine.report)
+
+# Odcisk kursów każdego meczu – niezmienione mecze nie trafiają ponownie do bazy i strumienia
+fortuna_changes = change_detector_from_config(config, "Fortuna")
+
+# Które strony meczów pobrać w trybie Playwright: bliskość startu, zmienność kursów, surebety
+fortuna_scheduler = MatchScheduler("Fortuna", scheduler_settings(config, "fortuna"), log=log)
 
 # ———————————— 
 # Parsowanie daty i czasu 
@@ -99,115 +120,110 @@ def parse_match_datetime(date_txt: str, time_txt: str):
     return datetime.combine(date_obj, time_obj)
 
 # ———————————— 
-# Generowanie match_id 
+# Pobranie (wspólny klient HTTP) i parsowanie strony 
 # ———————————— 
-def make_match_id(match_name: str, dt: datetime) -> str:
+async def fetch_page(url: str, request_kwargs: dict = None, headers: dict = None):
+    """
+    Odpowiedź HTTP (dowolny status, np. 304) albo None przy błędzie połączenia.
+    """
+    kwargs = request_kwargs if request_kwargs is not None else proxy_manager.get_request_kwargs()
+    log.debug(f"Pobieram URL: {url}")
+    if log.debug_enabled:
+        log.debug(f"Proxy: {kwargs.get('proxies', 'brak')}")
+        log.debug(f"User-Agent: {kwargs.get('headers', {}).get('User-Agent', 'brak')}")
     try:
-        home, away = [x.strip() for x in match_name.split("-", 1)]
-    except ValueError:
-        home = match_name.strip()
-        away = ""
-    h = home.replace(" ", "")
-    a = away.replace(" ", "")
-    h_key = (h[:2].upper() if len(h) >= 2 else (h[:1].upper() + "_"))
-    a_key = (a[:2].upper() if len(a) >= 2 else (a[:1].upper() + "_"))
-    key_teams = h_key + a_key
-    key_date  = dt.strftime("%d%m%H%M")
-    return f"{key_teams}{key_date}"
+        response = await http_client.get(url, kwargs, headers=headers)
+    except Exception as e:
+        fortuna_engine.report(kwargs, error=e)
+        log.error(f"ERROR fetch_and_parse: {e}")
+        return None
+    fortuna_engine.report(kwargs, status=response.status_code, latency=response.elapsed.total_seconds())
+    log.debug(f"HTTP Status: {response.status_code} ({response.reason_phrase}, {response.http_version})")
+    return response
 
-# ———————————— 
-# Pobranie i parsowanie strony przez requests 
-# ———————————— 
-def fetch_and_parse(url: str):
-    kwargs = proxy_manager.get_request_kwargs()
-    log(f"Pobieram URL: {url}")
-    log(f"Proxy: {kwargs.get('proxies', 'brak')}")
-    log(f"User-Agent: {kwargs.get('headers', {}).get('User-Agent', 'brak')}")
+async def parse_response(response, parser):
+    """
+    parser(response.text) z modules/fortuna_html (lxml, tylko potrzebne elementy)
+    w wątku – parsowanie nie blokuje pętli zdarzeń. None przy błędnym statusie.
+    """
     try:
-        response = requests.get(url, timeout=15, **kwargs)
-        log(f"HTTP Status: {response.status_code} ({response.reason})")
         response.raise_for_status()
-        return BeautifulSoup(response.text, "html.parser")
+        return await asyncio.to_thread(parser, response.text)
     except Exception as e:
-        log(f"ERROR fetch_and_parse: {e}")
+        log.error(f"ERROR fetch_and_parse: {e}")
         return None
 
+async def fetch_and_parse(url: str, parser, request_kwargs: dict = None):
+    response = await fetch_page(url, request_kwargs)
+    if response is None:
+        return None
+    return await parse_response(response, parser)
+
 # ———————————— 
 # Pobranie linków do meczów z listy ligi 
 # ———————————— 
-def get_match_links(league_url: str):
-    soup = fetch_and_parse(league_url)
-    if not soup:
+async def get_match_links(league_url: str):
+    """
+    Linki meczów ligi. W TTL ligi – prosto z listing_cache, bez żadnego żądania;
+    potem żądanie warunkowe (ETag/Last-Modified) – 304 oznacza starą listę.
+    """
+    links = listing_cache.fresh(league_url)
+    if links is not None:
+        log(f"INFO: Lista meczów z cache ({len(links)}): {league_url}")
+        return links
+
+    cached = listing_cache.get(league_url)
+    async with fortuna_engine.slot() as kwargs:
+        response = await fetch_page(league_url, kwargs, headers=listing_cache.conditional_headers(cached))
+    if response is None:
+        return cached["links"] if cached else []
+    if response.status_code == 304 and cached:
+        listing_cache.touch(league_url)
+        log(f"INFO: Lista meczów bez zmian (304, {len(cached['links'])}): {league_url}")
+        return cached["links"]
+
+    hrefs = await parse_response(response, parse_event_links)
+    if not hrefs:
         return []
     links = []
-    for a in soup.select('a.event-link'):
-        href = a.get('href')
-        if href:
-            full_url = requests.compat.urljoin(BASE_URL, href)
-            links.append(full_url)
-            log(f"Dodany link do meczu: {full_url}")
+    for href in hrefs:
+        full_url = requests.compat.urljoin(BASE_URL, href)
+        links.append(full_url)
+        log.debug(f"Dodany link do meczu: {full_url}")
+    if links:
+        listing_cache.store(league_url, links, response.headers.get("ETag"), response.headers.get("Last-Modified"))
     return links
 
 # ———————————— 
 # Parsowanie rynków na stronie meczu przez Playwright 
 # ———————————— 
-def fetch_markets_with_playwright(match_url: str):
-    markets = []
+async def _extract_markets(page, match_url: str):
+    log(f"PLAYWRIGHT: Ładowanie strony: {match_url}")
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            kwargs = proxy_manager.get_request_kwargs()
-            ua = kwargs.get('headers', {}).get('User-Agent', '')
-            ctx_args = {}
-            proxy = kwargs.get('proxies')
-            if proxy:
-                server = proxy if isinstance(proxy, str) else next(iter(proxy.values()), None)
-                if server:
-                    ctx_args['proxy'] = {'server': server}
-                    log(f"PLAYWRIGHT używa proxy: {server}")
-            ctx = browser.new_context(user_agent=ua, **ctx_args)
-            page = ctx.new_page()
-
-            log(f"PLAYWRIGHT: Ładowanie strony: {match_url}")
-            try:
-                page.goto(match_url, timeout=30000)
-                page.wait_for_selector('.market-container, .market', timeout=16000)
-                page.wait_for_timeout(2000)
-            except PlaywrightTimeoutError as e:
-                log(f"PLAYWRIGHT: Timeout lub błąd ładowania rynków: {e}")
-
-            containers = page.query_selector_all('.market-container, .market')
-            log(f"PLAYWRIGHT: Znaleziono {len(containers)} kontenerów rynków.")
-            for idx, cont in enumerate(containers, start=1):
-                try:
-                    name_el = cont.query_selector('h3 a')
-                    mkt = name_el.inner_text().strip().lower() if name_el else None
-                    log(f"[DEBUG-MKT] surowa nazwa rynku: '{mkt}'")
-                    if not mkt:
-                        continue
-                    buttons = cont.query_selector_all('a.odds-button')
-                    if not buttons:
-                        log(f"PLAYWRIGHT WARN: Rynek '{mkt}' bez kursów.")
-                        continue
-                    for btn in buttons:
-                        sel = btn.query_selector('span.odds-name')
-                        val = btn.query_selector('span.odds-value')
-                        sel_txt = sel.inner_text().strip() if sel else None
-                        val_txt = val.inner_text().strip() if val else None
-                        if sel_txt and val_txt and val_txt not in ('0', '0.0'):
-                            markets.append({
-                                'market_raw': mkt,
-                                'selection':  sel_txt,
-                                'odds':       val_txt
-                            })
-                except Exception as e:
-                    log(f"PLAYWRIGHT WARN: Błąd parsowania marketu {idx}: {e}")
-            ctx.close()
-            browser.close()
-    except Exception as e:
-        log(f"PLAYWRIGHT ERROR: {e}")
+        await page.goto(match_url, timeout=30000)
+        await page.wait_for_selector('.market-container, .market', timeout=16000)
+        await page.wait_for_timeout(2000)
+    except PlaywrightTimeoutError as e:
+        log.warning(f"PLAYWRIGHT: Timeout lub błąd ładowania rynków: {e}")
+
+    # wszystkie rynki i kursy jednym page.evaluate (zamiast zapytania na każdy przycisk)
+    markets = await extract_fortuna_markets(page)
+    log(f"PLAYWRIGHT: Zebrano {len(markets)} kursów z {len({m['market_raw'] for m in markets})} rynków.")
     return markets
 
+async def fetch_markets_with_playwright(match_url: str):
+    """
+    Otwiera stronę meczu w karcie z puli przeglądarek (fortuna_engine.page() – osobny
+    slot harmonogramu, status i czas nawigacji trafiają do limitera i zdrowia proxy)
+    i zbiera surowe kursy.
+    """
+    try:
+        async with fortuna_engine.page() as page:
+            return await _extract_markets(page, match_url)
+    except Exception as e:
+        log.error(f"PLAYWRIGHT ERROR: {e}")
+        return []
+
 # ———————————— 
 # Grupowanie surowych wpisów w strukturę rynków 
 # ———————————— 
@@ -245,25 +261,41 @@ def group_markets(markets_raw):
 # ———————————— 
 # Parsowanie pojedynczej strony meczu 
 # ———————————— 
-def parse_match_page(match_url: str):
-    soup = fetch_and_parse(match_url)
-    if not soup:
+async def parse_match_page(match_url: str):
+    # nagłówek (HTTP) i rynki (Playwright) to dwa żądania – każde we własnym slocie,
+    # więc oba liczą się do limitów domeny/proxy i oba raportują status
+    async with fortuna_engine.slot() as kwargs:
+        header = await fetch_and_parse(match_url, parse_match_header, kwargs)
+    if not header:
         return None
+    details = _parse_match_header(header)
+    if not details:
+        return None
+    markets_raw = await fetch_markets_with_playwright(match_url)
+
+    if not markets_raw:
+        log(f"[INFO] Brak rynków/kursów dla: {details['match_name']} ({details['match_id']})")
+        details["markets"] = []
+    else:
+        details["markets"] = group_markets(markets_raw)
+    return details
+
+def _parse_match_header(header):
+    """
+    Z nagłówka strony meczu (parse_match_header) wyciąga sport, ligę, nazwę meczu i datę.
+    Zwraca słownik meczu (bez rynków) albo None.
+    """
 
-    sec = soup.select_one('section.event-detail')
-    sport = sec['data-sport'] if sec and sec.has_attr('data-sport') else None
-    comp  = sec['data-competition'] if sec and sec.has_attr('data-competition') else None
+    sport = header["sport"]
+    comp  = header["competition"]
 
-    dt_el = soup.select_one('span.event-datetime')
     match_date, match_time = None, None
-    if dt_el:
-        txt = dt_el.get_text(strip=True)
-        parts = txt.split()
+    if header["datetime"]:
+        parts = header["datetime"].split()
         if len(parts) >= 2:
             match_date, match_time = parts[0], parts[1]
 
-    team_el    = soup.select_one('h1.breadcrumbed-title span.event-name')
-    match_name = team_el.get_text(strip=True) if team_el else None
+    match_name = header["match_name"]
     if not match_name:
         return None
 
@@ -271,20 +303,13 @@ def parse_match_page(match_url: str):
     if match_date and match_time:
         dt_obj = parse_match_datetime(match_date, match_time)
         if not dt_obj:
-            log(f"[WARN] NieParsDaty: '{match_date}' '{match_time}' dla {match_name}")
+            log.warning(f"[WARN] NieParsDaty: '{match_date}' '{match_time}' dla {match_name}")
 
     if not dt_obj:
         log(f"[INFO] Brak match_id (nie można sparsować daty) dla: {match_name}")
         return None
 
-    match_id = make_match_id(match_name, dt_obj)
-
-    markets_raw = fetch_markets_with_playwright(match_url)
-    if not markets_raw:
-        log(f"[INFO] Brak rynków/kursów dla: {match_name} ({match_id})")
-        markets = []
-    else:
-        markets = group_markets(markets_raw)
+    match_id = event_index.resolve(match_name, dt_obj)
 
     return {
         "match_id":    match_id,
@@ -292,190 +317,224 @@ def parse_match_page(match_url: str):
         "sport":       sport,
         "competition": comp,
         "datetime":    dt_obj.strftime("%Y-%m-%dT%H:%M:%S"),
-        "markets":     markets
+        "markets":     []
+    }
+
+def _feed_event_to_details(event):
+    """
+    Mecz z fortuna_feed (datetime jako obiekt) -> słownik meczu jak z parse_match_page.
+    """
+    dt_obj = event["datetime"]
+    return {
+        "match_id":    event_index.resolve(event["match_name"], dt_obj),
+        "match_name":  event["match_name"],
+        "sport":       event["sport"],
+        "competition": event["competition"],
+        "datetime":    dt_obj.strftime("%Y-%m-%dT%H:%M:%S"),
+        "markets":     event["markets"],
     }
 
 # ———————————— 
-# Dopisywanie jednego meczu do CSV, usuwanie wierszy starszych niż 1 dzień 
-# oraz podmiana wpisów o tym samym match_id 
+# Tryb z botem: przyrostowy silnik arbitrażu zamiast czytania całych danych po każdym meczu
 # ———————————— 
-def append_match_to_csv(match: dict, filename: str):
+arbitrage_engine = ArbitrageEngine(near_margin=float(config.get('scraping', 'watchlist', 'margin', default=0.5)))
+_sts_checkpoint  = None
+
+def _refresh_sts_side():
     """
-    1) Wczytuje wszystkie wiersze (jeśli plik istnieje).
-    2) Filtruje: 
-       - usuwa wiersze starsze niż 1 dzień (na podstawie pola 'datetime'),
-       - usuwa wiersze z tym samym match_id, co nowy mecz (żeby podmienić).
-    3) Nadpisuje plik tylko z wierszami, które przetrwały filtr (plus nagłówek).
-    4) Dopisuje nowe wiersze odpowiadające temu meczowi.
-    Jeśli plik nie istnieje: tworzy go i zapisuje nagłówek + wiersze meczu.
+    Dociąga do silnika tylko mecze STS zapisane w bazie od ostatniego wywołania.
+    Przy pierwszym wywołaniu ładuje też mecze Fortuny z bazy. Zwraca zmienione surebety.
     """
-    dir_name = os.path.dirname(filename)
-    if dir_name and not os.path.exists(dir_name):
-        os.makedirs(dir_name, exist_ok=True)
+    global _sts_checkpoint
+    changed = []
+    latest = odds_store.last_update("STS")
+    if latest is None or latest == _sts_checkpoint:
+        return changed
+    if _sts_checkpoint is None:
+        changed += arbitrage_engine.load("STS", odds_store.load("STS"))[0]
+        changed += arbitrage_engine.load("Fortuna", odds_store.load("Fortuna"))[0]
+    else:
+        changed += arbitrage_engine.load("STS", odds_store.load("STS", since=_sts_checkpoint))[0]
+    _sts_checkpoint = latest
+    return changed
 
-    fieldnames = [
-        "match_id", "match_name", "sport", "competition", "datetime",
-        "market_name", "outcome", "odds", "bookmaker"
-    ]
+# ———————————— 
+# Przetwarzanie jednego meczu:
+#   - zapis do bazy kursów
+#   - gdy podano `bot`: dodatkowo przelicza surebety meczu i wysyła nowe na Discord
+# ———————————— 
+async def process_match(link: str, bot=None):
+    log.debug(f"[DEBUG-PAGE] Próbuję sparsować link: {link}")
+    details = await parse_match_page(link)
+    if not details:
+        log.debug(f"[DEBUG-PAGE] parse_match_page zwróciło None dla: {link}")
+        return None
+    return await handle_match(details, bot, link)
 
-    file_exists = os.path.isfile(filename)
+async def handle_match(details: dict, bot=None, link: str = None):
+    """
+    Zapis, publikacja i (z botem) wysyłka surebetów dla meczu już sparsowanego –
+    ze strony meczu (process_match, z `link`) albo z API (scrape_league).
+    """
+    # Kursy takie same jak w poprzednim przebiegu – bez zapisu, logowania i przeliczania tego meczu
+    changed = fortuna_changes.changed(details["match_id"], details)
+    if link:
+        fortuna_scheduler.record(link, details["match_id"], details["datetime"], changed)
+
+    if changed:
+        # 1) Zapis meczu do bazy kursów
+        odds_store.upsert_match("Fortuna", details)
+        # ...i od razu do strumienia dla silnika arbitrażu (gdy działa main_loop)
+        match_stream.publish("Fortuna", details)
+
+        # Logowanie szczegółów (details['datetime'] to string w ISO)
+        dt_str = details['datetime'] or "data nieznana"
+        log(f"INFO: [{details['match_id']}] {details['match_name']} | {details['sport']} | {details['competition']} | {dt_str}")
+        if log.debug_enabled:
+            # linia na każdy rynek i kurs – tylko przy poziomie debug
+            for m in details['markets']:
+                log.debug(f"    - {m['market_name']} → {len(m['selections'])} selekcji:")
+                for sel in m['selections']:
+                    log.debug(f"         • {sel['outcome']} @ {sel['odds']}")
 
-    kept_rows = []
-    if file_exists:
+    # 2) Gdy podano obiekt bot, natychmiast przelicz surebety TEGO meczu
+    if bot is not None:
         try:
-            threshold_dt = datetime.now() - timedelta(days=1)
-            with open(filename, "r", encoding="utf-8", newline="") as csvfile:
-                reader = csv.DictReader(csvfile, fieldnames=fieldnames)
-                next(reader)  # pomijamy nagłówek
-                for row in reader:
-                    # Parsujemy datetime w wierszu
-                    try:
-                        row_dt = datetime.strptime(row["datetime"], "%Y-%m-%dT%H:%M:%S")
-                    except Exception:
-                        continue  # jeśli nie parsuje się poprawnie, pomijamy
-                    # Jeśli wiersz jest starszy niż 1 dzień => pomijamy
-                    if row_dt < threshold_dt:
-                        continue
-                    # Jeśli match_id jest taki sam jak nowego meczu => pomijamy (podmiana)
-                    if row["match_id"] == match["match_id"]:
-                        continue
-                    # W przeciwnym razie zostawiamy wiersz
-                    kept_rows.append(row)
+            # strona STS mogła się zmienić niezależnie od tego meczu
+            surebets = _refresh_sts_side()
+            if changed:
+                surebets += arbitrage_engine.update("Fortuna", details["match_id"], match_to_entry(details, "Fortuna"))[0]
+            for mid in {details["match_id"], *(sb["match_id"] for sb in surebets)}:
+                near_board.update(mid, arbitrage_engine.best_profit(mid))
         except Exception as e:
-            log(f"[✖] Błąd przy czytaniu i filtrowaniu starego CSV: {e}")
-            # Jeśli coś nie wyjdzie, traktujemy jakby pliku nie było – nie wczytujemy nic
+            log.error(f"[FORTUNA-SCRAPER] Błąd bazy kursów/silnika arbitrażu: {e}")
+            surebets = []
+
+        for sb in surebets:
+            profit = sb.get("profit", 0.0)
+            if profit <= FREE_MAX:
+                channel_id = FREE_CH_ID
+                tag = "[FREE]"
+            elif profit >= PREMIUM_MIN:
+                channel_id = PREMIUM_CH_ID
+                tag = "[PREMIUM]"
+            else:
+                continue
 
-    # Nadpisujemy plik wyłącznie wierszami, które przeszły filtr (jeśli są) oraz nagłówkiem
-    try:
-        with open(filename, "w", encoding="utf-8", newline="") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for row in kept_rows:
-                writer.writerow(row)
-    except Exception as e:
-        log(f"[✖] Błąd przy zapisie przefiltrowanych wierszy: {e}")
-        # Jeśli nie można nadpisać, to dopisanie następnie nowych wierszy może powieść się w trybie 'a'
+            content = f"{tag} {format_for_discord(sb)}"
+            channel = bot.get_channel(channel_id)
+            if channel:
+                try:
+                    # wysyłka w pętli bota; czekamy bez blokowania własnej pętli scrapera
+                    fut = asyncio.run_coroutine_threadsafe(channel.send(content), bot.loop)
+                    await asyncio.wait_for(asyncio.wrap_future(fut), timeout=10)
+                    log(f"[FORTUNA-SCRAPER] Wysłano surebet na kanał {channel_id}")
+                except Exception as ex:
+                    log.error(f"[FORTUNA-SCRAPER] Błąd wysyłania wiadomości: {ex}")
+            else:
+                log(f"[FORTUNA-SCRAPER] Nie znalazłem kanału o ID {channel_id}")
 
-    # Teraz dopisujemy dane nowego meczu
-    try:
-        mode = "a" if file_exists else "w"
-        with open(filename, mode, encoding="utf-8", newline="") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            if not file_exists:
-                writer.writeheader()
-
-            match_id    = match.get("match_id", "")
-            match_name  = match.get("match_name", "")
-            sport       = match.get("sport", "")
-            competition = match.get("competition", "")
-            dt          = match.get("datetime", "")
-
-            for market in match.get("markets", []):
-                market_name = market.get("market_name", "")
-                for sel in market.get("selections", []):
-                    row = {
-                        "match_id":    match_id,
-                        "match_name":  match_name,
-                        "sport":       sport,
-                        "competition": competition,
-                        "datetime":    dt,
-                        "market_name": market_name,
-                        "outcome":     sel.get("outcome", ""),
-                        "odds":        sel.get("odds", ""),
-                        "bookmaker":   sel.get("bookmaker", "")
-                    }
-                    writer.writerow(row)
-
-        log(f"[✔] Podmieniono/stworzono dane meczu {match_id} w pliku CSV: {filename}")
-    except Exception as e:
-        log(f"[✖] Błąd zapisu nowych wierszy do CSV: {e}")
+    return details
+
+# ———————————— 
+# Przebieg po wszystkich ligach – mecze ligi scrapowane równolegle
+# (limity i pauzy pilnuje fortuna_engine)
+# ———————————— 
+_feed_leagues = {}   # liga obsłużona ostatnio przez API -> match_id jej meczów (hot_poll)
+_feed_fetched = {}   # liga z API -> znacznik czasu ostatniego pobrania
 
+async def _scrape_league_feed(league_url: str, bot=None):
+    """
+    Kursy całej ligi z JSON-a jednym slotem harmonogramu. Mecze z API nie trafiają
+    do fortuna_scheduler (ten planuje strony meczów) – hot_poll odświeża ligę
+    przez _feed_leagues. None – API niedostępne.
+    """
+    async with fortuna_engine.slot() as kwargs:
+        events = await fortuna_feed.fetch_league(league_url, kwargs)
+    if events is None:
+        _feed_leagues.pop(league_url, None)
+        _feed_fetched.pop(league_url, None)
+        return None
+    log(f"INFO: {len(events)} meczów z API Fortuny dla ligi: {league_url}")
+    details_list = [_feed_event_to_details(event) for event in events]
+    _feed_leagues[league_url] = {d["match_id"] for d in details_list}
+    _feed_fetched[league_url] = time.time()
+    # strony meczów tej ligi z wcześniejszego przebiegu przez Playwrighta nie są już potrzebne
+    fortuna_scheduler.register(league_url, [])
+    results = []
+    for details in details_list:
+        results.append(await handle_match(details, bot))
+    log(fortuna_changes.summary())
+    return [r for r in results if r]
+
+async def scrape_league(league_url: str, bot=None):
+    # 1) Szybka ścieżka: kursy całej ligi z JSON-a
+    if fortuna_feed.enabled:
+        results = await _scrape_league_feed(league_url, bot)
+        if results is not None:
+            return results
+        log(f"[FORTUNA-SCRAPER] API niedostępne dla {league_url} – używam Playwrighta")
+
+    # 2) Zapas: lista meczów + strona każdego meczu w przeglądarce
+    log(f"INFO: Pobieram listę meczów z ligi: {league_url}")
+    match_links = await get_match_links(league_url)
+    if not match_links:
+        return []
+    fortuna_scheduler.register(league_url, match_links)
+    due = fortuna_scheduler.take(league_url)
+    log(fortuna_scheduler.summary(league_url, len(due)))
+    results = await fortuna_engine.map(lambda link: process_match(link, bot), due)
+    log(fortuna_changes.summary())
+    return [r for r in results if r]
+
+async def hot_poll(bot=None):
+    """
+    Odświeża tylko mecze z listy obserwowanych (surebet albo blisko niego):
+    ligi z API – jednym żądaniem na ligę, pozostałe – stroną meczu.
+    """
+    hot = fortuna_scheduler.take_hot()
+    now = time.time()
+    hot_leagues = []
+    for league_url, match_ids in list(_feed_leagues.items()):
+        if now - _feed_fetched.get(league_url, 0) < fortuna_scheduler.hot_rescan:
+            continue
+        profits = [p for p in (near_board.profit(mid) for mid in match_ids) if p is not None]
+        if profits:
+            hot_leagues.append((max(profits), league_url))
+    hot_leagues = [league for _, league in sorted(hot_leagues, reverse=True)[:fortuna_scheduler.hot_max]]
+    if not hot and not hot_leagues:
+        return []
+    log(f"HOT-POLL Fortuna: {len(hot)} meczów i {len(hot_leagues)} lig z API blisko arbitrażu")
+    results = []
+    for league_url in hot_leagues:
+        results.extend(await _scrape_league_feed(league_url, bot) or [])
+    links = [link for link, _ in hot]
+    results.extend(r for r in await fortuna_engine.map(lambda link: process_match(link, bot), links) if r)
+    return results
+
+async def scrape_all(bot=None):
+    results = []
+    for league_url in LEAGUES_TO_SCAN:
+        results.extend(await scrape_league(league_url, bot))
+    for line in proxy_manager.format_stats().splitlines():
+        log(line)
+    return results
 
+async def _main_scrape_async(bot=None):
+    try:
+        return await scrape_all(bot)
+    finally:
+        await http_client.close()
+        await browser_pool.close()
 
 # ———————————— 
 # Główna funkcja scrapująca:
-#   - w trybie solo: scrapuje i zapisuje CSV
-#   - gdy podano `bot`: dodatkowo po każdym meczu wczytuje oba CSV i wysyła surebety na Discord
+#   - w trybie solo: scrapuje i zapisuje do bazy kursów
+#   - gdy podano `bot`: dodatkowo po każdym meczu wysyła nowe/zmienione surebety na Discord
 # ———————————— 
 def main_scrape(bot=None):
-    scan_count = 0
     log("START BOTA FORTUNA")
-
-    for league_url in LEAGUES_TO_SCAN:
-        log(f"INFO: Pobieram listę meczów z ligi: {league_url}")
-        match_links = get_match_links(league_url)
-        if not match_links:
-            time.sleep(random.randint(*SLEEP_BETWEEN_REQUESTS))
-            continue
-
-        for link in match_links:
-            log(f"[DEBUG-PAGE] Próbuję sparsować link: {link}")
-            details = parse_match_page(link)
-            if not details:
-                log(f"[DEBUG-PAGE] parse_match_page zwróciło None dla: {link}")
-                time.sleep(random.randint(*SLEEP_BETWEEN_REQUESTS))
-                continue
-
-            # 1) Dopisanie meczu do CSV
-            append_match_to_csv(details, OUT_CSV_FILE)
-
-            # Logowanie szczegółów (details['datetime'] to string w ISO)
-            dt_str = details['datetime'] or "data nieznana"
-            log(f"INFO: [{details['match_id']}] {details['match_name']} | {details['sport']} | {details['competition']} | {dt_str}")
-            for m in details['markets']:
-                log(f"    - {m['market_name']} → {len(m['selections'])} selekcji:")
-                for sel in m['selections']:
-                    log(f"         • {sel['outcome']} @ {sel['odds']}")
-
-            # 2) Gdy podano obiekt bot, natychmiast wczytaj oba CSV i policz surebety
-            if bot is not None:
-                try:
-                    sts_data     = load_csv(config.get('scraping', 'paths', 'sts_csv'))
-                    fortuna_data = load_csv(OUT_CSV_FILE)
-                    surebets     = compute_surebets(sts_data, fortuna_data)
-                except Exception as e:
-                    log(f"[FORTUNA-SCRAPER] Błąd load_csv/compute_surebets: {e}")
-                    surebets = []
-
-                for sb in surebets:
-                    profit = sb.get("profit", 0.0)
-                    if profit <= FREE_MAX:
-                        channel_id = FREE_CH_ID
-                        tag = "[FREE]"
-                    elif profit >= PREMIUM_MIN:
-                        channel_id = PREMIUM_CH_ID
-                        tag = "[PREMIUM]"
-                    else:
-                        continue
-
-                    content = f"{tag} {format_for_discord(sb)}"
-                    channel = bot.get_channel(channel_id)
-                    if channel:
-                        try:
-                            import asyncio
-                            fut = asyncio.run_coroutine_threadsafe(channel.send(content), bot.loop)
-                            fut.result(timeout=10)
-                            log(f"[FORTUNA-SCRAPER] Wysłano surebet na kanał {channel_id}")
-                        except Exception as ex:
-                            log(f"[FORTUNA-SCRAPER] Błąd wysyłania wiadomości: {ex}")
-                    else:
-                        log(f"[FORTUNA-SCRAPER] Nie znalazłem kanału o ID {channel_id}")
-
-            # 3) Pauza i zarządzanie limitami
-            scan_count += 1
-            if scan_count >= SCAN_LIMIT_BEFORE_PAUSE:
-                pause = random.randint(*PAUSE_TIME_RANGE)
-                log(f"PAUSE: Pauza na {pause}s po {SCAN_LIMIT_BEFORE_PAUSE} skanach")
-                time.sleep(pause)
-                scan_count = 0
-
-            time.sleep(random.randint(*SLEEP_BETWEEN_REQUESTS))
-
-        # Usuwanie starych z kluczy (MATCH_SKIP_TIME)
-        now = datetime.now()
-        for key, ts in list(scanned_matches.items()):
-            if (now - ts).seconds > MATCH_SKIP_TIME:
-                del scanned_matches[key]
+    return asyncio.run(_main_scrape_async(bot))
 
 
 # ———————————— 
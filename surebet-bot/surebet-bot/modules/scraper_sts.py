@@ -1,12 +1,12 @@
+import asyncio
+import re
 import requests
-import random
-import time
 from datetime import datetime, timedelta
 import sys
 import os
-import csv
+import time
 import warnings
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
 # Opcjonalnie ignorujemy ostrzeżenia przy parsowaniu dat bez roku
 warnings.filterwarnings(
@@ -18,18 +18,28 @@ warnings.filterwarnings(
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from modules.config_manager import ConfigManager
 from modules.proxy_manager import ProxyManager
+from modules.browser_pool import BrowserPool
+from modules.request_blocker import blocking_settings
+from modules.scrape_engine import ScrapeEngine, engine_settings
+from modules.rate_limiter import rate_limiter_from_config
+from modules.match_stream import match_stream
+from modules.odds_store import OddsStore
+from modules.event_index import event_index_from_config
+from modules.response_capture import ResponseCapture
+from modules.json_odds import find_markets
+from modules.dom_extract import extract_sts_markets, load_sts_groups
+from modules.page_stats import PageStats
+from modules.change_detector import change_detector_from_config
+from modules.match_scheduler import MatchScheduler, scheduler_settings
+from modules.listing_cache import listing_cache_from_config
+from modules.bot_log import bot_log_from_config
 
 # ————————————
 # Stałe konfiguracyjne
 # ————————————
-SCAN_LIMIT_BEFORE_PAUSE    = 12
-PAUSE_TIME_RANGE           = (500, 700)      # 7–12 minut
-SLEEP_BETWEEN_REQUESTS     = (11, 17)        # 11–17 s między meczami
-MATCH_SKIP_TIME            = 2700            # 45 minut
-
 BASE_URL                   = "https://www.sts.pl"
 LOG_FILE                   = "bot_log_sts.txt"
-OUT_CSV_FILE               = "sts_data.csv"
+RE_EVENT_ID                = re.compile(r"/(\d+)/?(?:[?#].*)?$")
 
 # Teraz definiujemy listę lig do skanowania:
 LEAGUES_TO_SCAN = [
@@ -45,7 +55,7 @@ LEAGUES_TO_SCAN = [
 
 config = ConfigManager("config.yaml")
 proxy_manager = ProxyManager(config)
-scanned_matches = {}
+odds_store = OddsStore(config.get('scraping', 'paths', 'odds_db', default="odds.db"))
 
 # Mapowanie polskich dni tygodnia na indeks (0=poniedziałek, ..., 6=niedziela)
 WEEKDAY_MAP = {
@@ -61,117 +71,46 @@ WEEKDAY_MAP = {
 # ————————————
 # Funkcja logująca
 # ————————————
-def log(message: str):
-    """
-    Logowanie z rotacją pliku (maks. 1000 ostatnich linii).
-    """
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    line = f"[{timestamp}] {message}"
-    print(line)
-    try:
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(line + "\n")
-    except Exception:
-        pass
+# log("…") – info, log.debug / log.warning / log.error; zapis w wątku w tle,
+# rotacja po rozmiarze i poziom z scraping.logging (modules/bot_log.py)
+log = bot_log_from_config(config, "sts", LOG_FILE)
+
+# Jedna przeglądarka na cały proces – kolejne mecze używają tych samych kontekstów
+browser_pool = BrowserPool(proxy_manager, log=log, blocking=blocking_settings(config))
+
+# Harmonogram: równoległość (scraping.engine.sts) i tempo żądań do domeny STS
+# i przez każde proxy (scraping.rate_limits, wspólne z pozostałymi scraperami)
+sts_engine = ScrapeEngine("sts", browser_pool, proxy_manager, engine_settings(config, "sts"),
+                          limiter=rate_limiter_from_config(config),
+                          domain=requests.compat.urlparse(BASE_URL).hostname, log=log)
+
+# Skąd brać kursy meczu: "intercept" – z odpowiedzi JSON, które pobiera SPA
+# (page.on("response")), z przewijaniem DOM tylko jako zapasem; "dom" – zawsze przewijanie
+STS_MARKETS_SETTINGS = {
+    "mode":             "intercept",
+    "url_patterns":     ["/api/"],
+    "wait_ms":          8000,
+    "idle_ms":          600,
+    "lazy_step_ms":     1500,    # max. czekanie na zmianę DOM po przewinięciu do loadera
+    "lazy_deadline_ms": 20000,   # max. czas doładowania wszystkich grup
+}
+STS_MARKETS_SETTINGS.update(config.get('scraping', 'sts_markets', default={}) or {})
 
-    try:
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-        if len(lines) > 1500:
-            with open(LOG_FILE, "w", encoding="utf-8") as f2:
-                f2.writelines(lines[-1000:])
-    except Exception:
-        pass
+# Ile naprawdę trwają strony meczów (per liga) – logowane po każdej lidze
+page_stats = PageStats()
 
-# ————————————
-# Obcinanie i podmiana wierszy w CSV
-# ————————————
-def append_match_to_csv(match: dict, filename: str):
-    """
-    1) Jeśli plik istnieje: wczytuje wszystkie wiersze CSV, filtruje je
-       - usuwa wiersze starsze niż 24 godziny (na podstawie pola 'datetime')
-       - usuwa wiersze z identycznym 'match_id' (żeby podmienić wcześniejsze)
-    2) Nadpisuje plik nagłówkiem + przefiltrowanymi wierszami.
-    3) Dopisuje wiersze dla aktualnego meczu.
-    Jeśli pliku jeszcze nie ma: tworzy go, wpisuje nagłówek i wiersze meczu.
-    """
-    dir_name = os.path.dirname(filename)
-    if dir_name and not os.path.exists(dir_name):
-        os.makedirs(dir_name, exist_ok=True)
+# Wspólne ID wydarzeń STS/Fortuna (dopasowanie nazw drużyn i godziny, aliasy w bazie)
+event_index = event_index_from_config(config, log=log)
 
-    fieldnames = [
-        "match_id", "match_name", "sport", "competition", "datetime",
-        "market", "selection", "odds", "bookmaker"
-    ]
+# Odcisk kursów każdego meczu – niezmienione mecze nie trafiają ponownie do bazy i strumienia
+sts_changes = change_detector_from_config(config, "STS")
 
-    file_exists = os.path.isfile(filename)
-    kept_rows = []
-
-    if file_exists:
-        try:
-            threshold_dt = datetime.now() - timedelta(days=1)
-            with open(filename, "r", encoding="utf-8", newline="") as csvfile:
-                reader = csv.DictReader(csvfile, fieldnames=fieldnames)
-                next(reader)  # pomijamy nagłówek
-                for row in reader:
-                    try:
-                        row_dt = datetime.strptime(row["datetime"], "%Y-%m-%dT%H:%M:%S")
-                    except Exception:
-                        continue
-                    if row_dt < threshold_dt:
-                        continue
-                    if row["match_id"] == match["match_id"]:
-                        continue
-                    kept_rows.append(row)
-        except Exception as e:
-            log(f"[✖] Błąd przy czytaniu i filtrowaniu starego CSV: {e}")
+# Które mecze pobrać w tym przebiegu: bliskość startu, zmienność kursów, surebety (scraping.scheduler.sts)
+sts_scheduler = MatchScheduler("STS", scheduler_settings(config, "sts"), log=log)
 
-    try:
-        with open(filename, "w", encoding="utf-8", newline="") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for row in kept_rows:
-                writer.writerow(row)
-    except Exception as e:
-        log(f"[✖] Błąd przy zapisie przefiltrowanych wierszy do CSV: {e}")
-
-    try:
-        mode = "a" if file_exists else "w"
-        with open(filename, mode, encoding="utf-8", newline="") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            if not file_exists:
-                writer.writeheader()
-
-            match_id    = match.get("match_id", "")
-            match_name  = match.get("match_name", "")
-            sport       = match.get("sport", "")
-            competition = match.get("competition", "")
-            dt_val      = match.get("datetime")
-            if isinstance(dt_val, datetime):
-                dt_str = dt_val.strftime("%Y-%m-%dT%H:%M:%S")
-            else:
-                dt_str = dt_val or ""
-
-            for m in match.get("markets", []):
-                market    = m.get("market", "")
-                selection = m.get("selection", "")
-                odds      = m.get("odds", "")
-                row = {
-                    "match_id":    match_id,
-                    "match_name":  match_name,
-                    "sport":       sport,
-                    "competition": competition,
-                    "datetime":    dt_str,
-                    "market":      market,
-                    "selection":   selection,
-                    "odds":        odds,
-                    "bookmaker":   "STS"
-                }
-                writer.writerow(row)
-
-        log(f"[✔] Podmieniono/stworzono dane meczu {match.get('match_id')} w pliku CSV: {filename}")
-    except Exception as e:
-        log(f"[✖] Błąd zapisu nowych wierszy do CSV: {e}")
+# Listy meczów lig z TTL, zapisane w bazie (scraping.listing_cache) – strona ligi to SPA
+# renderowane w przeglądarce, więc bez żądań warunkowych, tylko czas życia listy
+listing_cache = listing_cache_from_config(config, "STS")
 
 # ————————————
 # Funkcje parsujące (działają poprawnie – nie ruszać)
@@ -223,257 +162,205 @@ def parse_match_datetime(date_txt: str, time_txt: str):
 
     return datetime.combine(date_obj, time_obj)
 
-def make_match_id(match_name: str, dt: datetime) -> str:
-    """
-    Generuje unikalne ID w postaci:
-      dwie pierwsze litery drużyny domowej + dwie pierwsze litery drużyny gościa
-      + DDMMHHMM (bez roku).
-    """
-    try:
-        home, away = [x.strip() for x in match_name.split("-", 1)]
-    except ValueError:
-        home = match_name.strip()
-        away = ""
-    h = (home.replace(" ", "")[:2].upper() if len(home.replace(" ", "")) >= 2 else (home[:1].upper() + "_"))
-    a = (away.replace(" ", "")[:2].upper() if len(away.replace(" ", "")) >= 2 else (away[:1].upper() + "_"))
-    key_teams = h + a
-    key_date = dt.strftime("%d%m%H%M")  # ddmmHHMM
-    return f"{key_teams}{key_date}"
-
-def get_match_links(league_url: str):
+async def get_match_links(league_url: str):
     """
     Scrapuje linki do poszczególnych meczów z podanej strony ligi STS.
+    W TTL ligi zwraca listę z listing_cache bez otwierania strony.
     """
+    cached = listing_cache.fresh(league_url)
+    if cached is not None:
+        log(f"INFO: Lista meczów z cache ({len(cached)}): {league_url}")
+        return cached
+
     links = []
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            kwargs = proxy_manager.get_request_kwargs()
-            ua = kwargs.get("headers", {}).get("User-Agent", "")
-            ctx_args = {}
-            proxy = kwargs.get("proxies")
-            if proxy:
-                server = proxy if isinstance(proxy, str) else next(iter(proxy.values()), None)
-                if server:
-                    ctx_args["proxy"] = {"server": server}
-                    log(f"PLAYWRIGHT używa proxy: {server}")
-
-            context = browser.new_context(user_agent=ua, **ctx_args)
-            log(f"PLAYWRIGHT używa User-Agent: {ua}")
-
-            page = context.new_page()
+        async with sts_engine.page() as page:
             log(f"PLAYWRIGHT (liga): Ładowanie {league_url}")
             try:
-                response = page.goto(league_url, timeout=8000)
+                response = await page.goto(league_url, timeout=8000)
                 if response:
                     log(f"PLAYWRIGHT (liga): Status HTTP: {response.status}")
-                page.wait_for_timeout(1100)
+                await page.wait_for_timeout(1100)
                 for _ in range(5):
-                    page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                    page.wait_for_timeout(1200)
+                    await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                    await page.wait_for_timeout(1200)
             except PlaywrightTimeoutError as e:
-                log(f"PLAYWRIGHT WARN (liga): {e}")
+                log.warning(f"PLAYWRIGHT WARN (liga): {e}")
 
-            anchors = page.query_selector_all("bb-prematch-match-tile a")
+            anchors = await page.query_selector_all("bb-prematch-match-tile a")
             log(f"PLAYWRIGHT (liga): Znaleziono {len(anchors)} linków do meczów.")
             for a in anchors:
-                href = a.get_attribute("href")
+                href = await a.get_attribute("href")
                 if href and href.startswith("/kursy/"):
                     full_url = requests.compat.urljoin(BASE_URL, href)
                     links.append(full_url)
-                    log(f"Dodano link: {full_url}")
-
-            context.close()
-            browser.close()
+                    log.debug(f"Dodano link: {full_url}")
     except Exception as e:
-        log(f"PLAYWRIGHT ERROR (liga): {e}")
+        log.error(f"PLAYWRIGHT ERROR (liga): {e}")
 
+    if links:
+        listing_cache.store(league_url, links)
     return links
 
-def fetch_markets_with_playwright(match_url: str):
+async def _goto_match_page(page, match_url: str):
     """
-    Otwiera stronę meczu i przewija CAŁĄ stronę stopniowo, aż placeholdery
-    <bb-loading-match> zostaną zastąpione przez rzeczywiste
-    <div.match-details-group__container>. Loguje przy każdej iteracji
-    liczbę loaderów i liczbę wyrenderowanych kontenerów. Kończy, gdy liczba
-    kontenerów w DOM-ie przestanie rosnąć.
-
-    Dodatkowo: filtruje tylko te rynki, których nazwa w lower() znajduje się
-    na liście ALLOWED_MARKETS.
+    Ładuje stronę meczu i czeka na nagłówek z drużynami.
     """
-    markets = []
+    log(f"PLAYWRIGHT (mecz): Ładowanie {match_url}")
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            kwargs = proxy_manager.get_request_kwargs()
-            ua = kwargs.get("headers", {}).get("User-Agent", "")
-            ctx_args = {}
-            proxy = kwargs.get("proxies")
-            if proxy:
-                server = proxy if isinstance(proxy, str) else next(iter(proxy.values()), None)
-                if server:
-                    ctx_args["proxy"] = {"server": server}
-                    log(f"PLAYWRIGHT używa proxy: {server}")
-
-            context = browser.new_context(user_agent=ua, **ctx_args)
-            log(f"PLAYWRIGHT używa User-Agent: {ua}")
-
-            page = context.new_page()
-            log(f"PLAYWRIGHT (mecz): Ładowanie {match_url}")
-            try:
-                response = page.goto(match_url, timeout=4500)
-                if response:
-                    log(f"PLAYWRIGHT (mecz): Status HTTP: {response.status}")
-                page.wait_for_selector(".shirts-container .detailed-scoreboard__container", timeout=4500)
-            except PlaywrightTimeoutError:
-                log("PLAYWRIGHT WARN (nagłówek): header nie załadował się w 10 s, kontynuuję.")
-
-            # Dajemy chwilę na wstępne wczytanie (pierwsze grupy + placeholdery)
-            page.wait_for_timeout(500)
-
-            # Wstrzykiwanie własnego pola "wyszukaj" do DOM, aby symulować Ctrl+F
-            page.evaluate("""
-              if (!document.getElementById('playwrightSearch')) {
-                const input = document.createElement('input');
-                input.id = 'playwrightSearch';
-                input.style.position = 'fixed';
-                input.style.top = '10px';
-                input.style.left = '10px';
-                input.style.zIndex = '9999';
-                input.style.padding = '4px';
-                input.style.background = 'white';
-                input.style.border = '1px solid #888';
-                input.placeholder = 'Wyszukaj bb-loading-match...';
-                document.body.appendChild(input);
-
-                let lastIndex = 0;
-                let matches = [];
-
-                input.addEventListener('keydown', async (e) => {
-                  if (e.key === 'Enter') {
-                    const term = input.value.trim();
-                    if (!term) {
-                      matches = [];
-                      lastIndex = 0;
-                      return;
-                    }
-                    matches = Array.from(document.querySelectorAll(term));
-                    lastIndex = 0;
-                    if (matches.length > 0) {
-                      matches[0].scrollIntoView({ block: 'center' });
-                      matches[0].style.outline = '2px solid orange';
-                    }
-                  } else if (e.key === 'F3' || (e.key === 'ArrowDown' && e.ctrlKey)) {
-                    if (matches.length > 0) {
-                      matches[lastIndex].style.outline = '';
-                      lastIndex = (lastIndex + 1) % matches.length;
-                      matches[lastIndex].scrollIntoView({ block: 'center' });
-                      matches[lastIndex].style.outline = '2px solid orange';
-                    }
-                  }
-                });
-              }
-            """)
-
-            # Zliczenie faktycznej liczby placeholderów <bb-loading-match>
-            initial_loaders = len(page.query_selector_all("bb-loading-match"))
-            log(f"PLAYWRIGHT DEBUG: Placeholderów do przewinięcia: {initial_loaders}")
-
-            # Automatyczne użycie wstrzykniętego pola do przewinięcia każdego loadera
-            page.fill('#playwrightSearch', 'bb-loading-match')
-            page.press('#playwrightSearch', 'Enter')
-            page.wait_for_timeout(300)
-
-            # Przewinięcie w zależności od liczby placeholderów (+2 dla pewności)
-            for _ in range(initial_loaders + 2):
-                page.press('#playwrightSearch', 'F3')
-                page.wait_for_timeout(200)
-
-            # Teraz przechodzimy do normalnego scrollowania w dół
-            prev_container_count = -1
-            stable_loops = 0
-            log("PLAYWRIGHT: Rozpoczynam stopniowe przewijanie, aż wszystkie loadery zostaną wymienione…")
-
-            max_scrolls = initial_loaders + 5
-            for step in range(max_scrolls):
-                page.evaluate("window.scrollBy(0, window.innerHeight);")
-                page.wait_for_timeout(250)
-
-                loader_count = len(page.query_selector_all("bb-loading-match"))
-                container_count = len(page.query_selector_all("div.match-details-group__container"))
-                log(f"    [SCROLL] krok={step+1}, placeholderów={loader_count}, wyrenderowanych grup={container_count}")
-
-                if container_count == prev_container_count and loader_count == 0:
-                    stable_loops += 1
-                else:
-                    stable_loops = 0
-                    prev_container_count = container_count
+        response = await page.goto(match_url, timeout=4500)
+        if response:
+            log(f"PLAYWRIGHT (mecz): Status HTTP: {response.status}")
+        await page.wait_for_selector(".shirts-container .detailed-scoreboard__container", timeout=4500)
+    except PlaywrightTimeoutError:
+        log.warning("PLAYWRIGHT WARN (nagłówek): header nie załadował się w 10 s, kontynuuję.")
+
+async def _extract_markets(page, load_info: dict = None):
+    """
+    Doładowuje leniwe grupy rynków (placeholdery <bb-loading-match>) sterując się
+    zmianami DOM-u zamiast stałych pauz – load_sts_groups kończy, gdy loaderów
+    już nie ma – a potem czyta wszystkie kursy jednym page.evaluate.
+    Wynik doładowania (czas, pozostałe loadery) trafia do `load_info`, jeśli podano.
+    """
+    try:
+        await page.wait_for_selector("div.match-details-group__container, bb-loading-match",
+                                     timeout=STS_MARKETS_SETTINGS["lazy_step_ms"] * 2)
+    except PlaywrightTimeoutError:
+        log.warning("PLAYWRIGHT WARN: brak grup rynków i placeholderów na stronie meczu")
+
+    load = await load_sts_groups(page, STS_MARKETS_SETTINGS["lazy_step_ms"], STS_MARKETS_SETTINGS["lazy_deadline_ms"])
+    log(f"PLAYWRIGHT (mecz): placeholderów {load['initial']} → {load['remaining']}, grup {load['groups']}, "
+        f"kroków {load['steps']}, {load['elapsed']} ms")
+    if load["remaining"]:
+        log.warning(f"PLAYWRIGHT WARN: {load['remaining']} grup nie doładowało się w {load['elapsed']} ms")
+
+    # wszystkie grupy, przyciski i etykiety jednym page.evaluate (zamiast setek round-tripów)
+    markets = await extract_sts_markets(page)
+    log(f"PLAYWRIGHT: Zebrano łącznie {len(markets)} kursów z {load['groups']} grup rynków.")
+    if load_info is not None:
+        load_info.update(load)
+    return markets
+
+def _capture_for(page):
+    """
+    Podsłuch odpowiedzi JSON karty (tryb "intercept") albo None (tryb "dom").
+    """
+    if STS_MARKETS_SETTINGS["mode"] != "intercept":
+        return None
+    return ResponseCapture(page, STS_MARKETS_SETTINGS["url_patterns"], log=log)
 
-                if stable_loops >= 2 and loader_count == 0:
-                    log(f"    [SCROLL] Liczba grup ustabilizowała się na {container_count}, przerywam.")
-                    break
+def _event_id_from_url(match_url: str):
+    """ID wydarzenia z końca linku meczu (…/kursy/niemcy-francja/810661219) albo None."""
+    m = RE_EVENT_ID.search(match_url or "")
+    return m.group(1) if m else None
 
-            page.wait_for_timeout(300)
+def _markets_from_payloads(capture, payloads, match_name: str = None, event_id: str = None):
+    """
+    Kursy z odpowiedzi JSON złapanych podczas ładowania strony meczu –
+    w formacie _extract_markets (market / selection małymi literami, odds).
+    Brane są tylko rynki wydarzenia tego meczu (find_markets po ID z linku albo
+    nazwach drużyn z nagłówka); ta sama para (rynek, selekcja) z kilku odpowiedzi
+    liczona jest raz – z kursem z najpóźniejszej odpowiedzi.
+    """
+    latest = {}
+    for payload in payloads:
+        for mkt in find_markets(payload, "STS", match_name, event_id):
+            mkt_name = mkt["market_name"].lower()
+            for sel in mkt["selections"]:
+                selection = sel["outcome"].lower()
+                latest.pop((mkt_name, selection), None)
+                latest[(mkt_name, selection)] = sel["odds"]
+    markets = [
+        {"market": mkt_name, "selection": selection, "odds": odds}
+        for (mkt_name, selection), odds in latest.items()
+    ]
+    log(f"STS INTERCEPT: {len(markets)} kursów z {len(payloads)} odpowiedzi JSON ({len(capture.urls)} URL-i)")
+    return markets
 
-            groups = page.query_selector_all("div.match-details-group__container")
-            final_count = len(groups)
-            log(f"PLAYWRIGHT (mecz): OSTATECZNIE znaleziono {final_count} grup rynków.")
-            if final_count < 30:
-                html0 = groups[0].inner_html() if groups else ""
-                log(f"PLAYWRIGHT DEBUG: Tylko {final_count} grup. HTML pierwszej: {html0[:200]}…")
+async def _collect_markets(page, capture, match_id: str, load_info: dict = None, match_name: str = None, event_id: str = None):
+    """
+    Kursy meczu z odpowiedzi sieciowych, a gdy ich brak – przewijaniem DOM (_extract_markets).
+    Zwraca (kursy, changed). Surowe treści odpowiedzi JSON są porównywane z poprzednim
+    przebiegiem (sts_changes) PRZED dekodowaniem – bez zmian: ([], False), bez parsowania.
+    """
+    if capture is not None:
+        bodies = await capture.bodies(STS_MARKETS_SETTINGS["wait_ms"], STS_MARKETS_SETTINGS["idle_ms"])
+        # odcisk pod osobnym kluczem – ścieżka DOM niżej porównuje już sparsowane kursy
+        raw_key = f"{match_id}:json"
+        # kolejność odpowiedzi zależy od sieci – odcisk z posortowanych treści
+        if bodies and not sts_changes.changed(raw_key, b"\0".join(sorted(bodies))):
+            log.debug(f"STS INTERCEPT: odpowiedzi JSON bez zmian – pomijam parsowanie ({match_id})")
+            return [], False
+        markets = _markets_from_payloads(capture, capture.decode(bodies), match_name, event_id)
+        if markets:
+            return markets, True
+        # te odpowiedzi nie niosą kursów – o zmianie decyduje DOM
+        sts_changes.forget(raw_key)
+        log("STS INTERCEPT: brak kursów w odpowiedziach JSON – przewijam stronę (DOM)")
+    markets = await _extract_markets(page, load_info)
+    return markets, sts_changes.changed(match_id, markets)
+
+async def _extract_header(page, result: dict):
+    """
+    Uzupełnia w `result` sport, ligę, nazwę meczu i datę na podstawie nagłówka
+    już załadowanej strony meczu.
+    """
+    left_el = await page.query_selector(".team-container .detailed-scoreboard__bold-label span")
+    if left_el:
+        # === Brazylia ===
+        labels = await page.query_selector_all("div.breadcrumb-container__label")
+        if len(labels) >= 2:
+            result["sport"]       = (await labels[0].inner_text()).strip()
+            result["competition"] = (await labels[1].inner_text()).strip()
+
+        right_el = await page.query_selector(".team-container.team-container--right .detailed-scoreboard__bold-label span")
+        if right_el:
+            left  = (await left_el.inner_text()).strip()
+            right = (await right_el.inner_text()).strip()
+            result["match_name"] = f"{left} - {right}"
+        else:
+            result["match_name"] = (await left_el.inner_text()).strip()
 
-            markets = []
-            for idx, grp in enumerate(groups, start=1):
-                try:
-                    title_el = grp.query_selector(".match-details-group__title div")
-                    if not title_el:
-                        continue
-                    mkt_name = title_el.inner_text().strip().lower()
-
-                    # *** Filtrujemy tylko ALLOWED_MARKETS ***
-                    if not mkt_name :
-                        continue
-
-                    buttons = grp.query_selector_all("sds-odds-button")
-                    if not buttons:
-                        log(f"    WARN: Rynek '{mkt_name}' — brak <sds-odds-button>")
-                        continue
-
-                    count_in_group = 0
-                    for btn in buttons:
-                        label_el = btn.query_selector(".odds-button__label span")
-                        odd_el   = btn.query_selector(".odds-button__odd-value")
-                        sel_txt = label_el.inner_text().strip() if label_el else None
-                        val_txt = odd_el.inner_text().strip() if odd_el else None
-
-                        if sel_txt and val_txt and val_txt not in ("0", "0.0", "-", "–"):
-                            markets.append({
-                                "market":    mkt_name,
-                                "selection": sel_txt.lower(),
-                                "odds":      val_txt
-                            })
-                            count_in_group += 1
-
-                    if count_in_group > 0 and (idx <= 5 or idx % 10 == 0):
-                        log(f"    Grupa {idx}: '{mkt_name}' — dodano {count_in_group} kursów")
-                except Exception as e:
-                    log(f"    WARN (przy grupie {idx}): {e}")
-
-            log(f"PLAYWRIGHT: Zebrano łącznie {len(markets)} kursów z {final_count} grup rynków.")
-
-            context.close()
-            browser.close()
-            return markets
+        # Pełna data z <span> wewnątrz .detailed-scoreboard__sub-label
+        date_span = await page.query_selector(".detailed-scoreboard__sub-label span")
+        date_txt  = (await date_span.inner_text()).strip() if date_span else None
 
-    except Exception as e:
-        log(f"PLAYWRIGHT ERROR (mecz): {e}")
-        return []
+        time_el   = await page.query_selector(".detailed-scoreboard__sub-label--highlight span")
+        time_txt  = (await time_el.inner_text()).strip() if time_el else None
 
-def parse_match_page(match_url: str):
+        log.debug(f"    [DEBUG BRAZYLIA] Surowe date_txt='{date_txt}', time_txt='{time_txt}'")
+        result["datetime"] = parse_match_datetime(date_txt, time_txt)
+
+    else:
+        # === Argentyna (lub inna liga o podobnej strukturze) ===
+        header_span = await page.query_selector("div.team-names.detailed-scoreboard__bold-label span")
+        if header_span:
+            result["match_name"] = (await header_span.inner_text()).strip()
+
+        labels = await page.query_selector_all("div.breadcrumb-container__label")
+        if len(labels) >= 2:
+            result["sport"]       = (await labels[0].inner_text()).strip()
+            result["competition"] = (await labels[1].inner_text()).strip()
+
+        container = await page.query_selector("div.detailed-scoreboard__sub-label")
+        if container:
+            spans = await container.query_selector_all("span")
+            if len(spans) >= 2:
+                day_txt  = (await spans[0].inner_text()).strip()
+                time_txt = (await spans[-1].inner_text()).strip()
+                log.debug(f"    [DEBUG ARGENTYNA] day_txt='{day_txt}', time_txt='{time_txt}'")
+                result["datetime"] = parse_match_datetime(day_txt, time_txt)
+            else:
+                log.debug("    [DEBUG ARGENTYNA] Nie znaleziono wystarczającej liczby <span> w detailed-scoreboard__sub-label")
+                result["datetime"] = None
+
+async def parse_match_page(match_url: str, league_url: str = None):
     """
-    – Scrapujemy nagłówek meczu (sport, liga, drużyny, data/godzina),
-    – Następnie wywołujemy fetch_markets_with_playwright(), aby zebrać wszystkie kursy.
-    Zwracany słownik ma teraz klucz 'match_id'.
+    Ładuje stronę meczu RAZ (karta z browser_pool) i z tej samej strony:
+    – scrapuje nagłówek meczu (sport, liga, drużyny, data/godzina),
+    – zbiera wszystkie kursy (_collect_markets: odpowiedzi JSON albo przewijanie DOM).
+    Zwracany słownik ma klucze 'match_id' i 'changed' (czy kursy zmieniły się od poprzedniego
+    przebiegu – przy False 'markets' jest puste). Czas strony trafia do page_stats (per liga).
     """
     result = {
         "match_name":  None,
@@ -482,217 +369,162 @@ def parse_match_page(match_url: str):
         "datetime":    None,
         "markets":     [],
         "match_id":    None,
+        "changed":     True,
     }
 
+    load_info = {}
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            kwargs = proxy_manager.get_request_kwargs()
-            ua = kwargs.get("headers", {}).get("User-Agent", "")
-            ctx_args = {}
-            proxy = kwargs.get("proxies")
-            if proxy:
-                server = proxy if isinstance(proxy, str) else next(iter(proxy.values()), None)
-                if server:
-                    ctx_args["proxy"] = {"server": server}
-                    log(f"PLAYWRIGHT używa proxy: {server}")
-            context = browser.new_context(user_agent=ua, **ctx_args)
-            log(f"PLAYWRIGHT używa User-Agent: {ua}")
-
-            page = context.new_page()
-            log(f"PLAYWRIGHT (mecz nagłówek): Ładowanie strony: {match_url}")
+        async with sts_engine.page() as page:
+            # podsłuch przed goto() – odpowiedzi z kursami przychodzą razem ze stroną
+            capture = _capture_for(page)
+            started = time.perf_counter()
             try:
-                response = page.goto(match_url, timeout=3800)
-                if response:
-                    log(f"PLAYWRIGHT (nagłówek): Status HTTP: {response.status}")
-                page.wait_for_timeout(900)
-            except PlaywrightTimeoutError:
-                log("PLAYWRIGHT WARN (nagłówek): header nie załadował się w 10 s.")
-
-            left_el = page.query_selector(".team-container .detailed-scoreboard__bold-label span")
-            if left_el:
-                # === Brazylia ===
-                labels = page.query_selector_all("div.breadcrumb-container__label")
-                if len(labels) >= 2:
-                    result["sport"]       = labels[0].inner_text().strip()
-                    result["competition"] = labels[1].inner_text().strip()
-
-                right_el = page.query_selector(".team-container.team-container--right .detailed-scoreboard__bold-label span")
-                if right_el:
-                    left  = left_el.inner_text().strip()
-                    right = right_el.inner_text().strip()
-                    result["match_name"] = f"{left} - {right}"
-                else:
-                    result["match_name"] = left_el.inner_text().strip()
+                await _goto_match_page(page, match_url)
+                await _extract_header(page, result)
 
-                # Pełna data z <span> wewnątrz .detailed-scoreboard__sub-label
-                date_span = page.query_selector(".detailed-scoreboard__sub-label span")
-                date_txt  = date_span.inner_text().strip() if date_span else None
-
-                time_el   = page.query_selector(".detailed-scoreboard__sub-label--highlight span")
-                time_txt  = time_el.inner_text().strip() if time_el else None
-
-                log(f"    [DEBUG BRAZYLIA] Surowe date_txt='{date_txt}', time_txt='{time_txt}'")
-                result["datetime"] = parse_match_datetime(date_txt, time_txt)
-
-            else:
-                # === Argentyna (lub inna liga o podobnej strukturze) ===
-                header_span = page.query_selector("div.team-names.detailed-scoreboard__bold-label span")
-                if header_span:
-                    result["match_name"] = header_span.inner_text().strip()
-
-                labels = page.query_selector_all("div.breadcrumb-container__label")
-                if len(labels) >= 2:
-                    result["sport"]       = labels[0].inner_text().strip()
-                    result["competition"] = labels[1].inner_text().strip()
-
-                container = page.query_selector("div.detailed-scoreboard__sub-label")
-                if container:
-                    spans = container.query_selector_all("span")
-                    if len(spans) >= 2:
-                        day_txt  = spans[0].inner_text().strip()
-                        time_txt = spans[-1].inner_text().strip()
-                        log(f"    [DEBUG ARGENTYNA] day_txt='{day_txt}', time_txt='{time_txt}'")
-                        result["datetime"] = parse_match_datetime(day_txt, time_txt)
-                    else:
-                        log("    [DEBUG ARGENTYNA] Nie znaleziono wystarczającej liczby <span> w detailed-scoreboard__sub-label")
-                        result["datetime"] = None
-
-            context.close()
-            browser.close()
+                if result["match_name"] and result["datetime"]:
+                    result["match_id"] = event_index.resolve(result["match_name"], result["datetime"])
+                else:
+                    # bez match_id i tak odrzucimy mecz – nie ma sensu zbierać rynków
+                    return result
+
+                result["markets"], result["changed"] = await _collect_markets(
+                    page, capture, result["match_id"], load_info,
+                    match_name=result["match_name"], event_id=_event_id_from_url(match_url),
+                )
+                page_stats.record(league_url, time.perf_counter() - started,
+                                  load_ms=load_info.get("elapsed"), incomplete=bool(load_info.get("remaining")))
+            finally:
+                if capture is not None:
+                    capture.close()
     except Exception as e:
-        log(f"PLAYWRIGHT ERROR (nagłówek meczu): {e}")
+        log.error(f"PLAYWRIGHT ERROR (strona meczu): {e}")
         return None
 
-    if result["match_name"] and result["datetime"]:
-        result["match_id"] = make_match_id(result["match_name"], result["datetime"])
-
-    result["markets"] = fetch_markets_with_playwright(match_url)
     return result
 
 # ————————————
-# Główna pętla “ciągłego skanowania”
+# Przetwarzanie meczów i lig (asynchronicznie, limity pilnuje sts_engine)
 # ————————————
-def main():
-    scan_count = 0
-
-    log("START BOTA STS (ciągłe skanowanie + zapisywanie do CSV)")
-    while True:
-        for league_url in LEAGUES_TO_SCAN:
-            log(f"INFO: Pobieram listę meczów z ligi: {league_url}")
-            match_links = get_match_links(league_url)
-            if not match_links:
-                time.sleep(random.randint(*SLEEP_BETWEEN_REQUESTS))
-                continue
-
-            for link in match_links:
-                details = parse_match_page(link)
-                if not details or not details.get("match_id"):
-                    time.sleep(random.randint(*SLEEP_BETWEEN_REQUESTS))
-                    continue
-
-                log_msg = f"INFO: [{details['match_id']}] {details['match_name']} | {details['sport']} | {details['competition']}"
-                if details["datetime"]:
-                    log_msg += f" | {details['datetime'].strftime('%d.%m.%Y %H:%M')}"
-                else:
-                    log_msg += " | data/godzina nieznana"
-                log(log_msg)
-
-                if details["markets"]:
-                    for m in details["markets"]:
-                        log(f"    - {m['market']} / {m['selection']} @ {m['odds']}")
-                else:
-                    log("    Brak rynków / kursów na stronie meczu")
-
-                append_match_to_csv(details, OUT_CSV_FILE)
-
-                scanned_matches[details["match_id"]] = datetime.now()
-                scan_count += 1
-                if scan_count >= SCAN_LIMIT_BEFORE_PAUSE:
-                    pause = random.randint(*PAUSE_TIME_RANGE)
-                    log(f"PAUSE: Pauza na {pause}s po {SCAN_LIMIT_BEFORE_PAUSE} skanach")
-                    time.sleep(pause)
-                    scan_count = 0
+async def process_match(link: str, league_url: str = None):
+    """
+    Parsuje jeden mecz, loguje go i zapisuje do bazy kursów. Zwraca słownik meczu albo None.
+    """
+    details = await parse_match_page(link, league_url)
+    if not details or not details.get("match_id"):
+        log.debug(f"[DEBUG] Brak danych z parse_match_page dla: {link}")
+        return None
 
-                time.sleep(random.randint(*SLEEP_BETWEEN_REQUESTS))
+    # Kursy takie same jak w poprzednim przebiegu (odcisk w _collect_markets) –
+    # bez logowania, zapisu i przeliczania arbitrażu
+    changed = details["changed"]
+    sts_scheduler.record(link, details["match_id"], details["datetime"], changed)
+    if not changed:
+        return details
+
+    # Log podstawowych informacji o meczu
+    log_msg = (
+        f"INFO: [{details['match_id']}] {details['match_name']} | "
+        f"{details['sport']} | {details['competition']}"
+    )
+    if details["datetime"]:
+        log_msg += f" | {details['datetime'].strftime('%d.%m.%Y %H:%M')}"
+    else:
+        log_msg += " | data/godzina nieznana"
+    log(log_msg)
+
+    # Jeśli są jakieś rynki/ kursy, pokaż je w logu (debug – linia na każdy kurs)
+    if details.get("markets"):
+        if log.debug_enabled:
+            for m in details["markets"]:
+                log.debug(f"    - {m['market']} / {m['selection']} @ {m['odds']}")
+    else:
+        log("    Brak rynków / kursów na stronie meczu")
 
-        now = datetime.now()
-        for key, ts in list(scanned_matches.items()):
-            if (now - ts).seconds > MATCH_SKIP_TIME:
-                del scanned_matches[key]
+    # Zapisz dane meczu do bazy kursów (podmiana wierszy tego meczu, wygaszanie wpisów starszych niż 24h)
+    odds_store.upsert_match("STS", details)
+    # ...i od razu do strumienia dla silnika arbitrażu (gdy działa main_loop)
+    match_stream.publish("STS", details)
+    return details
 
-if __name__ == "__main__":
-    main()
-# Dodaj poniższą funkcję do pliku surebet-bot/modules/scraper_sts.py
+async def scrape_league(league_url: str):
+    """
+    Pobiera listę meczów ligi i scrapuje równolegle (w ramach limitów sts_engine)
+    te, które harmonogram uznał za zaległe – od najważniejszych.
+    """
+    log(f"INFO: Pobieram listę meczów z ligi: {league_url}")
+    match_links = await get_match_links(league_url)
+    if not match_links:
+        return []
+    sts_scheduler.register(league_url, match_links)
+    due = sts_scheduler.take(league_url)
+    log(sts_scheduler.summary(league_url, len(due)))
+    results = await sts_engine.map(lambda link: process_match(link, league_url), due)
+    log(f"STATYSTYKI STRON {page_stats.format(league_url)}")
+    log(sts_changes.summary())
+    return [r for r in results if r]
+
+async def hot_poll():
+    """
+    Odświeża tylko mecze z listy obserwowanych (surebet albo blisko niego),
+    bez pobierania list lig – wywoływane z main_loop częściej niż scrape_all.
+    """
+    hot = sts_scheduler.take_hot()
+    if not hot:
+        return []
+    log(f"HOT-POLL STS: {len(hot)} meczów blisko arbitrażu")
+    results = await sts_engine.map(lambda item: process_match(*item), hot)
+    return [r for r in results if r]
 
-def main_scrape(bot):
-    print("[scraper_sts] ► START sts_main_scrape()", flush=True)
+async def scrape_all():
     """
     Jednorazowy przebieg skanowania lig z LEAGUES_TO_SCAN:
     - pobieranie linków do meczów z każdej ligi
-    - dla każdego linku parsowanie strony meczu
-    - zapisywanie wyników do CSV (append_match_to_csv)
-    - pauzy między żądaniami i okresowa pauza po SCAN_LIMIT_BEFORE_PAUSE skanach
-    - po zakończeniu pętli lig oczyszczanie stale trzymanych match_id, by móc je pobrać ponownie po MATCH_SKIP_TIME
+    - równoległe parsowanie zaległych stron meczów (sts_scheduler) i zapis do bazy kursów
     """
-    scan_count = 0
-
-    log("START BOTA STS (jednorazowe skanowanie + zapisywanie do CSV)")
-
+    results = []
     for league_url in LEAGUES_TO_SCAN:
-        log(f"INFO: Pobieram listę meczów z ligi: {league_url}")
-        match_links = get_match_links(league_url)
-        if not match_links:
-            # jeśli nie udało się pobrać żadnych linków, odczekaj chwilę i idź dalej
-            time.sleep(random.randint(*SLEEP_BETWEEN_REQUESTS))
-            continue
-
-        for link in match_links:
-            details = parse_match_page(link)
-            if not details or not details.get("match_id"):
-                log(f"[DEBUG] Brak danych z parse_match_page dla: {link}")
-                time.sleep(random.randint(*SLEEP_BETWEEN_REQUESTS))
+        results.extend(await scrape_league(league_url))
+    for line in proxy_manager.format_stats().splitlines():
+        log(line)
+    return results
+
+# ————————————
+# Główna pętla “ciągłego skanowania”
+# ————————————
+async def _main_async():
+    log("START BOTA STS (ciągłe skanowanie + zapisywanie do bazy kursów)")
+    interval = float(config.get('scraping', 'interval', default=60))
+    try:
+        while True:
+            if await scrape_all():
                 continue
+            # nic nie pobrano (listy lig z cache, harmonogram bez zaległych meczów) –
+            # bez czekania pętla kręciłaby się bez żadnego await, który naprawdę usypia
+            due = sts_scheduler.next_due()
+            wait = interval if due is None else min(interval, max(1.0, due))
+            log(f"INFO: Brak zaległych meczów – następny przebieg za {wait:.0f}s")
+            await asyncio.sleep(wait)
+    finally:
+        await browser_pool.close()
 
-            # Log podstawowych informacji o meczu
-            log_msg = (
-                f"INFO: [{details['match_id']}] {details['match_name']} | "
-                f"{details['sport']} | {details['competition']}"
-            )
-            if details["datetime"]:
-                log_msg += f" | {details['datetime'].strftime('%d.%m.%Y %H:%M')}"
-            else:
-                log_msg += " | data/godzina nieznana"
-            log(log_msg)
+def main():
+    asyncio.run(_main_async())
 
-            # Jeśli są jakieś rynki/ kursy, pokaż je w logu
-            if details.get("markets"):
-                for m in details["markets"]:
-                    log(f"    - {m['market']} / {m['selection']} @ {m['odds']}")
-            else:
-                log("    Brak rynków / kursów na stronie meczu")
-
-            # Zapisz dane meczu do pliku CSV (podmiana starszych wierszy, usunięcie wpisów starszych niż 24h)
-            append_match_to_csv(details, OUT_CSV_FILE)
-
-            # Odnotuj, że ten match_id był zeskanowany w tej iteracji
-            scanned_matches[details["match_id"]] = datetime.now()
-            scan_count += 1
-
-            # Po pewnej liczbie skanów zrób dłuższą pauzę
-            if scan_count >= SCAN_LIMIT_BEFORE_PAUSE:
-                pause = random.randint(*PAUSE_TIME_RANGE)
-                log(f"PAUSE: Pauza na {pause}s po {SCAN_LIMIT_BEFORE_PAUSE} skanach")
-                time.sleep(pause)
-                scan_count = 0
-
-            # Krótka pauza między kolejnymi meczami
-            time.sleep(random.randint(*SLEEP_BETWEEN_REQUESTS))
-
-        # Po zakończeniu przetwarzania jednej ligi, usuń z scanned_matches te match_id,
-        # które były zeskanowane ponad MATCH_SKIP_TIME sekund temu,
-        # aby w przyszłości mogły być pobrane ponownie
-        now = datetime.now()
-        for key, ts in list(scanned_matches.items()):
-            if (now - ts).seconds > MATCH_SKIP_TIME:
-                del scanned_matches[key]
+async def _main_scrape_async():
+    try:
+        return await scrape_all()
+    finally:
+        # Jednorazowy przebieg zakończony – zwalniamy przeglądarkę z puli
+        await browser_pool.close()
+
+def main_scrape(bot):
+    """
+    Jednorazowy przebieg skanowania wszystkich lig (patrz scrape_all).
+    """
+    print("[scraper_sts] ► START sts_main_scrape()", flush=True)
+    log("START BOTA STS (jednorazowe skanowanie + zapisywanie do bazy kursów)")
+    return asyncio.run(_main_scrape_async())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# modules/scraper_worker.py
+
+import asyncio
+import importlib
+import itertools
+import threading
+import traceback
+
+# priorytety zleceń w kolejce workera (mniejszy – wcześniej)
+PRIORITY_HOT = 0       # hot_poll – mecze blisko arbitrażu, przed czekającymi ligami
+PRIORITY_LEAGUE = 1
+
+
+class ScraperWorker:
+    """
+    Rezydentny scraper jednego bukmachera.
+    Moduł scrapera (Playwright, BeautifulSoup, config.yaml, ProxyManager, przeglądarka)
+    ładowany jest RAZ na cały czas życia bota – w osobnym wątku z własną pętlą asyncio,
+    żeby zapis CSV/logów scrapera nie blokował pętli Discorda.
+    Zlecenia („scrapuj ligę X”, hot_poll) trafiają do asyncio.PriorityQueue i obsługuje je
+    `consumers` równoległych konsumentów (w obrębie ligi równoległość pilnuje ScrapeEngine
+    scrapera) – hot_poll nigdy nie idzie obok zleceń ponad limit konsumentów.
+    """
+
+    def __init__(self, name, module_name, consumers=1, log=print):
+        self.name = name
+        self.module_name = module_name
+        self.consumers = max(1, int(consumers))
+        self.log = log
+        self.module = None
+        self._thread = None
+        self._loop = None
+        self._queue = None
+        self._consumer_tasks = []
+        self._start_error = None
+        self._seq = itertools.count()   # kolejność zleceń o tym samym priorytecie
+
+    # ————————————
+    # Wątek roboczy
+    # ————————————
+    def _run(self, ready: threading.Event):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        try:
+            self.module = importlib.import_module(self.module_name)
+            self._queue = asyncio.PriorityQueue()
+            self._consumer_tasks = [loop.create_task(self._consume()) for _ in range(self.consumers)]
+        except Exception as e:
+            self._start_error = e
+            traceback.print_exc()
+            ready.set()
+            loop.close()
+            return
+
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(self._shutdown())
+            loop.close()
+
+    async def _consume(self):
+        while True:
+            _, _, make_job, result = await self._queue.get()
+            try:
+                if result.cancelled():
+                    continue
+                job = asyncio.ensure_future(make_job())
+                result.add_done_callback(lambda f, job=job: job.cancel() if f.cancelled() else None)
+                try:
+                    await asyncio.wait({job})
+                except asyncio.CancelledError:
+                    job.cancel()
+                    raise
+                if result.done():
+                    continue
+                if job.cancelled():
+                    result.cancel()
+                elif job.exception() is not None:
+                    result.set_exception(job.exception())
+                else:
+                    result.set_result(job.result())
+            finally:
+                self._queue.task_done()
+
+    async def _enqueue(self, make_job, priority: int):
+        result = self._loop.create_future()
+        await self._queue.put((priority, next(self._seq), make_job, result))
+        return await result
+
+    async def _submit(self, make_job, priority: int):
+        # z pętli bota do pętli workera; anulowanie po stronie bota anuluje zlecenie
+        fut = asyncio.run_coroutine_threadsafe(self._enqueue(make_job, priority), self._loop)
+        try:
+            return await asyncio.wrap_future(fut)
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+
+    async def _shutdown(self):
+        for task in self._consumer_tasks:
+            task.cancel()
+        await asyncio.gather(*self._consumer_tasks, return_exceptions=True)
+        # przeglądarka i pule połączeń HTTP modułu scrapera
+        for name in ("http_client", "browser_pool"):
+            pool = getattr(self.module, name, None)
+            if pool is not None:
+                try:
+                    await pool.close()
+                except Exception:
+                    pass
+
+    # ————————————
+    # API dla pętli bota
+    # ————————————
+    async def start(self):
+        if self._thread is not None:
+            return
+        ready = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(ready,), name=f"scraper-{self.name}", daemon=True
+        )
+        self._thread.start()
+        await asyncio.to_thread(ready.wait)
+        if self._start_error is not None:
+            self._thread = None
+            raise RuntimeError(f"Nie udało się uruchomić workera {self.name}: {self._start_error}")
+        self.log(f"[WORKER] {self.name}: moduł {self.module_name} załadowany, worker gotowy")
+
+    async def scrape_league(self, league_url: str):
+        """
+        Zleca scrapowanie jednej ligi i czeka na wynik (lista słowników meczów).
+        Anulowanie tego coroutine anuluje zlecenie w wątku workera.
+        """
+        return await self._submit(lambda: self.module.scrape_league(league_url), PRIORITY_LEAGUE)
+
+    async def scrape_all(self):
+        """
+        Zleca wszystkie ligi z LEAGUES_TO_SCAN modułu scrapera i zwraca listę meczów.
+        """
+        results = await asyncio.gather(
+            *(self.scrape_league(url) for url in self.module.LEAGUES_TO_SCAN),
+            return_exceptions=True,
+        )
+        matches = []
+        for url, res in zip(self.module.LEAGUES_TO_SCAN, results):
+            if isinstance(res, asyncio.CancelledError):
+                raise res
+            if isinstance(res, Exception):
+                self.log(f"[WORKER-ERROR] {self.name}: liga {url}: {res}")
+                continue
+            matches.extend(res or [])
+        return matches
+
+    async def hot_poll(self):
+        """
+        Odświeżenie meczów z listy obserwowanych (hot_poll modułu scrapera). Idzie przez
+        kolejkę workera przed czekającymi ligami – nie czeka na cały przebieg, ale też nie
+        biegnie równolegle ze scrape_league ponad liczbę konsumentów. Zwraca listę meczów.
+        """
+        if self._thread is None or not hasattr(self.module, "hot_poll"):
+            return []
+        return await self._submit(self.module.hot_poll, PRIORITY_HOT)
+
+    async def stop(self):
+        """
+        Zatrzymuje pętlę workera (anuluje konsumentów, zamyka przeglądarkę) i czeka na wątek.
+        """
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        await asyncio.to_thread(self._thread.join)
+        self._thread = None
+        self.log(f"[WORKER] {self.name}: zatrzymany")
@@ -0,0 +1,13 @@
+# modules/stats_helpers.py
+
+
+def percentile(values, pct):
+    """
+    Percentyl `pct` (najbliższa próbka) albo None, gdy próbek brak.
+    Używany przez statystyki stron (PageStats) i proxy (ProxyManager).
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
@@ -0,0 +1,7 @@
+# tests/conftest.py
+
+import os
+import sys
+
+# testy importują moduły tak jak bot.py: `from modules.xxx import ...`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,74 @@
+# tests/test_arbitrage.py
+
+import random
+
+import pytest
+
+from modules.arbitrage import compute_profit_with_tax, compute_surebets, score_outcomes
+
+
+def test_score_outcomes_matches_scalar_profit_on_random_odds():
+    rng = random.Random(7)
+    rows = [(round(rng.uniform(1.01, 15.0), 2), round(rng.uniform(1.01, 15.0), 2)) for _ in range(2000)]
+    profits, stakes = score_outcomes(rows)
+    assert profits == [compute_profit_with_tax(a, b) for a, b in rows]
+    assert stakes.shape == (2000, 2)
+    assert stakes.sum(axis=1) == pytest.approx(100.0)
+
+
+def test_score_outcomes_three_way_pays_the_same_on_every_outcome():
+    profits, stakes = score_outcomes([[2.9, 3.9, 4.2]])
+    payouts = stakes[0] * [2.9 * 0.88, 3.9 * 0.88, 4.2 * 0.88]
+    assert payouts == pytest.approx([payouts[0]] * 3)
+    assert profits[0] == round(payouts[0] - 100, 2)
+
+
+def dataset(book, kickoff, matches):
+    """Zbiór w formacie load_csv: {match_id: wpis} z listy (mid, nazwa, [(rynek, selekcja, kurs)])."""
+    return {
+        mid: {
+            "match_name": name,
+            "datetime":   kickoff,
+            "sport":      "Piłka nożna",
+            "league":     "Kwalifikacje MŚ-Europa",
+            "markets":    [{"market": m, "selection": s, "odds": o, "bookmaker": book} for m, s, o in rows],
+        }
+        for mid, name, rows in matches
+    }
+
+
+def test_compute_surebets_on_small_dataset():
+    kickoff = "2025-06-06T20:45:00"
+    sts = dataset("STS", kickoff, [
+        ("NOWŁ06062045", "Norwegia - Włochy", [
+            ("liczba goli", "powyżej 2.5", 2.45), ("liczba goli", "poniżej 2.5", 1.55),
+            ("mecz", "norwegia", 2.65), ("mecz", "x", 3.40), ("mecz", "włochy", 2.65),
+        ]),
+        ("ESIZ06062045", "Estonia - Izrael", [
+            ("obie drużyny strzelą gola", "tak", 1.80), ("obie drużyny strzelą gola", "nie", 1.95),
+        ]),
+        # mecz tylko u STS – nigdy nie jest surebetem
+        ("WALI06062045", "Walia - Liechtenstein", [
+            ("liczba goli", "powyżej 3.5", 9.0), ("liczba goli", "poniżej 3.5", 9.0),
+        ]),
+    ])
+    fortuna = dataset("Fortuna", kickoff, [
+        ("NOWŁ06062045", "Norwegia - Włochy", [
+            ("liczba goli", "+ 2.5", 1.70), ("liczba goli", "- 2.5", 2.40),
+            ("1.połowa", "norwegia", 3.2), ("1.połowa", "remis", 2.2), ("1.połowa", "włochy", 3.2),
+        ]),
+        ("ESIZ06062045", "Estonia - Izrael", [
+            ("obie drużyny strzelą gola", "tak", 1.85), ("obie drużyny strzelą gola", "nie", 1.90),
+        ]),
+    ])
+
+    surebets = compute_surebets(sts, fortuna)
+
+    assert [(sb["match_id"], sb["submarket"]) for sb in surebets] == [("NOWŁ06062045", "over_under:2.5")]
+    sb = surebets[0]
+    assert sb["profit"] == compute_profit_with_tax(2.45, 2.40)
+    assert [(b["selection"], b["bookmaker"], b["odds"]) for b in sb["bets"]] == [
+        ("over", "STS", 2.45), ("under", "Fortuna", 2.40),
+    ]
+    assert sum(b["stake"] for b in sb["bets"]) == pytest.approx(100.0, abs=0.02)
+    assert sb["datetime"] == "2025-06-06 20:45:00"
@@ -0,0 +1,154 @@
+# tests/test_arbitrage_engine.py
+
+from datetime import datetime, timedelta
+
+from modules.arbitrage_engine import ArbitrageEngine
+
+KICKOFF = datetime(2026, 10, 20, 18, 0)
+
+
+def entry(book, rows, kickoff=KICKOFF):
+    """Wpis meczu w formacie load_csv/match_to_entry z listy (rynek, selekcja, kurs)."""
+    return {
+        "match_name": "Legia - Lech",
+        "datetime":   kickoff.strftime("%Y-%m-%dT%H:%M:%S"),
+        "sport":      "piłka nożna",
+        "league":     "Ekstraklasa",
+        "markets":    [{"market": m, "selection": s, "odds": o, "bookmaker": book} for m, s, o in rows],
+    }
+
+
+def test_update_reports_new_surebet_once():
+    engine = ArbitrageEngine()
+    assert engine.update("STS", "m1", entry("STS", [("liczba goli", "powyżej 2.5", 2.5)])) == ([], [])
+
+    changed, closed = engine.update("Fortuna", "m1", entry("Fortuna", [("liczba goli", "poniżej 2.5", 2.6)]))
+    assert [sb["submarket"] for sb in changed] == ["over_under:2.5"]
+    assert closed == []
+    assert {b["bookmaker"] for b in changed[0]["bets"]} == {"STS", "Fortuna"}
+
+    # te same kursy – surebet nie jest zgłaszany ponownie
+    assert engine.update("Fortuna", "m1", entry("Fortuna", [("liczba goli", "poniżej 2.5", 2.6)])) == ([], [])
+
+
+def test_update_closes_surebet_when_odds_drop():
+    engine = ArbitrageEngine()
+    engine.update("STS", "m1", entry("STS", [("liczba goli", "powyżej 2.5", 2.5)]))
+    engine.update("Fortuna", "m1", entry("Fortuna", [("liczba goli", "poniżej 2.5", 2.6)]))
+
+    changed, closed = engine.update("Fortuna", "m1", entry("Fortuna", [("liczba goli", "poniżej 2.5", 1.5)]))
+    assert changed == []
+    assert closed == [("m1", "over_under:2.5")]
+    assert engine.best_profit("m1") is None
+
+
+def test_near_miss_goes_to_watchlist():
+    engine = ArbitrageEngine(near_margin=15)
+    engine.update("STS", "m1", entry("STS", [("obie drużyny strzelą gola", "tak", 2.0)]))
+    changed, _ = engine.update("Fortuna", "m1", entry("Fortuna", [("obie drużyny strzelą gola", "nie", 2.0)]))
+    assert changed == []
+    assert [sb["submarket"] for sb in engine.watchlist()] == ["btts"]
+    assert engine.best_profit("m1") < 0
+
+
+def test_remove_drops_all_state():
+    engine = ArbitrageEngine()
+    engine.update("STS", "m1", entry("STS", [("liczba goli", "powyżej 2.5", 2.5)]))
+    engine.update("Fortuna", "m1", entry("Fortuna", [("liczba goli", "poniżej 2.5", 2.6)]))
+    engine.remove("m1")
+    assert engine.best_profit("m1") is None
+    # po usunięciu mecz zaczyna od zera – jeden bukmacher to jeszcze nie surebet
+    assert engine.update("STS", "m1", entry("STS", [("liczba goli", "powyżej 2.5", 2.5)])) == ([], [])
+
+
+def test_prune_removes_old_matches_and_reports_closed_surebets():
+    engine = ArbitrageEngine()
+    old = KICKOFF - timedelta(hours=5)
+    engine.update("STS", "old", entry("STS", [("liczba goli", "powyżej 2.5", 2.5)], old))
+    engine.update("Fortuna", "old", entry("Fortuna", [("liczba goli", "poniżej 2.5", 2.6)], old))
+    engine.update("STS", "new", entry("STS", [("liczba goli", "powyżej 2.5", 2.5)]))
+
+    removed, closed = engine.prune(KICKOFF - timedelta(hours=3))
+    assert removed == ["old"]
+    assert closed == [("old", "over_under:2.5")]
+    assert engine.best_profit("old") is None
+    assert engine.prune(KICKOFF - timedelta(hours=3)) == ([], [])
+
+
+def test_patch_replaces_only_given_offers():
+    engine = ArbitrageEngine()
+    engine.update("STS", "m1", entry("STS", [("liczba goli", "powyżej 2.5", 2.5), ("mecz", "1", 2.0)]))
+    engine.patch("Etoto", "m1", entry("Etoto", [("liczba goli", "poniżej 2.5", 1.5), ("mecz", "x", 3.0)]))
+
+    changed, _ = engine.patch("Etoto", "m1", entry("Etoto", [("liczba goli", "poniżej 2.5", 2.6)]))
+    assert [sb["submarket"] for sb in changed] == ["over_under:2.5"]
+    # klucz "1x2"/"x" Etoto został – delta nie czyści reszty ofert
+    assert engine._offers["m1"]["Etoto"][("1x2", "x")] == [("Etoto", 3.0)]
+
+    changed, closed = engine.patch("Etoto", "m1", entry("Etoto", []), removed=[("over_under:2.5", "under")])
+    assert changed == []
+    assert closed == [("m1", "over_under:2.5")]
+
+
+def test_patch_removing_last_offer_drops_the_bookmaker():
+    engine = ArbitrageEngine()
+    engine.update("STS", "m1", entry("STS", [("liczba goli", "powyżej 2.5", 2.5)]))
+    engine.patch("Etoto", "m1", entry("Etoto", [("liczba goli", "poniżej 2.5", 2.6)]))
+    _, closed = engine.patch("Etoto", "m1", {"markets": []}, removed=[["over_under:2.5", "under"]])
+    assert closed == [("m1", "over_under:2.5")]
+    assert "Etoto" not in engine._offers["m1"]
+    # sam bukmacher-delta bez żadnych ofert usuwa mecz w całości
+    engine.remove("m1")
+    engine.patch("Etoto", "m2", entry("Etoto", [("mecz", "1", 2.0)]))
+    assert engine.patch("Etoto", "m2", {"markets": []}, removed=[("1x2", "1")]) == ([], [])
+    assert "m2" not in engine._offers
+
+
+def test_live_odds_are_not_combined_with_frozen_pre_match_odds():
+    kickoff = datetime.now() - timedelta(minutes=30)
+    engine = ArbitrageEngine()
+    # kursy STS pobrane przed startem meczu
+    engine.update("STS", "m1", entry("STS", [("liczba goli", "powyżej 2.5", 2.5)], kickoff),
+                  updated=kickoff - timedelta(minutes=5))
+    changed, _ = engine.patch("Etoto", "m1", entry("Etoto", [("liczba goli", "poniżej 2.5", 2.6)], kickoff), live=True)
+    assert changed == []
+    assert engine.best_profit("m1") is None
+
+    # STS odświeżone już w trakcie meczu – można zestawić z live
+    changed, _ = engine.update("STS", "m1", entry("STS", [("liczba goli", "powyżej 2.5", 2.5)], kickoff))
+    assert [sb["submarket"] for sb in changed] == ["over_under:2.5"]
+
+
+def test_load_treats_stored_odds_as_pre_match():
+    kickoff = datetime.now() - timedelta(minutes=30)
+    engine = ArbitrageEngine()
+    engine.load("STS", {"m1": entry("STS", [("liczba goli", "powyżej 2.5", 2.5)], kickoff)})
+    assert engine.patch("Etoto", "m1", entry("Etoto", [("liczba goli", "poniżej 2.5", 2.6)], kickoff), live=True)[0] == []
+
+
+def test_live_etoto_pairs_with_scheduler_refreshed_sts():
+    # wybrany wariant: STS/Fortuna odświeżają mecze, które Etoto oznacza jako live
+    from modules.match_scheduler import DEFAULT_SCHEDULER_SETTINGS, MatchScheduler, NearBoard
+
+    kickoff = datetime.now() - timedelta(minutes=20)
+    board = NearBoard()
+    sts = MatchScheduler("STS", DEFAULT_SCHEDULER_SETTINGS, board=board, log=lambda msg: None)
+    engine = ArbitrageEngine()
+
+    sts.register("liga", ["https://www.sts.pl/kursy/legia-lech/1"])
+    sts.take("liga")
+    engine.update("STS", "m1", entry("STS", [("zakład bez remisu", "legia", 1.7)], kickoff),
+                  updated=kickoff - timedelta(minutes=5))
+    sts.record("https://www.sts.pl/kursy/legia-lech/1", "m1", kickoff)
+
+    # Etoto live – main_loop oznacza mecz w near_board
+    changed, _ = engine.patch("Etoto", "m1", entry("Etoto", [("zakład bez remisu", "lech", 3.6)], kickoff), live=True)
+    assert changed == []
+    board.set_live("m1", True)
+
+    sts._entries["https://www.sts.pl/kursy/legia-lech/1"]["last_fetch"] = 0
+    assert sts.take("liga") == ["https://www.sts.pl/kursy/legia-lech/1"]
+    changed, _ = engine.update("STS", "m1", entry("STS", [("zakład bez remisu", "legia", 1.7)], kickoff))
+    assert [(sb["submarket"], sorted(b["bookmaker"] for b in sb["bets"])) for sb in changed] == [
+        ("dnb", ["Etoto", "STS"]),
+    ]
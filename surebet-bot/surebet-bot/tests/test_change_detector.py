@@ -0,0 +1,43 @@
+# tests/test_change_detector.py
+
+from modules.change_detector import ChangeDetector, fingerprint
+
+
+def test_fingerprint_ignores_key_order():
+    assert fingerprint({"a": 1, "b": [1, 2]}) == fingerprint({"b": [1, 2], "a": 1})
+    assert fingerprint({"a": 1}) != fingerprint({"a": 2})
+
+
+def test_fingerprint_hashes_raw_bytes_without_decoding():
+    body = b'{"odds": 1.85}'
+    assert fingerprint(body) == fingerprint(bytearray(body))
+    assert fingerprint(body) != fingerprint(b'{"odds": 1.90}')
+    # bajty nie są dekodowane – inny zapis tego samego JSON-a to inna treść
+    assert fingerprint(b'{"odds":1.85}') != fingerprint(body)
+
+
+def test_changed_only_when_payload_differs():
+    det = ChangeDetector("STS")
+    assert det.changed("m1", b"v1") is True
+    assert det.changed("m1", b"v1") is False
+    assert det.changed("m1", b"v2") is True
+    assert det.changed("m2", b"v2") is True
+    assert (det.hits, det.misses) == (1, 3)
+
+
+def test_refresh_after_lets_unchanged_match_through():
+    det = ChangeDetector("STS", refresh_after=0)
+    assert det.changed("m1", {"odds": 2.0}) is True
+    assert det.changed("m1", {"odds": 2.0}) is True
+
+
+def test_forget_and_max_entries():
+    det = ChangeDetector("Fortuna", max_entries=2)
+    det.changed("m1", b"a")
+    det.changed("m2", b"b")
+    det.forget("m2")
+    assert det.changed("m2", b"b") is True
+    # trzeci mecz wypycha najstarszy wpis
+    det.changed("m3", b"c")
+    assert det.changed("m1", b"a") is True
+    assert det.changed("m3", b"c") is False
@@ -0,0 +1,52 @@
+# tests/test_dom_extract.py
+
+import asyncio
+import csv
+import os
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from benchmarks.dom_extract_bench import DEFAULT_FIXTURES, EXTRACTORS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MATCH_ID = "NOWŁ06062045"
+
+
+def csv_rows(name, market_key, selection_key):
+    with open(os.path.join(ROOT, name), encoding="utf-8") as f:
+        return [(r[market_key].lower(), r[selection_key], r["odds"])
+                for r in csv.DictReader(f) if r["match_id"] == MATCH_ID]
+
+
+async def _extract_all():
+    from playwright.async_api import async_playwright
+
+    results = {}
+    async with async_playwright() as pw:
+        try:
+            browser = await pw.chromium.launch(headless=True)
+        except Exception as e:
+            pytest.skip(f"brak przeglądarki Chromium: {e}")
+        page = await browser.new_page()
+        for bookmaker, path in DEFAULT_FIXTURES:
+            with open(path, encoding="utf-8") as f:
+                await page.set_content(f.read())
+            by_element, single_eval = EXTRACTORS[bookmaker]
+            results[bookmaker] = (await by_element(page), await single_eval(page))
+        await browser.close()
+    return results
+
+
+def test_single_evaluate_matches_element_loop_on_fixtures():
+    results = asyncio.run(_extract_all())
+
+    old, new = results["sts"]
+    assert new == old
+    assert [(m["market"], m["selection"], m["odds"]) for m in new] == csv_rows("sts_data.csv", "market", "selection")
+
+    old, new = results["fortuna"]
+    assert new == old
+    assert [(m["market_raw"], m["selection"], m["odds"]) for m in new] == \
+        csv_rows("fortuna_data.csv", "market_name", "outcome")
@@ -0,0 +1,76 @@
+# tests/test_etoto_feed.py
+
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("httpx")   # etoto_feed -> http_client
+
+from modules.etoto_feed import EtotoFeed, event_offers
+from modules.event_index import EventIndex
+
+KICKOFF = (datetime.now() - timedelta(minutes=20)).replace(microsecond=0)
+
+
+def event(event_id, outcomes, name=("Legia", "Lech"), start=KICKOFF):
+    """Wydarzenie w formacie API Etoto; outcomes: (rynek, argument, wynik, kurs)."""
+    games = {}
+    for market, argument, outcome, odds in outcomes:
+        game = games.setdefault((market, argument), {"gameName": market, "argument": argument, "outcomes": []})
+        game["outcomes"].append({"outcomeName": outcome, "outcomeOdds": odds})
+    return {
+        "eventId":         event_id,
+        "participants":    [{"participantName": name[0]}, {"participantName": name[1]}],
+        "eventStart":      start.isoformat() if start else None,
+        "sportName":       "Piłka nożna",
+        "competitionName": "Ekstraklasa",
+        "games":           list(games.values()),
+    }
+
+
+@pytest.fixture
+def feed(tmp_path):
+    index = EventIndex(str(tmp_path / "odds.db"), log=lambda msg: None)
+    yield EtotoFeed({"enabled": True}, None, None, index, log=lambda msg: None)
+    index.close()
+
+
+def test_event_offers_keeps_normalized_keys_and_best_odds():
+    offers = event_offers(event(1, [
+        ("Liczba goli", 2.5, "Powyżej", 1.9),
+        ("Liczba goli", 2.5, "Poniżej", "1.95"),
+        ("Powyżej/Poniżej", 2.5, "Powyżej", 2.0),     # ten sam klucz – zostaje wyższy kurs
+        ("Mecz", None, "1", 1.0),                     # kurs 1.0 – pomijany
+        ("Strzelec gola", None, "Lewandowski", 3.0),  # rynek spoza normalizatora
+    ]))
+    assert set(offers) == {("over_under:2.5", "over"), ("over_under:2.5", "under")}
+    assert offers[("over_under:2.5", "over")] == ("powyżej/poniżej", "powyżej 2.5", 2.0)
+
+
+def test_diff_sends_only_changed_and_removed_outcomes(feed):
+    first = feed._diff({"games": [event(1, [("Liczba goli", 2.5, "Powyżej", 1.9), ("Mecz", None, "1", 2.1)])]})
+    assert len(first) == 1
+    assert first[0]["live"] is True and first[0]["delta"] is True
+    assert first[0]["datetime"] == KICKOFF.strftime("%Y-%m-%dT%H:%M:%S")
+    assert len(first[0]["markets"]) == 2 and first[0]["removed"] == []
+
+    # bez zmian – brak delt
+    assert feed._diff({"games": [event(1, [("Liczba goli", 2.5, "Powyżej", 1.9), ("Mecz", None, "1", 2.1)])]}) == []
+
+    delta = feed._diff({"games": [event(1, [("Liczba goli", 2.5, "Powyżej", 2.0)])]})
+    assert delta[0]["match_id"] == first[0]["match_id"]
+    assert delta[0]["markets"] == [{"market": "liczba goli", "selection": "powyżej 2.5", "odds": 2.0}]
+    assert delta[0]["removed"] == [("1x2", "1")]
+
+
+def test_diff_withdraws_events_that_left_the_feed(feed):
+    first = feed._diff({"games": [event(1, [("Mecz", None, "1", 2.1)]),
+                                  event(2, [("Mecz", None, "2", 3.0)], name=("Wisła", "Cracovia"))]})
+    assert len(first) == 2
+    gone = feed._diff({"games": [event(1, [("Mecz", None, "1", 2.1)])]})
+    assert gone == [{"match_id": first[1]["match_id"], "markets": [], "removed": [("1x2", "2")],
+                     "delta": True, "live": True}]
+
+
+def test_diff_skips_events_without_start(feed):
+    assert feed._diff({"games": [event(1, [("Mecz", None, "1", 2.1)], start=None)]}) == []
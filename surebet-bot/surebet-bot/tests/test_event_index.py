@@ -0,0 +1,61 @@
+# tests/test_event_index.py
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from modules.event_index import EventIndex, normalize_team, team_qualifiers, team_similarity
+
+KICKOFF = datetime(2026, 10, 20, 18, 0)
+
+
+@pytest.fixture
+def index(tmp_path):
+    idx = EventIndex(str(tmp_path / "odds.db"), log=lambda msg: None)
+    yield idx
+    idx.close()
+
+
+def test_normalize_team_keeps_qualifiers():
+    assert normalize_team("Macedonia Płn.") == "macedonia polnocna"
+    assert normalize_team("CA San Telmo") == "san telmo"
+    assert normalize_team("Polska U-21") == "polska u21"
+    assert normalize_team("Polska (K)") == "polska women"
+    assert normalize_team("Legia II Warszawa") == "legia ii warszawa"
+    assert team_qualifiers(normalize_team("Polska U21")) == {"u21"}
+    assert team_qualifiers(normalize_team("Polska")) == frozenset()
+
+
+def test_similarity_requires_equal_qualifiers():
+    assert team_similarity("polska", "polska u21") == 0.0
+    assert team_similarity("polska women", "polska") == 0.0
+    assert team_similarity("polska u21", "polska u20") == 0.0
+    assert team_similarity("legia warszawa", "legia warszawa") == 1.0
+
+
+def test_same_event_from_two_bookmakers(index):
+    first = index.resolve("Legia Warszawa - Lech Poznań", KICKOFF)
+    assert index.resolve("Legia Warszawa - Lech Poznan", KICKOFF + timedelta(minutes=5)) == first
+
+
+def test_youth_women_and_reserve_teams_do_not_collide(index):
+    ids = {
+        index.resolve(name, KICKOFF)
+        for name in ("Polska - Niemcy", "Polska U21 - Niemcy U21", "Polska (K) - Niemcy (K)", "Polska II - Niemcy II")
+    }
+    assert len(ids) == 4
+    assert index.resolve("Polska U-21 - Niemcy U-21", KICKOFF) == index.resolve("Polska U21 - Niemcy U21", KICKOFF)
+
+
+def test_different_kickoff_is_a_different_event(index):
+    assert index.resolve("Polska - Niemcy", KICKOFF) != index.resolve("Polska - Niemcy", KICKOFF + timedelta(hours=3))
+
+
+def test_events_survive_restart(tmp_path):
+    path = str(tmp_path / "odds.db")
+    first = EventIndex(path, log=lambda msg: None)
+    event_id = first.resolve("Legia Warszawa - Lech Poznań", KICKOFF)
+    first.close()
+    second = EventIndex(path, log=lambda msg: None)
+    assert second.resolve("Legia Warszawa - Lech Poznań", KICKOFF) == event_id
+    second.close()
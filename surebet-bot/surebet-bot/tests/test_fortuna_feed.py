@@ -0,0 +1,157 @@
+# tests/test_fortuna_feed.py
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
+from modules.fortuna_feed import DEFAULT_FEED_SETTINGS, FortunaFeed
+
+LEAGUE = "https://www.efortuna.pl/zaklady-bukmacherskie/pilka-nozna"
+ODDS_URL = "https://www.efortuna.pl/api/offer/league/123"
+MENU_URL = "https://www.efortuna.pl/api/menu"
+
+
+def league_payload(odds=2.1):
+    return {"competition": {"competitionName": "Kwalifikacje MŚ-Europa", "events": [{
+        "eventName": "Norwegia - Włochy",
+        "eventStart": "2026-10-20T20:45:00",
+        "markets": [{"name": "Spotkanie bez remisu",
+                     "outcomes": [{"name": "Norwegia", "value": odds}, {"name": "Włochy", "value": 1.9}]}],
+    }]}}
+
+
+class FakeXhr:
+    def __init__(self, url, resource_type="xhr", content_type="application/json"):
+        self.url = url
+        self.headers = {"content-type": content_type}
+        self.request = type("Request", (), {"resource_type": resource_type})()
+
+    async def body(self):
+        return b"{}"
+
+
+class FakePage:
+    """Karta, która przy goto() „odbiera” zadane odpowiedzi XHR."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.listeners = []
+
+    def on(self, event, fn):
+        self.listeners.append(fn)
+
+    def remove_listener(self, event, fn):
+        self.listeners.remove(fn)
+
+    async def goto(self, url, timeout=None):
+        for response in self.responses:
+            for fn in list(self.listeners):
+                fn(response)
+
+    async def wait_for_load_state(self, state, timeout=None):
+        pass
+
+
+class FakeBrowserPool:
+    def __init__(self, responses):
+        self.responses = responses
+        self.opened = 0
+
+    @asynccontextmanager
+    async def page(self, request_kwargs=None):
+        self.opened += 1
+        yield FakePage(self.responses)
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.content = json.dumps(payload).encode("utf-8")
+        self.status_code = status_code
+        self.elapsed = timedelta(milliseconds=120)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeHttpClient:
+    def __init__(self, payloads):
+        self.payloads = payloads     # url -> payload albo wyjątek
+        self.calls = []
+
+    async def get(self, url, request_kwargs=None, headers=None, timeout=None):
+        self.calls.append((url, headers))
+        payload = self.payloads[url]
+        if isinstance(payload, Exception):
+            raise payload
+        return payload if isinstance(payload, FakeResponse) else FakeResponse(payload)
+
+
+def make_feed(http, responses=None):
+    reports = []
+    pool = FakeBrowserPool(responses if responses is not None else [
+        FakeXhr(ODDS_URL), FakeXhr(MENU_URL),
+        FakeXhr("https://www.efortuna.pl/static/app.js", resource_type="script"),
+        FakeXhr("https://www.efortuna.pl/api/banner", content_type="text/html"),
+    ])
+    feed = FortunaFeed(pool, http, dict(DEFAULT_FEED_SETTINGS), log=lambda msg: None,
+                       report=lambda kwargs, status=None, error=None, latency=None:
+                       reports.append((status, type(error).__name__ if error else None, latency)))
+    return feed, pool, reports
+
+
+def test_discovers_json_endpoints_and_keeps_only_useful_ones():
+    http = FakeHttpClient({ODDS_URL: league_payload(), MENU_URL: {"menu": []}})
+    feed, pool, reports = make_feed(http)
+
+    events = asyncio.run(feed.fetch_league(LEAGUE))
+    assert [(e["match_name"], e["competition"]) for e in events] == [("Norwegia - Włochy", "Kwalifikacje MŚ-Europa")]
+    assert events[0]["markets"][0]["market_name"] == "SPOTKANIE BEZ REMISU"
+    assert [url for url, _ in http.calls] == [ODDS_URL, MENU_URL]
+    assert http.calls[0][1]["Accept"] == "application/json"
+    assert reports == [(200, None, 0.12), (200, None, 0.12)]
+
+    # kolejny przebieg: bez odkrywania, tylko endpoint z kursami
+    http.calls.clear()
+    asyncio.run(feed.fetch_league(LEAGUE))
+    assert pool.opened == 1
+    assert [url for url, _ in http.calls] == [ODDS_URL]
+
+
+def test_identical_body_is_not_decoded_again():
+    http = FakeHttpClient({ODDS_URL: league_payload()})
+    feed, _, _ = make_feed(http, [FakeXhr(ODDS_URL)])
+    first = asyncio.run(feed.fetch_league(LEAGUE))
+    second = asyncio.run(feed.fetch_league(LEAGUE))
+    assert second == first
+    assert feed.unchanged == 1
+
+    http.payloads[ODDS_URL] = league_payload(odds=2.3)
+    third = asyncio.run(feed.fetch_league(LEAGUE))
+    assert third[0]["markets"][0]["selections"][0]["odds"] == 2.3
+    assert feed.unchanged == 1
+
+
+def test_failed_endpoints_fall_back_to_playwright_and_are_rediscovered():
+    http = FakeHttpClient({ODDS_URL: FakeResponse({}, status_code=429)})
+    feed, pool, reports = make_feed(http, [FakeXhr(ODDS_URL)])
+    assert asyncio.run(feed.fetch_league(LEAGUE)) is None
+    assert reports == [(429, None, 0.12)]
+
+    http.payloads[ODDS_URL] = ConnectionError("reset")
+    assert asyncio.run(feed.fetch_league(LEAGUE)) is None
+    assert reports[-1] == (None, "ConnectionError", None)
+    # endpointy zapomniane po każdej porażce – ponowne odkrywanie
+    assert pool.opened == 2
+
+
+def test_disabled_feed_does_nothing():
+    http = FakeHttpClient({})
+    feed, pool, _ = make_feed(http)
+    feed.settings["enabled"] = False
+    assert asyncio.run(feed.fetch_league(LEAGUE)) is None
+    assert pool.opened == 0
@@ -0,0 +1,37 @@
+# tests/test_fortuna_html.py
+
+import pytest
+
+pytest.importorskip("bs4")
+
+from benchmarks.fortuna_html_bench import DEFAULT_FIXTURES, PARSERS
+from modules.fortuna_html import parse_event_links, parse_match_header
+
+FIXTURES = dict(DEFAULT_FIXTURES)
+
+
+def read(kind):
+    with open(FIXTURES[kind], encoding="utf-8") as f:
+        return f.read()
+
+
+def test_league_links_from_fixture():
+    links = parse_event_links(read("liga"))
+    assert len(links) == 19
+    assert links[0] == "/zaklady-bukmacherskie/pilka-nozna/kwalifikacje-ms-europa/norwegia-wlochy"
+
+
+def test_match_header_from_fixture():
+    assert parse_match_header(read("mecz")) == {
+        "sport":       "Piłka nożna",
+        "competition": "Kwalifikacje MŚ-Europa",
+        "datetime":    "06.06.2025 20:45",
+        "match_name":  "Norwegia - Włochy",
+    }
+
+
+@pytest.mark.parametrize("kind", ["liga", "mecz"])
+def test_fast_path_matches_full_html_parser(kind):
+    full, fast = PARSERS[kind]
+    html = read(kind)
+    assert fast(html) == full(html)
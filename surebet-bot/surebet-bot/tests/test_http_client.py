@@ -0,0 +1,80 @@
+# tests/test_http_client.py
+
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from modules import http_client
+from modules.http_client import DEFAULT_HTTP_SETTINGS, HttpClient
+
+PROXY = "http://p1:8080"
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    """Klienci httpx z MockTransport zamiast sieci; lista (kwargs konstruktora, klient)."""
+    created = []
+    real_client = httpx.AsyncClient
+
+    def handler(request):
+        return httpx.Response(200, json={"url": str(request.url), "ua": request.headers.get("User-Agent"),
+                                         "accept": request.headers.get("Accept")})
+
+    def factory(**kwargs):
+        client = real_client(transport=httpx.MockTransport(handler),
+                             **{k: v for k, v in kwargs.items() if k not in ("proxy", "http2")})
+        created.append((kwargs, client))
+        return client
+
+    monkeypatch.setattr(http_client.httpx, "AsyncClient", factory)
+    return created
+
+
+def settings(**overrides):
+    return {**DEFAULT_HTTP_SETTINGS, "http2": False, **overrides}
+
+
+def test_one_pooled_client_per_proxy_and_merged_headers(clients):
+    http = HttpClient(settings(), log=lambda msg: None)
+    kwargs = {"headers": {"User-Agent": "UA-1"}, "proxies": {"http": PROXY, "https": PROXY}}
+
+    async def run():
+        first = await http.get("https://www.efortuna.pl/api/a", kwargs, headers={"Accept": "application/json"})
+        await http.get("https://www.efortuna.pl/api/b", kwargs)
+        await http.get("https://www.efortuna.pl/api/c", {"headers": {"User-Agent": "UA-2"}})
+        await http.close()
+        return first
+
+    first = asyncio.run(run())
+    assert first.json() == {"url": "https://www.efortuna.pl/api/a", "ua": "UA-1", "accept": "application/json"}
+    # jedno połączenie (klient) na proxy, osobny bez proxy
+    assert [kw["proxy"] for kw, _ in clients] == [PROXY, None]
+    assert clients[0][0]["follow_redirects"] is True
+
+
+def test_host_limits_and_new_event_loop(clients):
+    http = HttpClient(settings(per_host=4, hosts={"api.etoto.pl": 1}), log=lambda msg: None)
+
+    async def limits():
+        return (http.host_limit("www.efortuna.pl")._value, http.host_limit("api.etoto.pl")._value,
+                http.host_limit("www.efortuna.pl") is http.host_limit("www.efortuna.pl"))
+
+    assert asyncio.run(limits()) == (4, 1, True)
+
+    async def fetch():
+        await http.get("https://www.efortuna.pl/api/a", {})
+
+    asyncio.run(fetch())
+    asyncio.run(fetch())
+    # klienci należą do pętli zdarzeń – po kolejnym asyncio.run() tworzeni od nowa
+    assert len(clients) == 2
+
+
+def test_http2_needs_h2_package(monkeypatch):
+    logged = []
+    monkeypatch.setattr(http_client, "HTTP2_AVAILABLE", False)
+    http = HttpClient(settings(http2=True), log=logged.append)
+    assert http.http2 is False
+    assert logged and "h2" in logged[0]
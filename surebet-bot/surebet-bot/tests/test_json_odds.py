@@ -0,0 +1,57 @@
+# tests/test_json_odds.py
+
+from modules.json_odds import event_match, find_markets
+
+
+def market(name, *outcomes):
+    return {"name": name, "outcomes": [{"name": o, "value": v} for o, v in outcomes]}
+
+
+PAYLOAD = {
+    "event": {
+        "eventId": 810661219,
+        "name": "Niemcy - Francja",
+        "markets": [market("Mecz", ("Niemcy", 2.4), ("X", 3.3), ("Francja", 2.9))],
+    },
+    # „polecane mecze” doklejone do tej samej odpowiedzi
+    "recommended": [
+        {"eventId": 810661571, "name": "Portugalia - Hiszpania",
+         "markets": [market("Mecz", ("Portugalia", 3.1), ("X", 3.2), ("Hiszpania", 2.3))]},
+        {"homeTeam": {"name": "Andora"}, "awayTeam": {"name": "Anglia"},
+         "markets": [market("Zakład bez remisu", ("Andora", 21.0), ("Anglia", 1.01))]},
+    ],
+    # rynek bez żadnego wydarzenia nad nim – nie wiadomo, czyj
+    "promo": market("Liczba goli", ("Powyżej 2.5", 1.9), ("Poniżej 2.5", 1.9)),
+}
+
+
+def names(markets):
+    return [(m["market_name"], [s["outcome"] for s in m["selections"]]) for m in markets]
+
+
+def test_unfiltered_find_markets_returns_every_market():
+    assert len(find_markets(PAYLOAD, "STS")) == 4
+
+
+def test_find_markets_by_event_id():
+    found = find_markets(PAYLOAD, "STS", event_id="810661219")
+    assert names(found) == [("MECZ", ["Niemcy", "X", "Francja"])]
+
+
+def test_find_markets_by_team_names():
+    assert names(find_markets(PAYLOAD, "STS", match_name="Niemcy - Francja")) == [
+        ("MECZ", ["Niemcy", "X", "Francja"]),
+    ]
+    # drużyny jako osobne pola, inna pisownia
+    assert names(find_markets(PAYLOAD, "STS", match_name="ANDORA - Anglia")) == [
+        ("ZAKŁAD BEZ REMISU", ["Andora", "Anglia"]),
+    ]
+    assert find_markets(PAYLOAD, "STS", match_name="Walia - Liechtenstein") == []
+
+
+def test_event_match():
+    assert event_match({"eventId": 1, "name": "A - B"}, event_id="1") is True
+    assert event_match({"eventId": 2, "name": "Niemcy - Francja"}, "Niemcy - Francja", "1") is False
+    assert event_match({"name": "Niemcy - Francja"}, "Niemcy - Francja", "1") is True
+    assert event_match({"eventId": 2}, "Niemcy - Francja") is None
+    assert event_match({"name": "Mecz"}, "Niemcy - Francja") is None
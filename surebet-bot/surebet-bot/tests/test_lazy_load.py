@@ -0,0 +1,31 @@
+# tests/test_lazy_load.py
+
+import asyncio
+import csv
+import os
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from benchmarks.lazy_load_bench import DEFAULT_FIXTURE, TOTAL_GROUPS, observe_mutations, run
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_mutation_loader_renders_every_group_on_fixture():
+    try:
+        info, markets = asyncio.run(run(DEFAULT_FIXTURE, observe_mutations, deadline_ms=60000))
+    except Exception as e:
+        if "Executable doesn't exist" in str(e):
+            pytest.skip(f"brak przeglądarki Chromium: {e}")
+        raise
+    assert info["remaining"] == 0
+    assert info["groups"] == TOTAL_GROUPS
+    # mutacje paska live (poza kontenerem rynków) nie kończą kroków przedwcześnie
+    assert info["steps"] <= info["initial"]
+
+    with open(os.path.join(ROOT, "sts_data.csv"), encoding="utf-8") as f:
+        expected = sorted((r["market"], r["selection"], r["odds"])
+                          for r in csv.DictReader(f) if r["match_id"] == "NOWŁ06062045")
+    assert sorted((m["market"], m["selection"], m["odds"]) for m in markets) == expected
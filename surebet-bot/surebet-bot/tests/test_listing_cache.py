@@ -0,0 +1,86 @@
+# tests/test_listing_cache.py
+
+import pytest
+
+from modules import listing_cache
+from modules.listing_cache import ListingCache
+
+LEAGUE = "https://www.efortuna.pl/zaklady-bukmacherskie/pilka-nozna"
+LINKS = ["/zaklady-bukmacherskie/pilka-nozna/mecz-1", "/zaklady-bukmacherskie/pilka-nozna/mecz-2"]
+
+
+class FakeTime:
+    """Zegar TTL (modules.listing_cache.time) – przesuwany ręcznie."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(listing_cache, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "odds.db")
+
+
+def test_fresh_within_ttl_only(db, clock):
+    cache = ListingCache(db, "Fortuna", ttl=1800)
+    assert cache.fresh(LEAGUE) is None
+    cache.store(LEAGUE, LINKS)
+    clock.now += 1799
+    assert cache.fresh(LEAGUE) == LINKS
+    clock.now += 1
+    assert cache.fresh(LEAGUE) is None
+    # po TTL lista wciąż jest – do żądania warunkowego
+    assert cache.get(LEAGUE)["links"] == LINKS
+
+
+def test_per_league_ttl(db, clock):
+    cache = ListingCache(db, "Fortuna", ttl=1800, league_ttl={LEAGUE: 60})
+    cache.store(LEAGUE, LINKS)
+    cache.store("https://inna-liga", LINKS)
+    clock.now += 61
+    assert cache.fresh(LEAGUE) is None
+    assert cache.fresh("https://inna-liga") == LINKS
+
+
+def test_etag_revalidation_flow(db, clock):
+    cache = ListingCache(db, "Fortuna", ttl=60)
+    assert cache.conditional_headers(cache.get(LEAGUE)) == {}
+
+    cache.store(LEAGUE, LINKS, etag='"abc"', last_modified="Sat, 17 Oct 2026 10:00:00 GMT")
+    clock.now += 120
+    cached = cache.get(LEAGUE)
+    assert cache.conditional_headers(cached) == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Sat, 17 Oct 2026 10:00:00 GMT",
+    }
+    # 304 – stara lista aktualna, TTL liczony od nowa
+    cache.touch(LEAGUE)
+    assert cache.fresh(LEAGUE) == LINKS
+    # 200 z nową treścią i nowym ETag-iem
+    clock.now += 120
+    cache.store(LEAGUE, LINKS[:1], etag='"def"')
+    assert cache.get(LEAGUE)["etag"] == '"def"'
+    assert cache.conditional_headers(cache.get(LEAGUE)) == {"If-None-Match": '"def"'}
+
+
+def test_lists_survive_restart_and_are_per_bookmaker(db, clock):
+    cache = ListingCache(db, "Fortuna")
+    cache.store(LEAGUE, LINKS, etag='"abc"')
+    cache.close()
+
+    reopened = ListingCache(db, "Fortuna")
+    assert reopened.fresh(LEAGUE) == LINKS
+    assert ListingCache(db, "STS").get(LEAGUE) is None
+
+    reopened.invalidate(LEAGUE)
+    assert reopened.get(LEAGUE) is None
@@ -0,0 +1,140 @@
+# tests/test_market_normalizer.py
+
+import pytest
+
+from modules.arbitrage import (
+    best_offers, build_offer_index, compute_surebets, load_csv, parse_offers, surebets_for_match,
+)
+from modules.market_normalizer import market_kind, market_outcomes, normalize, normalize_for_match
+
+
+@pytest.mark.parametrize("market, selection, expected", [
+    # over/under – linia w selekcji, różne zapisy u STS i Fortuny
+    ("Liczba goli", "Powyżej 2.5", ("over_under:2.5", "over")),
+    ("liczba goli", "poniżej 2,5", ("over_under:2.5", "under")),
+    ("Powyżej/Poniżej", "+ 1.5", ("over_under:1.5", "over")),
+    ("1.połowa liczba goli", "mniej 0.5", ("over_under_1h:0.5", "under")),
+    ("Liczba rzutów rożnych", "więcej 9.5", ("corners_over_under:9.5", "over")),
+    # handicap azjatycki – kluczem jest linia gospodarza
+    ("Handicap", "1 (-1.5)", ("handicap:-1.5", "1")),
+    ("Handicap", "2 (+1.5)", ("handicap:-1.5", "2")),
+    ("1. połowa - handicap", "2 (-0.5)", ("handicap_1h:+0.5", "2")),
+    # tak / nie, wynik, bez remisu
+    ("Obie drużyny strzelą gola", "Tak", ("btts", "tak")),
+    ("Mecz", "X", ("1x2", "x")),
+    ("1.połowa", "2", ("1x2_1h", "2")),
+    ("Zakład bez remisu", "1", ("dnb", "1")),
+    # handicap europejski – parametr z nazwy rynku
+    ("Handicap 0:1", "X (0:1)", ("euro_handicap:0:1", "x")),
+])
+def test_normalize_table_markets(market, selection, expected):
+    assert normalize(market, selection) == expected
+
+
+@pytest.mark.parametrize("market, selection", [
+    ("Mecz", "1X"),                          # podwójna szansa w rynku 1x2
+    ("Obie drużyny strzelą gola", "1"),
+    ("Zakład bez remisu", "X"),
+    ("Liczba goli", "dokładnie 2"),
+    ("Handicap", "1 -1.5"),
+    ("Strzelec pierwszego gola", "Lewandowski"),
+])
+def test_normalize_rejects_unknown_selections(market, selection):
+    assert normalize(market, selection) == (None, None)
+
+
+def test_legacy_heuristics_for_markets_outside_table():
+    assert normalize("Gole over/under", "over 3.5") == ("over_under:3.5", "over")
+    assert normalize("Kartki - handicap", "2 (+0.5)") == ("handicap:-0.5", "2")
+    assert normalize("Karny w meczu", "tak") == ("karny w meczu", "tak")
+
+
+def test_exact_goals_markets_are_not_arbitrage_pairs():
+    assert market_kind("dokładna liczba goli") == ("exact_goals", None)
+    assert market_kind("legia dokładna liczba goli") == ("exact_goals_team", None)
+    assert normalize("Dokładna liczba goli", "1") == ("exact_goals", "1")
+    assert market_outcomes("exact_goals") == ()
+    assert market_outcomes("1x2") == ("1", "x", "2")
+    assert market_outcomes("karny w meczu") is None
+
+
+def test_exact_goals_odds_never_make_a_surebet():
+    # "1" i "2" w dokładnej liczbie goli to dwa z wielu wyników – z takimi kursami
+    # para dwuwyborowa dałaby ~60% zysku, ale rynek nie jest do arbitrażu
+    rows = [
+        {"market": "dokładna liczba goli", "selection": "1", "odds": 4.5, "bookmaker": "STS"},
+        {"market": "dokładna liczba goli", "selection": "2", "odds": 4.0, "bookmaker": "Fortuna"},
+        {"market": "2. połowa - dokładna liczba goli", "selection": "1", "odds": 3.2, "bookmaker": "STS"},
+        {"market": "2.połowa: dokładna liczba goli", "selection": "2", "odds": 5.0, "bookmaker": "Fortuna"},
+    ]
+    best = best_offers(parse_offers(rows))
+    meta = {"match_name": "Legia - Lech", "datetime": "2026-10-20T18:00:00", "sport": "piłka nożna", "league": "Ekstraklasa"}
+    assert surebets_for_match("m1", meta, best, -100.0) == []
+
+
+STS_CSV = """match_id,match_name,sport,competition,datetime,market,selection,odds,bookmaker
+NOWŁ06062045,Norwegia - Włochy,Piłka Nożna,Międzynarodowe,2025-06-06T20:45:00,mecz,norwegia,2.65,STS
+NOWŁ06062045,Norwegia - Włochy,Piłka Nożna,Międzynarodowe,2025-06-06T20:45:00,mecz,x,3.40,STS
+NOWŁ06062045,Norwegia - Włochy,Piłka Nożna,Międzynarodowe,2025-06-06T20:45:00,mecz,włochy,2.65,STS
+NOWŁ06062045,Norwegia - Włochy,Piłka Nożna,Międzynarodowe,2025-06-06T20:45:00,mecz,1x,1.48,STS
+NOWŁ06062045,Norwegia - Włochy,Piłka Nożna,Międzynarodowe,2025-06-06T20:45:00,zakład bez remisu,norwegia,1.88,STS
+NOWŁ06062045,Norwegia - Włochy,Piłka Nożna,Międzynarodowe,2025-06-06T20:45:00,zakład bez remisu,włochy,1.88,STS
+NOWŁ06062045,Norwegia - Włochy,Piłka Nożna,Międzynarodowe,2025-06-06T20:45:00,1. połowa,norwegia,3.20,STS
+NOWŁ06062045,Norwegia - Włochy,Piłka Nożna,Międzynarodowe,2025-06-06T20:45:00,1. połowa,x,2.20,STS
+NOWŁ06062045,Norwegia - Włochy,Piłka Nożna,Międzynarodowe,2025-06-06T20:45:00,1. połowa,włochy,3.20,STS
+"""
+
+FORTUNA_CSV = """match_id,match_name,sport,competition,datetime,market_name,outcome,odds,bookmaker
+NOWŁ06062045,Norwegia - Włochy,Piłka nożna,Kwalifikacje MŚ-Europa,2025-06-06T20:45:00,SPOTKANIE BEZ REMISU,Norwegia,{home_dnb},Fortuna
+NOWŁ06062045,Norwegia - Włochy,Piłka nożna,Kwalifikacje MŚ-Europa,2025-06-06T20:45:00,SPOTKANIE BEZ REMISU,Włochy,{away_dnb},Fortuna
+NOWŁ06062045,Norwegia - Włochy,Piłka nożna,Kwalifikacje MŚ-Europa,2025-06-06T20:45:00,1.POŁOWA,Norwegia,3.2,Fortuna
+NOWŁ06062045,Norwegia - Włochy,Piłka nożna,Kwalifikacje MŚ-Europa,2025-06-06T20:45:00,1.POŁOWA,Remis,2.2,Fortuna
+NOWŁ06062045,Norwegia - Włochy,Piłka nożna,Kwalifikacje MŚ-Europa,2025-06-06T20:45:00,1.POŁOWA,Włochy,3.2,Fortuna
+"""
+
+
+def _load(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return load_csv(str(path))
+
+
+def test_team_name_selections_map_to_sides():
+    assert normalize_for_match("mecz", "norwegia", "Norwegia - Włochy") == ("1x2", "1")
+    assert normalize_for_match("SPOTKANIE BEZ REMISU", "Włochy", "Norwegia - Włochy") == ("dnb", "2")
+    assert normalize_for_match("1.POŁOWA", "Remis", "Norwegia - Włochy") == ("1x2_1h", "x")
+    # poza rynkami 1X2 / bez remisu nazwa drużyny nie jest zamieniana
+    assert normalize_for_match("zwycięzca", "norwegia", "Norwegia - Włochy") == (None, None)
+    # bez kontekstu meczu zachowanie normalize() bez zmian
+    assert normalize_for_match("mecz", "norwegia") == (None, None)
+
+
+def test_real_rows_pair_across_bookmakers(tmp_path):
+    sts = _load(tmp_path, "sts.csv", STS_CSV)
+    fortuna = _load(tmp_path, "fortuna.csv", FORTUNA_CSV.format(home_dnb="1.94", away_dnb="1.85"))
+
+    index, meta, books = build_offer_index(sts, fortuna)
+    offers = index["NOWŁ06062045"]
+    assert books["NOWŁ06062045"] == 2
+    assert sorted(offers[("dnb", "1")]) == [("Fortuna", 1.94), ("STS", 1.88)]
+    assert sorted(offers[("1x2_1h", "x")]) == [("Fortuna", 2.2), ("STS", 2.2)]
+    assert sorted(offers[("1x2", "2")]) == [("STS", 2.65)]
+    assert ("1x2", "1x") not in offers
+
+    best = best_offers(offers)
+    near = surebets_for_match("NOWŁ06062045", meta["NOWŁ06062045"], best, -100.0)
+    dnb = next(s for s in near if s["submarket"] == "dnb")
+    assert [(b["selection"], b["bookmaker"]) for b in dnb["bets"]] == [("1", "Fortuna"), ("2", "STS")]
+
+
+def test_real_rows_produce_dnb_surebet(tmp_path):
+    sts = _load(tmp_path, "sts.csv", STS_CSV)
+    # Fortuna spóźnia się z kursem na gościa – realny surebet STS "norwegia" × Fortuna "Włochy"
+    fortuna = _load(tmp_path, "fortuna.csv", FORTUNA_CSV.format(home_dnb="1.80", away_dnb="3.10"))
+
+    surebets = compute_surebets(sts, fortuna)
+    assert [s["submarket"] for s in surebets] == ["dnb"]
+    assert [(b["selection"], b["bookmaker"], b["odds"]) for b in surebets[0]["bets"]] == [
+        ("1", "STS", 1.88), ("2", "Fortuna", 3.10),
+    ]
+    assert surebets[0]["profit"] > 0
@@ -0,0 +1,142 @@
+# tests/test_match_scheduler.py
+
+from datetime import datetime, timedelta
+
+from modules.match_scheduler import DEFAULT_SCHEDULER_SETTINGS, MatchScheduler, NearBoard
+
+LEAGUE = "https://example.com/liga"
+
+
+def scheduler(board=None, **overrides):
+    settings = {**DEFAULT_SCHEDULER_SETTINGS, **overrides}
+    return MatchScheduler("STS", settings, board=board or NearBoard(), log=lambda msg: None)
+
+
+def test_take_returns_new_links_once():
+    sch = scheduler()
+    sch.register(LEAGUE, ["a", "b", "a"])
+    assert sorted(sch.take(LEAGUE)) == ["a", "b"]
+    assert sch.take(LEAGUE) == []
+    assert sch.take("https://example.com/inna") == []
+
+
+def test_register_drops_links_missing_from_league():
+    sch = scheduler()
+    sch.register(LEAGUE, ["a", "b"])
+    sch.register(LEAGUE, ["b", "c"])
+    assert sorted(sch.take(LEAGUE)) == ["b", "c"]
+
+
+def test_started_matches_are_dropped():
+    sch = scheduler()
+    sch.register(LEAGUE, ["a", "b"])
+    sch.record("a", "m-a", datetime.now() - timedelta(minutes=1))
+    assert sch.take(LEAGUE) == ["b"]
+    sch.register(LEAGUE, ["b"])
+    assert sch.next_due() > 0
+
+
+def test_started_match_does_not_return_from_cached_listing():
+    sch = scheduler()
+    sch.register(LEAGUE, ["a", "b"])
+    sch.record("a", "m-a", datetime.now() - timedelta(minutes=1))
+    assert sch.take(LEAGUE) == ["b"]
+    # lista ligi z cache (TTL) wciąż zawiera rozpoczęty mecz
+    sch.register(LEAGUE, ["a", "b"])
+    assert sch.take(LEAGUE) == []
+    assert "a" not in sch._entries
+    # mecz znika z listy ligi – znacznik też; powrót linku to nowy mecz
+    sch.register(LEAGUE, ["b"])
+    sch.register(LEAGUE, ["a", "b"])
+    assert sch.take(LEAGUE) == ["a"]
+
+
+def test_priority_follows_kickoff_volatility_and_near_board():
+    board = NearBoard()
+    sch = scheduler(board)
+    sch.register(LEAGUE, ["soon", "later"])
+    now = datetime.now()
+    sch.record("soon", "m-soon", now + timedelta(hours=1))
+    sch.record("later", "m-later", now + timedelta(days=3))
+    soon, later = sch._entries["soon"], sch._entries["later"]
+    assert sch.priority(soon, now) > sch.priority(later, now)
+
+    for _ in range(4):
+        sch.record("later", changed=True)
+    volatile = sch.priority(later, now)
+    assert volatile > 0.0
+
+    board.update("m-later", -0.3)
+    assert sch.priority(later, now) > volatile
+    assert sch.rescan_interval(1.0) == sch.min_rescan
+    assert sch.rescan_interval(0.0) == sch.max_rescan
+
+
+def test_never_fetched_links_go_first_and_budget_limits_take():
+    sch = scheduler(budget_per_hour=3)
+    sch.register(LEAGUE, ["a", "b", "c", "d"])
+    first = sch.take(LEAGUE)
+    assert len(first) == 3
+    # budżet wyczerpany – nic więcej do końca okna godzinnego
+    assert sch.take(LEAGUE) == []
+    assert sch.next_due() > 3000
+    assert "zostało 0/3" in sch.summary(LEAGUE, 0)
+
+
+def test_next_due():
+    sch = scheduler()
+    assert sch.next_due() is None
+    sch.register(LEAGUE, ["a"])
+    assert sch.next_due() == 0.0
+    sch.take(LEAGUE)
+    assert sch.min_rescan <= sch.next_due() <= sch.max_rescan
+    assert scheduler(enabled=False).next_due() is None
+
+
+def test_disabled_scheduler_returns_every_link():
+    sch = scheduler(enabled=False)
+    sch.register(LEAGUE, ["a", "b"])
+    assert sch.take(LEAGUE) == ["a", "b"]
+    assert sch.take(LEAGUE) == ["a", "b"]
+    assert sch.take_hot() == []
+
+
+def test_take_hot_only_near_board_matches():
+    board = NearBoard()
+    sch = scheduler(board, hot_rescan=0, hot_max=1)
+    sch.register(LEAGUE, ["a", "b", "c"])
+    kickoff = datetime.now() + timedelta(hours=2)
+    for link in ("a", "b", "c"):
+        sch.record(link, f"m-{link}", kickoff)
+    assert sch.take_hot() == []
+
+    board.update("m-a", -0.5)
+    board.update("m-b", 1.2)
+    assert sch.take_hot() == [("b", LEAGUE)]     # najbliżej arbitrażu, hot_max=1
+    board.update("m-b", None)
+    assert sch.take_hot() == [("a", LEAGUE)]
+
+
+def test_live_match_stays_in_queue_after_kickoff():
+    board = NearBoard()
+    sch = scheduler(board, hot_rescan=0)
+    sch.register(LEAGUE, ["a", "b"])
+    sch.take(LEAGUE)
+    started = datetime.now() - timedelta(minutes=10)
+    sch.record("a", "m-a", started)
+    sch.record("b", "m-b", started)
+    board.set_live("m-a", True)
+
+    sch._entries["a"]["last_fetch"] = 0      # zaległy
+    assert sch.take(LEAGUE) == ["a"]          # "b" (nie live) wypada
+    assert "b" not in sch._entries
+    # mecz usunięty po starcie wraca (ze swoim stanem), gdy feed live go oznaczy
+    board.set_live("m-b", True)
+    sch.register(LEAGUE, ["a", "b"])
+    assert sch._entries["b"]["match_id"] == "m-b"
+
+    # lista ligi nie pokazuje już trwających meczów – mecze live zostają
+    sch.register(LEAGUE, [])
+    assert sorted(sch._entries) == ["a", "b"]
+    board.update("m-a", -0.2)
+    assert sch.take_hot() == [("a", LEAGUE)]
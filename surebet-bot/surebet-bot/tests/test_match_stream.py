@@ -0,0 +1,85 @@
+# tests/test_match_stream.py
+
+import asyncio
+import threading
+from datetime import datetime
+
+from modules.arbitrage import match_to_entry
+from modules.arbitrage_engine import ArbitrageEngine
+from modules.match_stream import MatchStream
+
+
+def test_publish_without_consumer_is_a_no_op():
+    assert MatchStream().publish("STS", {"match_id": "m1"}) is False
+
+
+def test_matches_from_worker_threads_reach_the_consumer():
+    stream = MatchStream()
+
+    async def run():
+        stream.bind()
+        workers = [threading.Thread(target=stream.publish, args=(book, {"match_id": "m1"}))
+                   for book in ("STS", "Fortuna")]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        received = [await asyncio.wait_for(stream.get(), 1) for _ in workers]
+        stream.unbind()
+        return received
+
+    received = asyncio.run(run())
+    assert sorted(book for book, _ in received) == ["Fortuna", "STS"]
+    assert stream.publish("STS", {"match_id": "m1"}) is False
+
+
+def test_publish_after_consumer_loop_closed_returns_false():
+    stream = MatchStream()
+
+    async def bind():
+        stream.bind()
+
+    asyncio.run(bind())
+    assert stream.publish("STS", {"match_id": "m1"}) is False
+
+
+def test_match_to_entry_flattens_both_scraper_formats():
+    sts = match_to_entry({
+        "match_name": "Legia - Lech", "sport": "Piłka nożna", "competition": "Ekstraklasa",
+        "datetime": datetime(2026, 10, 20, 18, 0),
+        "markets": [{"market": "Liczba goli ", "selection": "Powyżej 2.5", "odds": "2,5"},
+                    {"market": "Mecz", "selection": "1", "odds": "-"}],
+    }, "STS")
+    assert sts == {
+        "match_name": "Legia - Lech", "datetime": "2026-10-20T18:00:00", "sport": "Piłka nożna",
+        "league": "Ekstraklasa",
+        "markets": [{"market": "liczba goli", "selection": "powyżej 2.5", "odds": 2.5, "bookmaker": "STS"}],
+    }
+
+    fortuna = match_to_entry({
+        "match_name": "Legia - Lech", "datetime": "2026-10-20T18:00:00",
+        "markets": [{"market_name": "LICZBA GOLI", "selections": [{"outcome": "Poniżej 2.5", "odds": 2.6}]}],
+    }, "Fortuna")
+    assert fortuna["markets"] == [{"market": "liczba goli", "selection": "poniżej 2.5", "odds": 2.6, "bookmaker": "Fortuna"}]
+    assert fortuna["league"] == ""
+
+
+def test_streamed_matches_feed_the_engine():
+    stream, engine = MatchStream(), ArbitrageEngine()
+    sts = {"match_id": "m1", "match_name": "Legia - Lech", "datetime": "2026-10-20T18:00:00",
+           "markets": [{"market": "liczba goli", "selection": "powyżej 2.5", "odds": 2.5}]}
+    fortuna = {"match_id": "m1", "match_name": "Legia - Lech", "datetime": "2026-10-20T18:00:00",
+               "markets": [{"market_name": "LICZBA GOLI", "selections": [{"outcome": "poniżej 2.5", "odds": 2.6}]}]}
+
+    async def run():
+        stream.bind()
+        stream.publish("STS", sts)
+        stream.publish("Fortuna", fortuna)
+        found = []
+        for _ in range(2):
+            book, match = await asyncio.wait_for(stream.get(), 1)
+            found += engine.update(book, match["match_id"], match_to_entry(match, book))[0]
+        return found
+
+    found = asyncio.run(run())
+    assert [sb["submarket"] for sb in found] == ["over_under:2.5"]
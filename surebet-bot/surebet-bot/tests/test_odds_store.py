@@ -0,0 +1,91 @@
+# tests/test_odds_store.py
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from modules.odds_store import OddsStore
+
+KICKOFF = (datetime.now() + timedelta(days=1)).replace(microsecond=0)
+
+
+def sts_match(mid, rows, kickoff=KICKOFF):
+    """Mecz w formacie scrapera STS (płaska lista market/selection/odds)."""
+    return {
+        "match_id":    mid,
+        "match_name":  "Legia - Lech",
+        "sport":       "Piłka nożna",
+        "competition": "Ekstraklasa",
+        "datetime":    kickoff,
+        "markets":     [{"market": m, "selection": s, "odds": o} for m, s, o in rows],
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    st = OddsStore(str(tmp_path / "odds.db"))
+    yield st
+    st.close()
+
+
+def test_upsert_replaces_rows_of_one_match(store):
+    assert store.upsert_match("STS", sts_match("m1", [("Liczba goli", "Powyżej 2.5", 1.9),
+                                                      ("Liczba goli", "Poniżej 2.5", "1,95")])) == 2
+    store.upsert_match("STS", sts_match("m2", [("Mecz", "1", 2.1)]))
+    assert store.upsert_match("STS", sts_match("m1", [("Liczba goli", "Powyżej 2.5", 2.0)])) == 1
+
+    data = store.load("STS")
+    assert set(data) == {"m1", "m2"}
+    assert data["m1"]["markets"] == [{"market": "liczba goli", "selection": "powyżej 2.5", "odds": 2.0, "bookmaker": "STS"}]
+    assert data["m1"]["datetime"] == KICKOFF.strftime("%Y-%m-%dT%H:%M:%S")
+    assert data["m1"]["league"] == "Ekstraklasa"
+    assert data["m2"]["markets"][0]["odds"] == 2.1
+
+
+def test_bookmakers_are_kept_apart(store):
+    store.upsert_match("STS", sts_match("m1", [("Mecz", "1", 2.1)]))
+    store.upsert_match("Fortuna", {
+        "match_id": "m1", "match_name": "Legia - Lech", "sport": "Piłka nożna", "competition": "Ekstraklasa",
+        "datetime": KICKOFF.strftime("%Y-%m-%dT%H:%M:%S"),
+        "markets": [{"market_name": "MECZ", "selections": [{"outcome": "X", "odds": 3.3, "bookmaker": "Fortuna"}]}],
+    })
+    assert store.load("STS")["m1"]["markets"][0]["odds"] == 2.1
+    assert store.load("Fortuna")["m1"]["markets"] == [{"market": "mecz", "selection": "x", "odds": 3.3, "bookmaker": "Fortuna"}]
+    assert store.load("Etoto") == {}
+    assert store.last_update("Etoto") is None
+
+
+def test_load_since_returns_only_newer_matches(store):
+    store.upsert_match("STS", sts_match("m1", [("Mecz", "1", 2.1)]))
+    checkpoint = store.last_update("STS")
+    time.sleep(0.02)
+    store.upsert_match("STS", sts_match("m2", [("Mecz", "2", 3.1)]))
+    assert set(store.load("STS", since=checkpoint + 0.01)) == {"m2"}
+    assert store.last_update("STS") > checkpoint
+
+
+def test_expire_drops_matches_older_than_ttl(store):
+    # pierwszy zapis od razu odpala expire(), kolejne – dopiero po EXPIRE_EVERY
+    store.upsert_match("STS", sts_match("new", [("Mecz", "1", 2.1)]))
+    store.upsert_match("STS", sts_match("old", [("Mecz", "1", 2.1)], kickoff=datetime.now() - timedelta(hours=30)))
+    assert set(store.load("STS")) == {"new", "old"}
+    assert store.expire() == 1
+    assert set(store.load("STS")) == {"new"}
+
+
+def test_import_entries_and_reopen(tmp_path):
+    path = str(tmp_path / "odds.db")
+    store = OddsStore(path)
+    store.import_entries("Fortuna", {"m1": {
+        "match_name": "Legia - Lech", "datetime": KICKOFF.strftime("%Y-%m-%dT%H:%M:%S"),
+        "sport": "Piłka nożna", "league": "Ekstraklasa",
+        "markets": [{"market": "mecz", "selection": "1", "odds": 2.2, "bookmaker": "Fortuna"}],
+    }})
+    store.close()
+
+    reopened = OddsStore(path)
+    try:
+        assert reopened.load("Fortuna")["m1"]["markets"][0]["odds"] == 2.2
+    finally:
+        reopened.close()
@@ -0,0 +1,118 @@
+# tests/test_proxy_manager.py
+
+import pytest
+import yaml
+
+from modules import proxy_manager
+from modules.config_manager import ConfigManager
+from modules.proxy_manager import ProxyManager, proxy_server_from_kwargs
+
+PROXIES = ["http://p1:8080", "http://p2:8080", "http://p3:8080"]
+DEFAULT_QUARANTINE = proxy_manager.DEFAULT_PROXY_HEALTH["quarantine"]
+
+
+class FakeTime:
+    """Zegar kwarantann i sesji (modules.proxy_manager.time) – przesuwany ręcznie."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(proxy_manager, "time", fake)
+    return fake
+
+
+def manager(tmp_path, proxies=PROXIES, **health):
+    path = tmp_path / "config.yaml"
+    path.write_text(yaml.safe_dump({"scraping": {
+        "proxies": list(proxies), "user_agents": ["UA-1", "UA-2"], "proxy_health": health,
+    }}), encoding="utf-8")
+    return ProxyManager(ConfigManager(str(path)))
+
+
+def server(pm, session=None):
+    return proxy_server_from_kwargs(pm.get_request_kwargs(session))
+
+
+def test_failures_in_a_row_quarantine_with_doubling_period(tmp_path, clock):
+    pm = manager(tmp_path, fail_threshold=3, quarantine=60)
+    assert pm.report(PROXIES[0], False) is None
+    assert pm.report(PROXIES[0], False) is None
+    assert pm.report(PROXIES[0], False) == 60
+    assert pm.stats(PROXIES[0])["quarantined_for"] == 60
+
+    clock.now += 61
+    for _ in range(2):
+        pm.report(PROXIES[0], False)
+    # kolejna kwarantanna bez sukcesu po drodze – dwa razy dłuższa
+    assert pm.report(PROXIES[0], False) == 120
+
+    # sukces zeruje licznik kwarantann
+    pm.report(PROXIES[0], True, latency=0.2)
+    assert pm.report(PROXIES[0], False, status=429) == 60
+
+
+def test_ban_status_quarantines_at_once_and_is_skipped(tmp_path, clock):
+    pm = manager(tmp_path)
+    assert pm.report(PROXIES[1], False, status=403) == DEFAULT_QUARANTINE
+    picked = {server(pm) for _ in range(50)}
+    assert PROXIES[1] not in picked
+
+    clock.now += DEFAULT_QUARANTINE + 1
+    assert PROXIES[1] in {server(pm) for _ in range(50)}
+
+
+def test_all_quarantined_returns_the_one_released_first(tmp_path, clock):
+    pm = manager(tmp_path)
+    pm.report(PROXIES[0], False, status=403)
+    clock.now += 10
+    pm.report(PROXIES[1], False, status=403)
+    pm.report(PROXIES[2], False, status=403)
+    assert server(pm) == PROXIES[0]
+
+
+def test_fastest_healthy_proxies_are_preferred(tmp_path, clock):
+    pm = manager(tmp_path, min_samples=3, top_k=1, min_success=0.6)
+    for _ in range(3):
+        pm.report(PROXIES[0], True, latency=0.9)
+        pm.report(PROXIES[1], True, latency=0.1)
+    # szybkie, ale zawodne – odsetek sukcesów poniżej min_success
+    pm.report(PROXIES[2], True, latency=0.01)
+    for _ in range(2):
+        pm.report(PROXIES[2], False)
+    assert {server(pm) for _ in range(20)} == {PROXIES[1]}
+
+    stats = pm.stats(PROXIES[1])
+    assert stats["requests"] == 3 and stats["success_rate"] == 1.0
+    assert stats["p50"] == pytest.approx(0.1)
+    assert "PROXY http://p2:8080: żądań 3, sukces 100%, p50 100 ms" in pm.format_stats()
+
+
+def test_sticky_session_keeps_proxy_and_ua_until_ttl_or_quarantine(tmp_path, clock):
+    pm = manager(tmp_path, sticky_ttl=900)
+    first = pm.get_request_kwargs("sts:0")
+    assert pm.get_request_kwargs("sts:0") == first
+
+    clock.now += 901
+    pm.get_request_kwargs("sts:0")   # po TTL – nowe losowanie (może wypaść to samo proxy)
+    again = pm.get_request_kwargs("sts:0")
+    assert pm.get_request_kwargs("sts:0") == again
+
+    # proxy sesji na kwarantannie – sesja dostaje inne
+    pm.report(proxy_server_from_kwargs(again), False, status=403)
+    assert server(pm, "sts:0") != proxy_server_from_kwargs(again)
+
+
+def test_without_proxies_only_user_agent(tmp_path, clock):
+    pm = manager(tmp_path, proxies=[])
+    kwargs = pm.get_request_kwargs("fortuna:0")
+    assert "proxies" not in kwargs
+    assert kwargs["headers"]["User-Agent"] in ("UA-1", "UA-2")
+    assert pm.report(None, False) is None
+
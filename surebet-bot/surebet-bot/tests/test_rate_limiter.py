@@ -0,0 +1,104 @@
+# tests/test_rate_limiter.py
+
+import asyncio
+
+import pytest
+
+from modules import rate_limiter
+from modules.rate_limiter import DEFAULT_RATE_LIMITS, RateLimiter, TokenBucket, is_backoff_signal
+
+BACKOFF = DEFAULT_RATE_LIMITS["backoff"]
+
+
+class FakeTime:
+    """Zegar do kubełków (modules.rate_limiter.time) – przesuwany ręcznie."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(rate_limiter, "time", fake)
+    return fake
+
+
+def test_bucket_allows_burst_then_paces(clock):
+    bucket = TokenBucket(rate=2, burst=2, backoff=BACKOFF)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+    clock.now += 10
+    # zapas odnawia się tylko do `burst`
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() > 0.0
+
+
+def test_penalize_slows_down_and_doubles_cooldown(clock):
+    bucket = TokenBucket(rate=1, burst=3, backoff=BACKOFF)
+    assert bucket.penalize() == 30
+    assert bucket.rate == pytest.approx(0.5)
+    assert bucket.reserve() >= 30
+    assert bucket.penalize() == 60
+    assert bucket.rate == pytest.approx(0.25)
+
+    bucket.reward()
+    assert bucket.strikes == 0
+    assert bucket.rate == pytest.approx(0.3)
+    for _ in range(100):
+        bucket.reward()
+    assert bucket.rate == bucket.base_rate
+
+
+def test_backoff_signals():
+    assert is_backoff_signal(status=429)
+    assert not is_backoff_signal(status=404)
+    assert is_backoff_signal(error=TimeoutError())
+    assert not is_backoff_signal(error=ConnectionError())
+
+
+def test_limiter_penalizes_domain_and_proxy_on_ban(clock):
+    limiter = RateLimiter({**DEFAULT_RATE_LIMITS, "jitter": 0})
+    assert limiter.report("sts.pl", "p1", status=403) == 30
+    assert limiter.domain_bucket("sts.pl").strikes == 1
+    assert limiter.proxy_bucket("p1").strikes == 1
+    assert limiter.domain_bucket("fortuna.pl").strikes == 0
+
+    # błąd połączenia obciąża tylko proxy
+    assert limiter.report("fortuna.pl", "p2", error=ConnectionError()) is None
+    assert limiter.proxy_bucket("p2").strikes == 1
+    assert limiter.domain_bucket("fortuna.pl").strikes == 0
+
+    limiter.report("sts.pl", "p1", status=200)
+    assert limiter.domain_bucket("sts.pl").strikes == 0
+
+
+def test_limiter_reads_status_from_http_error(clock):
+    class Response:
+        status_code = 429
+
+    class HTTPError(Exception):
+        response = Response()
+
+    limiter = RateLimiter({**DEFAULT_RATE_LIMITS, "jitter": 0})
+    assert limiter.report("sts.pl", None, error=HTTPError()) == 30
+
+
+def test_acquire_uses_domain_limits():
+    limiter = RateLimiter({**DEFAULT_RATE_LIMITS, "jitter": 0, "domains": {"sts.pl": {"rate": 100, "burst": 1}}})
+    assert limiter.domain_bucket("sts.pl").base_rate == 100
+    assert limiter.proxy_bucket(None) is None
+
+    async def run():
+        return [await limiter.acquire("sts.pl") for _ in range(3)]
+
+    waits = asyncio.run(run())
+    assert waits[0] == 0.0
+    assert 0 < waits[1] <= 0.01
+    assert all(w <= 0.01 for w in waits)
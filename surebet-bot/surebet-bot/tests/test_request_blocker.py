@@ -0,0 +1,84 @@
+# tests/test_request_blocker.py
+
+import asyncio
+
+from modules.request_blocker import DEFAULT_BLOCKING, RequestBlocker, blocking_settings
+
+
+class FakeRoute:
+    def __init__(self, url, resource_type, page=None, closed=False):
+        frame = type("Frame", (), {"page": page})()
+        self.request = type("Request", (), {"url": url, "resource_type": resource_type, "frame": frame})()
+        self.closed = closed
+        self.action = None
+
+    async def continue_(self):
+        if self.closed:
+            raise RuntimeError("Target page, context or browser has been closed")
+        self.action = "continue"
+
+    async def abort(self):
+        if self.closed:
+            raise RuntimeError("Target page, context or browser has been closed")
+        self.action = "abort"
+
+
+def route(blocker, url, rtype, page=None, closed=False):
+    r = FakeRoute(url, rtype, page, closed)
+    asyncio.run(blocker.handle(r))
+    return r.action
+
+
+def test_blocks_heavy_resources_and_tracking_domains():
+    blocker = RequestBlocker(DEFAULT_BLOCKING)
+    assert route(blocker, "https://www.sts.pl/img/logo.png", "image") == "abort"
+    assert route(blocker, "https://www.sts.pl/fonts/a.woff2", "font") == "abort"
+    assert route(blocker, "https://www.google-analytics.com/g/collect", "xhr") == "abort"
+    assert route(blocker, "https://connect.facebook.net/pl_PL/fbevents.js", "script") == "abort"
+    # dokumenty, skrypty i API bukmachera przechodzą – także domena tylko „podobna” do blokowanej
+    assert route(blocker, "https://www.sts.pl/kursy/niemcy-francja/810661219", "document") == "continue"
+    assert route(blocker, "https://www.sts.pl/api/offer", "fetch") == "continue"
+    assert route(blocker, "https://notfacebook.com/app.js", "script") == "continue"
+
+
+def test_counts_estimated_bytes_in_total_and_per_page():
+    blocker = RequestBlocker(DEFAULT_BLOCKING)
+    page, other = object(), object()
+    blocker.track(page)
+    route(blocker, "https://www.sts.pl/a.png", "image", page)
+    route(blocker, "https://www.googletagmanager.com/gtm.js", "script", page)
+    route(blocker, "https://www.sts.pl/b.png", "image", other)       # karta nieśledzona
+    route(blocker, "https://www.sts.pl/app.js", "script", page)      # przepuszczone
+
+    est = DEFAULT_BLOCKING["estimate_bytes"]
+    assert blocker.release(page) == {"requests": 2, "est_bytes": est["image"] + est["script"]}
+    assert blocker.total == {"requests": 3, "est_bytes": 2 * est["image"] + est["script"]}
+    assert blocker.release(page) == {"requests": 0, "est_bytes": 0}
+
+
+def test_closed_page_is_not_counted():
+    blocker = RequestBlocker(DEFAULT_BLOCKING)
+    assert route(blocker, "https://www.sts.pl/a.png", "image", closed=True) is None
+    assert blocker.total == {"requests": 0, "est_bytes": 0}
+
+
+class FakeConfig:
+    def __init__(self, blocking):
+        self.blocking = blocking
+
+    def get(self, *keys, default=None):
+        return self.blocking if keys == ('scraping', 'request_blocking') else default
+
+
+def test_blocking_settings_overrides_defaults():
+    settings = blocking_settings(FakeConfig({"domains": [".hotjar.com"]}))
+    assert settings["domains"] == [".hotjar.com"]
+    assert settings["resource_types"] == DEFAULT_BLOCKING["resource_types"]
+    assert blocking_settings(FakeConfig(None)) == DEFAULT_BLOCKING
+
+
+def test_custom_settings():
+    blocker = RequestBlocker({"resource_types": ["media"], "domains": [".hotjar.com"], "estimate_bytes": {"other": 5}})
+    assert route(blocker, "https://www.sts.pl/a.png", "image") == "continue"
+    assert route(blocker, "https://script.hotjar.com/x.js", "script") == "abort"
+    assert blocker.total == {"requests": 1, "est_bytes": 5}
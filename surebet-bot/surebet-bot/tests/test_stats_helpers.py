@@ -0,0 +1,12 @@
+# tests/test_stats_helpers.py
+
+from modules.stats_helpers import percentile
+
+
+def test_percentile_nearest_sample():
+    values = [5, 1, 4, 2, 3]
+    assert percentile(values, 0) == 1
+    assert percentile(values, 50) == 3
+    assert percentile(values, 95) == 5
+    assert percentile([7], 95) == 7
+    assert percentile([], 50) is None